@@ -0,0 +1,78 @@
+# Compares the old per-crime lookups of display_crimes_data with the single dossier query
+# Run from the project folder:  python benchmarks/bench_dossier.py [itersize]
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crime_data
+import database
+
+
+class CountingCursor:                                       # Wraps a cursor and counts the statements sent through it
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.statements = 0
+
+    def execute(self, query, params=None):
+        self.statements += 1
+        return self.cursor.execute(query, params)
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+def per_crime_lookups(cursor):                              # The old way: one query for the crimes, then three more for every crime
+    cursor.execute('SELECT CrimeID, Type, Date, Location FROM "Crimes"')
+    dossiers = []
+    for crime_id, crime_type, crime_date, crime_location in cursor.fetchall():
+        cursor.execute('SELECT Type, Description FROM "Evidence" WHERE crimeid = %s', (crime_id,))
+        evidence = cursor.fetchall()
+        cursor.execute('SELECT Name, Rank, Department FROM "Officers" WHERE CrimeID = %s', (crime_id,))
+        officers = cursor.fetchall()
+        cursor.execute('SELECT Name, Age, Description FROM "Suspects" WHERE CrimeID = %s', (crime_id,))
+        suspects = cursor.fetchall()
+        dossiers.append((crime_id, crime_type, crime_date, crime_location, evidence, officers, suspects))
+    return dossiers
+
+def normalise(dossier):                                     # json_agg gives lists, the old queries gave tuples, compare them the same way
+    crime_id, crime_type, crime_date, crime_location, evidence, officers, suspects = dossier
+    children = [sorted(tuple(str(value) for value in item) for item in items) for items in (evidence, officers, suspects)]
+    return (crime_id, crime_type, str(crime_date), crime_location, *map(tuple, children))
+
+def main():
+    itersize = int(sys.argv[1]) if len(sys.argv) > 1 else database.STREAM_ITERSIZE
+
+    with database.get_cursor() as cursor:
+        counting_cursor = CountingCursor(cursor)
+        started = time.perf_counter()
+        old_dossiers = per_crime_lookups(counting_cursor)
+        old_seconds = time.perf_counter() - started
+        old_round_trips = counting_cursor.statements
+
+    with database.get_streaming_cursor('bench_dossier', itersize) as cursor:
+        counting_cursor = CountingCursor(cursor)
+        started = time.perf_counter()
+        new_dossiers = list(crime_data.fetch_crime_dossiers(counting_cursor))
+        new_seconds = time.perf_counter() - started
+        fetches = math.ceil(len(new_dossiers) / itersize) + 1  # FETCH FORWARD batches, the last one comes back empty
+        new_round_trips = counting_cursor.statements + fetches
+
+    database.close_pool()
+
+    same_output = sorted(map(normalise, old_dossiers)) == sorted(map(normalise, new_dossiers))
+
+    print(f'Crimes:                  {len(old_dossiers)}')
+    print(f'Per-crime lookups:       {old_round_trips} round trips, {old_seconds:.3f}s')
+    print(f'Dossier query:           {new_round_trips} round trips ({counting_cursor.statements} statement, {fetches} fetches of {itersize}), {new_seconds:.3f}s')
+    print(f'Same data in both:       {"yes" if same_output else "NO"}')
+
+    if not same_output:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# Frame times while the mouse moves over the menu, old per-button hover handling vs the shared HoverDispatcher
+# Run from the project folder:  python benchmarks/bench_hover.py [frames] [screens]
+# Every frame the mouse moves to the next point of a zigzag over the buttons. Each mode runs in its own process
+# (Kivy runs one App per process), the app has several screens with 10 buttons each like the GUI.
+import math
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(math.ceil(fraction * len(ordered))) - 1, len(ordered) - 1)]
+
+def run_mode(mode, frames, screens):                        # runs inside the child process
+    from kivy.app import App
+    from kivy.clock import Clock
+    from kivy.core.window import Window
+    from kivy.graphics import Color, RoundedRectangle
+    from kivy.properties import BooleanProperty
+    from kivy.uix.button import Button
+    from kivy.uix.gridlayout import GridLayout
+    from kivy.uix.screenmanager import ScreenManager, Screen, NoTransition
+
+    from custom_button import CustomButton
+
+    class LegacyButton(Button):                             # CustomButton as it was: own binding, canvas rebuilt on every move
+        hovered = BooleanProperty(False)
+
+        def __init__(self, **kwargs):
+            super(LegacyButton, self).__init__(**kwargs)
+            self.background_normal = ''
+            self.background_color = (0, 0, 0, 0)
+            self.font_name = "Roboto-Bold"
+            self.font_size = self.height * 0.4
+            self.bind(pos=self.update_canvas, size=self.update_canvas)
+            Window.bind(mouse_pos=self.on_mouse_pos)
+
+        def update_canvas(self, *args):
+            self.font_size = self.height * 0.4
+            with self.canvas.before:
+                self.canvas.before.clear()
+                Color(0, 0, 0, 0.25)
+                RoundedRectangle(pos=(self.x + 3, self.y - 3), size=self.size, radius=[15])
+                button_color = (0.2, 0.7, 0.6, 1) if not self.hovered else (0.3, 0.9, 0.8, 1)
+                Color(*button_color)
+                RoundedRectangle(pos=self.pos, size=self.size, radius=[15])
+                Color(0.2, 1, 0.8, 1)
+                RoundedRectangle(pos=(self.x, self.y + self.height - 10), size=(self.width, 10), radius=[15, 15, 0, 0])
+
+        def on_mouse_pos(self, *args):
+            pos = args[1]
+            self.hovered = self.collide_point(*self.to_widget(*pos))
+            self.update_canvas()
+
+    button_class = LegacyButton if mode == 'legacy' else CustomButton
+    results = {'frame_times': [], 'move_times': []}
+
+    class BenchmarkApp(App):
+        def build(self):
+            manager = ScreenManager(transition=NoTransition())
+            for screen_number in range(screens):
+                screen = Screen(name=f'screen_{screen_number}')
+                grid = GridLayout(cols=2, padding=10, spacing=10)
+                for button_number in range(10):
+                    grid.add_widget(button_class(text=f'Button {button_number + 1}'))
+                screen.add_widget(grid)
+                manager.add_widget(screen)
+            self.frame = 0
+            self.last_frame = None
+            Clock.schedule_interval(self.step, 0)
+            return manager
+
+        def step(self, dt):
+            now = time.perf_counter()
+            if self.last_frame is not None and self.frame > 10:     # the first frames include the window setup
+                results['frame_times'].append(now - self.last_frame)
+            self.last_frame = now
+
+            angle = self.frame * 0.15                       # zigzag over the whole window
+            x = Window.width * (0.5 + 0.45 * math.sin(angle))
+            y = Window.height * (0.5 + 0.45 * math.sin(angle * 0.37))
+            started = time.perf_counter()
+            Window.mouse_pos = (x, y)                       # dispatches the hover handling like a real mouse move
+            results['move_times'].append(time.perf_counter() - started)
+
+            self.frame += 1
+            if self.frame >= frames:
+                self.stop()
+
+    BenchmarkApp().run()
+
+    frame_times, move_times = results['frame_times'], results['move_times']
+    print(f'{mode:>8}: frame p50 {percentile(frame_times, 0.5) * 1000:7.3f} ms  p95 {percentile(frame_times, 0.95) * 1000:7.3f} ms'
+          f'  |  hover handling per move p50 {percentile(move_times, 0.5) * 1000:7.3f} ms  p95 {percentile(move_times, 0.95) * 1000:7.3f} ms'
+          f'  ({screens * 10} buttons, {len(move_times)} moves)')
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    screens = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    if os.environ.get('BENCH_HOVER_MODE'):
+        run_mode(os.environ['BENCH_HOVER_MODE'], frames, screens)
+        return
+
+    for mode in ('legacy', 'shared'):
+        environment = dict(os.environ, BENCH_HOVER_MODE=mode, KIVY_NO_ARGS='1', KIVY_NO_CONSOLELOG='1')
+        subprocess.run([sys.executable, os.path.abspath(__file__), str(frames), str(screens)], env=environment, check=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+# Times the main.py workflows without the menus (no input(), no time.sleep) and writes the results as JSON
+# Run from the project folder:
+#
+#   python benchmarks/bench_workflows.py --generate 100k --reset --output results_100k.json
+#   python benchmarks/bench_workflows.py --baseline results_100k.json      # exit code 1 if something got slower
+#
+# Workflows: insert (one crime), attach (one record to several crimes), dossier (every crime with its records,
+# streamed), update (one field of one crime) and bulk_delete (a set of crimes with their records). Writes are
+# rolled back unless --commit is given, so every run measures the same data.
+import argparse
+import datetime
+import json
+import math
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crime_data
+import database
+import synthetic_data
+
+
+DEFAULT_REPEATS = {'insert': 200, 'attach': 200, 'dossier': 3, 'update': 200, 'bulk_delete': 20}
+ATTACH_CRIMES = 10                                          # crimes per attach, like choosing several in select_multiple_crimes
+DELETE_CRIMES = 100                                         # crimes per bulk delete
+REGRESSION_THRESHOLD = 0.10                                 # 10% slower than the baseline counts as a regression
+
+commit_writes = False
+
+@contextmanager
+def transaction():                                          # Same as database.get_cursor(commit=True), but rolled back unless --commit
+    with database.get_connection() as connection:
+        with connection.cursor() as cursor:
+            yield cursor
+        if commit_writes:
+            connection.commit()
+
+def percentile(values, fraction):                           # nearest rank
+    ordered = sorted(values)
+    return ordered[max(int(math.ceil(fraction * len(ordered))) - 1, 0)]
+
+def summarise(durations):
+    milliseconds = [duration * 1000 for duration in durations]
+    return {
+        'runs': len(milliseconds),
+        'mean_ms': round(sum(milliseconds) / len(milliseconds), 3),
+        'min_ms': round(min(milliseconds), 3),
+        'p50_ms': round(percentile(milliseconds, 0.50), 3),
+        'p95_ms': round(percentile(milliseconds, 0.95), 3),
+        'p99_ms': round(percentile(milliseconds, 0.99), 3),
+        'max_ms': round(max(milliseconds), 3),
+    }
+
+def crime_id_range():
+    with database.get_cursor() as cursor:
+        cursor.execute('SELECT MIN(CrimeID), MAX(CrimeID), COUNT(*) FROM "Crimes"')
+        return cursor.fetchone()
+
+def make_workflows(generator, lowest_id, highest_id):
+    def random_ids(count):
+        return [generator.randint(lowest_id, highest_id) for _ in range(count)]
+
+    def insert():
+        with transaction() as cursor:
+            crime_data.add_crime(cursor, 'Burglary', '2024-01-01', '1 Main Street, Bern')
+
+    def attach():
+        with transaction() as cursor:
+            crime_data.attach_to_crimes(cursor, 'Evidence', ('Fingerprint', 'Found on the window'), random_ids(ATTACH_CRIMES))
+
+    def dossier():
+        with database.get_streaming_cursor('bench_dossier') as cursor:
+            for _ in crime_data.fetch_crime_dossiers(cursor):
+                pass
+
+    def update():
+        with transaction() as cursor:
+            cursor.execute('UPDATE "Crimes" SET location = %s WHERE crimeid = %s', ('2 Mill Lane, Basel', random_ids(1)[0]))
+
+    def bulk_delete():
+        with transaction() as cursor:
+            crime_data.delete_crimes(cursor, random_ids(DELETE_CRIMES))
+
+    return {'insert': insert, 'attach': attach, 'dossier': dossier, 'update': update, 'bulk_delete': bulk_delete}
+
+def run(workflow_names, repeats, seed):
+    generator = random.Random(seed)
+    lowest_id, highest_id, crime_count = crime_id_range()
+    if not crime_count:
+        sys.exit('There are no crimes, run with --generate first')
+    workflows = make_workflows(generator, lowest_id, highest_id)
+
+    results = {}
+    for name in workflow_names:
+        workflows[name]()                                   # warm up: connection, caches, prepared statements
+        durations = []
+        for _ in range(repeats or DEFAULT_REPEATS[name]):
+            started = time.perf_counter()
+            workflows[name]()
+            durations.append(time.perf_counter() - started)
+        results[name] = summarise(durations)
+        print(f'{name:>12}: p50 {results[name]["p50_ms"]:9.3f} ms  p95 {results[name]["p95_ms"]:9.3f} ms  p99 {results[name]["p99_ms"]:9.3f} ms')
+    return results, crime_count
+
+def compare(results, baseline, threshold):                  # Returns the list of regressions, prints every comparison
+    regressions = []
+    for name, stats in results.items():
+        if name not in baseline.get('workflows', {}):
+            continue
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            before, after = baseline['workflows'][name][key], stats[key]
+            change = (after - before) / before if before else 0
+            marker = 'REGRESSION' if change > threshold else ''
+            print(f'{name:>12} {key}: {before:9.3f} -> {after:9.3f} ms ({change * 100:+6.1f}%) {marker}')
+            if marker:
+                regressions.append(f'{name} {key}')
+    return regressions
+
+def main():
+    global commit_writes
+    parser = argparse.ArgumentParser(description='Benchmark the crime database workflows')
+    parser.add_argument('--generate', metavar='SCALE', help='load synthetic data first: 1k, 10k, 100k, 1m or a number')
+    synthetic_data.add_arguments(parser)
+    parser.add_argument('--workflows', nargs='+', choices=list(DEFAULT_REPEATS), default=list(DEFAULT_REPEATS))
+    parser.add_argument('--repeats', type=int, help='runs per workflow (default depends on the workflow)')
+    parser.add_argument('--commit', action='store_true', help='commit the writes instead of rolling them back')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='JSON file of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD, help='allowed slowdown, 0.10 = 10%%')
+    arguments = parser.parse_args()
+    commit_writes = arguments.commit
+
+    if arguments.generate:
+        if arguments.reset:
+            synthetic_data.schema_migrations.migrate()
+            synthetic_data.reset_tables()
+        synthetic_data.generate(synthetic_data.parse_scale(arguments.generate), synthetic_data.fanout_from(arguments), arguments.seed)
+
+    results, crime_count = run(arguments.workflows, arguments.repeats, arguments.seed)
+    with database.get_cursor() as cursor:
+        cursor.execute('SHOW server_version')
+        server_version = cursor.fetchone()[0]
+    database.close_pool()
+
+    report = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'server_version': server_version,
+        'crimes': crime_count,
+        'fanout': synthetic_data.fanout_from(arguments),
+        'commit': commit_writes,
+        'workflows': results,
+    }
+    if arguments.output:
+        with open(arguments.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), arguments.threshold)
+        if regressions:
+            print(f'Slower than the baseline: {", ".join(regressions)}')
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# Synthetic crimes with evidence, officers and suspects for the benchmarks, loaded with COPY
+# Run from the project folder:  python benchmarks/synthetic_data.py 100k [--evidence 3 --officers 2 --suspects 2] [--reset]
+# Point CRIME_DB_NAME at a database made for benchmarking, --reset empties the four core tables first.
+# The same scale, fan-out and seed always give the same data.
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crime_data
+import database
+import schema_migrations
+from bulk_import import copy_rows
+
+
+SCALES = {'1k': 1000, '10k': 10000, '100k': 100000, '1m': 1000000}
+CHUNK_SIZE = 50000                                          # Crimes (plus their records) per COPY round
+
+CRIME_TYPES = ['Burglary', 'Robbery', 'Fraud', 'Assault', 'Arson', 'Vandalism', 'Theft', 'Homicide', 'Smuggling', 'Forgery']
+STREETS = ['Main Street', 'Harbour Road', 'Station Square', 'Mill Lane', 'Park Avenue', 'Church Street', 'Bridge Road', 'Market Place']
+CITIES = ['Bern', 'Zurich', 'Basel', 'Geneva', 'Lausanne', 'Lucerne', 'Lugano', 'Winterthur']
+EVIDENCE_TYPES = ['Fingerprint', 'DNA sample', 'CCTV footage', 'Weapon', 'Document', 'Phone records', 'Footprint', 'Fibre']
+FIRST_NAMES = ['Anna', 'Luca', 'Mia', 'Noah', 'Lea', 'Leon', 'Sara', 'David', 'Nina', 'Jonas', 'Elena', 'Marco']
+LAST_NAMES = ['Muller', 'Meier', 'Schmid', 'Keller', 'Weber', 'Huber', 'Schneider', 'Meyer', 'Steiner', 'Fischer']
+RANKS = ['Constable', 'Sergeant', 'Inspector', 'Chief Inspector', 'Superintendent']
+DEPARTMENTS = ['Homicide', 'Fraud', 'Forensics', 'Patrol', 'Cybercrime', 'Narcotics']
+WORDS = ['found', 'near', 'the', 'scene', 'red', 'car', 'broken', 'window', 'witness', 'seen', 'tall', 'jacket',
+         'night', 'alarm', 'cash', 'missing', 'gloves', 'blue', 'bag', 'tattoo', 'knife', 'receipt', 'laptop']
+
+def parse_scale(scale):                                     # '100k' -> 100000, plain numbers work too
+    scale = str(scale).lower()
+    return SCALES[scale] if scale in SCALES else int(scale)
+
+def sentence(generator, length=6):
+    return ' '.join(generator.choice(WORDS) for _ in range(length)).capitalize()
+
+def fan_out(generator, average):                            # between 0 and twice the average, so the average comes out right
+    return generator.randint(0, 2 * average) if average else 0
+
+def generate_chunk(generator, crime_ids, fanout):
+    crimes, evidence, officers, suspects = [], [], [], []
+    for crime_id in crime_ids:
+        crime_date = f'{generator.randint(2000, 2024)}-{generator.randint(1, 12):02d}-{generator.randint(1, 28):02d}'
+        location = f'{generator.randint(1, 200)} {generator.choice(STREETS)}, {generator.choice(CITIES)}'
+        crimes.append((crime_id, generator.choice(CRIME_TYPES), crime_date, location))
+        for _ in range(fan_out(generator, fanout['Evidence'])):
+            evidence.append((generator.choice(EVIDENCE_TYPES), sentence(generator), crime_id))
+        for _ in range(fan_out(generator, fanout['Officers'])):
+            name = f'{generator.choice(FIRST_NAMES)} {generator.choice(LAST_NAMES)}'
+            officers.append((name, generator.choice(RANKS), generator.choice(DEPARTMENTS), crime_id))
+        for _ in range(fan_out(generator, fanout['Suspects'])):
+            name = f'{generator.choice(FIRST_NAMES)} {generator.choice(LAST_NAMES)}'
+            suspects.append((name, str(generator.randint(16, 80)), sentence(generator), crime_id))
+    return crimes, {'Evidence': evidence, 'Officers': officers, 'Suspects': suspects}
+
+def reset_tables():                                         # migrate() runs first, so crime_meta.crime_summary exists
+    with database.get_cursor(commit=True) as cursor:        # the summary references "Crimes", TRUNCATE needs it in the same list
+        cursor.execute('TRUNCATE "Evidence", "Officers", "Suspects", "Crimes", crime_meta.crime_summary RESTART IDENTITY')
+
+def generate(crime_count, fanout, seed=42, chunk_size=CHUNK_SIZE):  # fanout = {'Evidence': 3, 'Officers': 2, 'Suspects': 2} records per crime on average
+    schema_migrations.migrate()
+    generator = random.Random(seed)
+    loaded = 0
+    started = time.perf_counter()
+    while loaded < crime_count:
+        size = min(chunk_size, crime_count - loaded)
+        with database.get_cursor(commit=True) as cursor:   # one transaction per chunk
+            # ids come from the sequence of "Crimes", so the records can point to them before COPY
+            cursor.execute('''SELECT nextval(pg_get_serial_sequence('"Crimes"', 'crimeid')) FROM generate_series(1, %s)''', (size,))
+            crime_ids = [row[0] for row in cursor.fetchall()]
+            crimes, children = generate_chunk(generator, crime_ids, fanout)
+            copy_rows(cursor, '"Crimes"', ('CrimeID',) + crime_data.CRIME_COLUMNS, crimes)
+            for table_name, rows in children.items():
+                copy_rows(cursor, f'"{table_name}"', crime_data.CHILD_TABLE_COLUMNS[table_name] + ('CrimeID',), rows)
+        loaded += size
+        print(f'{loaded}/{crime_count} crimes loaded ({time.perf_counter() - started:.1f}s)')
+
+    with database.get_cursor(commit=True) as cursor:       # fresh statistics, otherwise the first benchmark runs get bad plans
+        cursor.execute('ANALYZE "Crimes", "Evidence", "Officers", "Suspects"')
+
+def add_arguments(parser):
+    parser.add_argument('--evidence', type=int, default=3, help='evidence per crime on average (default 3)')
+    parser.add_argument('--officers', type=int, default=2, help='officers per crime on average (default 2)')
+    parser.add_argument('--suspects', type=int, default=2, help='suspects per crime on average (default 2)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help='empty the core tables first (RESTART IDENTITY)')
+
+def fanout_from(arguments):
+    return {'Evidence': arguments.evidence, 'Officers': arguments.officers, 'Suspects': arguments.suspects}
+
+def main():
+    parser = argparse.ArgumentParser(description='Load synthetic case data for the benchmarks')
+    parser.add_argument('scale', help='number of crimes: 1k, 10k, 100k, 1m or any number')
+    add_arguments(parser)
+    arguments = parser.parse_args()
+
+    schema_migrations.migrate()
+    if arguments.reset:
+        reset_tables()
+    generate(parse_scale(arguments.scale), fanout_from(arguments), arguments.seed)
+    database.close_pool()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# Export a table, or every crime with its evidence, officers and suspects, using COPY TO STDOUT
+#
+#   python bulk_export.py Evidence evidence.csv
+#   python bulk_export.py --dossier crimes.jsonl.gz
+#
+# The format comes from the file name (.csv or .jsonl, add .gz to compress), "-" writes CSV to the screen.
+# Rows go straight from the database into the file, nothing is collected in Python lists.
+import argparse
+import gzip
+import sys
+
+import crime_data
+import database
+import schema_catalog
+
+
+def list_tables():                                          # Same tables the menus show under "Display tables"
+    return schema_catalog.get_tables()
+
+def copy_statement(query, file_format):
+    if file_format == 'jsonl':
+        # one JSON object per line; row_to_json escapes control characters, so \x01 and \x02 never show up in the
+        # data and CSV mode with those as quote/delimiter writes every line untouched (text mode would double backslashes)
+        return f"COPY (SELECT row_to_json(export_row) FROM ({query}) AS export_row) TO STDOUT WITH (FORMAT csv, QUOTE e'\\x01', DELIMITER e'\\x02')"
+    return f'COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)'
+
+def open_output(path):
+    if path == '-':
+        return sys.stdout
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', newline='')
+    return open(path, 'w', newline='')
+
+def export(query, path, file_format):                       # Stream the result of a query into a file
+    output = open_output(path)
+    try:
+        with database.get_cursor() as cursor:
+            cursor.copy_expert(copy_statement(query, file_format), output)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+def export_table(table_name, path, file_format='csv'):
+    if table_name not in list_tables():                    # only real table names end up in the query
+        raise ValueError(f'There is no table called {table_name}')
+    export(f'SELECT * FROM "{table_name}"', path, file_format)
+
+def export_dossier(path, file_format='csv'):
+    export(crime_data.CRIME_DOSSIER_QUERY, path, file_format)
+
+def file_format_for(path):
+    name = path[:-3] if path.endswith('.gz') else path
+    return 'jsonl' if name.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+def main():
+    parser = argparse.ArgumentParser(description='Export tables or the crime dossier with COPY')
+    parser.add_argument('table', nargs='?', help='table to export')
+    parser.add_argument('output', help='output file (.csv, .jsonl, optionally .gz) or - for the screen')
+    parser.add_argument('--dossier', action='store_true', help='export every crime with its evidence, officers and suspects')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='overrides the format taken from the file name')
+    arguments = parser.parse_args()
+
+    if arguments.dossier == bool(arguments.table):
+        parser.error('give either a table name or --dossier')
+
+    file_format = arguments.format or file_format_for(arguments.output)
+    try:
+        if arguments.dossier:
+            export_dossier(arguments.output, file_format)
+        else:
+            export_table(arguments.table, arguments.output, file_format)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        database.close_pool()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+# Bulk import of case archives into "Crimes", "Evidence", "Officers" and "Suspects" using COPY
+#
+#   python bulk_import.py --crimes crimes.csv --evidence evidence.jsonl --officers officers.csv --suspects suspects.csv
+#
+# Files can be CSV (with a header row) or JSONL (one JSON object per line), column names are not case sensitive.
+# Crimes can carry a "crime_ref" (their id in the archive we migrate from), the other files point to their crime
+# with either "crime_ref" or an existing "crimeid". Refs are remembered in crime_import.crime_map so later
+# imports can still use them.
+import argparse
+import csv
+import io
+import json
+import time
+
+import crime_data
+import database
+from case_log import write_entries
+
+
+CHUNK_SIZE = 50000                                          # Rows per transaction, a failed chunk only rolls back itself
+
+LOG_MESSAGES = {                                            # Same messages the menus write when adding the records by hand
+    'Crimes': 'New crime added: {0}, Date: {1}, Location: {2}',
+    'Evidence': 'New evidence added: {0}, Description: {1}',
+    'Officers': 'Officer added: {0}, Rank: {1}, Department: {2}',
+    'Suspects': 'Suspect added: {0}, Age: {1}, Description: {2}',
+}
+
+def read_records(path):                                     # Yield every record of a CSV or JSONL file as a dict with lowercase keys
+    with open(path, newline='') as import_file:
+        if path.endswith(('.jsonl', '.ndjson')):
+            records = (json.loads(line) for line in import_file if line.strip())
+        else:
+            records = csv.DictReader(import_file)
+        for record in records:
+            yield {key.strip().lower(): value for key, value in record.items() if key}
+
+def read_chunks(path, columns, chunk_size):                 # Group the records in chunks, only one chunk is in memory at a time
+    chunk = []
+    for record in read_records(path):
+        chunk.append([record.get(column.lower()) for column in columns])
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def copy_rows(cursor, table_name, columns, rows):           # Stream rows into a table with COPY FROM STDIN
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)                      # None becomes an empty field, which COPY reads as NULL
+    buffer.seek(0)
+    cursor.copy_expert(f'COPY {table_name} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer)
+
+def prepare_import(cursor):
+    cursor.execute('CREATE SCHEMA IF NOT EXISTS crime_import')
+    cursor.execute('CREATE TABLE IF NOT EXISTS crime_import.crime_map (crime_ref TEXT PRIMARY KEY, crimeid INT NOT NULL)')
+
+def drop_duplicate_refs(rows):                              # Keep the first crime of every crime_ref (the first value of the rows)
+    seen = set()
+    unique_rows = []
+    for row in rows:
+        if not row[0] or row[0] not in seen:                # no ref (None, or an empty CSV field that COPY reads as NULL)
+            seen.add(row[0])
+            unique_rows.append(row)
+    return unique_rows
+
+def import_crimes_chunk(cursor, rows):                      # Returns the log entries and how many rows were skipped
+    columns = crime_data.CRIME_COLUMNS
+    # a ref twice in one chunk would make the crime_map upsert below change the same row twice, which fails the chunk
+    unique_rows = drop_duplicate_refs(rows)
+    # staging table with the same column types as "Crimes", so COPY does the type conversion
+    cursor.execute(f'CREATE TEMP TABLE import_staging ON COMMIT DROP AS SELECT CrimeID, {", ".join(columns)} FROM "Crimes" WITH NO DATA')
+    cursor.execute('ALTER TABLE import_staging ADD COLUMN crime_ref TEXT')
+    copy_rows(cursor, 'import_staging', ('crime_ref',) + columns, unique_rows)
+
+    # take the new ids from the sequence first, that way we know which ref got which crimeid
+    cursor.execute('''UPDATE import_staging SET CrimeID = nextval(pg_get_serial_sequence('"Crimes"', 'crimeid'))''')
+    cursor.execute(f'''INSERT INTO "Crimes" (CrimeID, {", ".join(columns)})
+                       SELECT CrimeID, {", ".join(columns)} FROM import_staging
+                       RETURNING CrimeID, {", ".join(columns)}''')
+    inserted = cursor.fetchall()
+    cursor.execute('''INSERT INTO crime_import.crime_map (crime_ref, crimeid)
+                      SELECT crime_ref, CrimeID FROM import_staging WHERE crime_ref IS NOT NULL
+                      ON CONFLICT (crime_ref) DO UPDATE SET crimeid = EXCLUDED.crimeid''')
+    return [(row[0], LOG_MESSAGES['Crimes'].format(*row[1:])) for row in inserted], len(rows) - len(unique_rows)
+
+def import_child_chunk(cursor, table_name, rows):
+    columns = crime_data.CHILD_TABLE_COLUMNS[table_name]
+    cursor.execute(f'CREATE TEMP TABLE import_staging ON COMMIT DROP AS SELECT {", ".join(columns)}, CrimeID FROM "{table_name}" WITH NO DATA')
+    cursor.execute('ALTER TABLE import_staging ADD COLUMN crime_ref TEXT')
+    copy_rows(cursor, 'import_staging', columns + ('CrimeID', 'crime_ref'), rows)
+
+    # the archive refs are swapped for our own crime ids, rows that point to no existing crime (no id, an unknown ref
+    # or a CrimeID that is not in "Crimes") are skipped instead of failing the foreign key and the whole import
+    cursor.execute(f'''INSERT INTO "{table_name}" ({", ".join(columns)}, CrimeID)
+                       SELECT {", ".join(f"s.{column}" for column in columns)}, c.CrimeID
+                       FROM import_staging s LEFT JOIN crime_import.crime_map m ON m.crime_ref = s.crime_ref
+                       JOIN "Crimes" c ON c.CrimeID = COALESCE(m.crimeid, s.CrimeID)
+                       RETURNING CrimeID, {", ".join(columns)}''')
+    inserted = cursor.fetchall()
+    return [(row[0], LOG_MESSAGES[table_name].format(*row[1:])) for row in inserted], len(rows) - len(inserted)
+
+def import_file(table_name, path, chunk_size=CHUNK_SIZE):  # Import one file, one transaction per chunk, progress is printed after every chunk
+    if table_name == 'Crimes':
+        columns = ('crime_ref',) + crime_data.CRIME_COLUMNS
+    else:
+        columns = crime_data.CHILD_TABLE_COLUMNS[table_name] + ('crimeid', 'crime_ref')
+
+    imported = skipped = 0
+    started = time.time()
+    for rows in read_chunks(path, columns, chunk_size):
+        with database.get_connection() as connection:
+            with connection.cursor() as cursor:
+                if table_name == 'Crimes':
+                    entries, chunk_skipped = import_crimes_chunk(cursor, rows)
+                else:
+                    entries, chunk_skipped = import_child_chunk(cursor, table_name, rows)
+            connection.commit()
+        write_entries(entries)                              # the case logs are written in bulk after the chunk is saved
+        imported += len(entries)
+        skipped += chunk_skipped
+        elapsed = time.time() - started
+        print(f'{table_name}: {imported} rows imported, {skipped} skipped ({imported / max(elapsed, 0.001):.0f} rows/s)')
+    return imported, skipped
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk import case archives with COPY')
+    parser.add_argument('--crimes', help='CSV/JSONL file with crimes')
+    parser.add_argument('--evidence', help='CSV/JSONL file with evidence')
+    parser.add_argument('--officers', help='CSV/JSONL file with officers')
+    parser.add_argument('--suspects', help='CSV/JSONL file with suspects')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='rows per transaction')
+    arguments = parser.parse_args()
+
+    files = [('Crimes', arguments.crimes), ('Evidence', arguments.evidence),
+             ('Officers', arguments.officers), ('Suspects', arguments.suspects)]  # crimes first, so the others can find them
+    if not any(path for _, path in files):
+        parser.error('nothing to import, give at least one file')
+
+    with database.get_cursor(commit=True) as cursor:
+        prepare_import(cursor)
+    try:
+        for table_name, path in files:
+            if path:
+                import_file(table_name, path, arguments.chunk_size)
+    finally:
+        database.close_pool()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+# Case logs in 'Program Files/case_<id>/log.txt' (or in the segmented store of case_log_store.py)
+# Log calls only put the lines in a queue, a background thread writes them. It keeps the most used log files open,
+# remembers which case folders already exist and flushes every FLUSH_INTERVAL seconds and when the program exits.
+import atexit
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from case_log_store import CaseLogStore
+
+
+program_files_path = os.path.join(os.path.dirname(__file__), 'Program Files')
+
+LOG_QUEUE_SIZE = 1000                                       # Batches waiting to be written, when full the callers wait for the writer (up to QUEUE_TIMEOUT)
+OPEN_LOG_FILES = 64                                         # Case logs kept open at the same time (least recently used ones get closed)
+FLUSH_INTERVAL = 1.0                                        # Seconds between flushes of the open log files
+QUEUE_TIMEOUT = 5.0                                         # Seconds a caller waits for room in the queue before the entries are reported as lost
+CASE_LOG_BACKEND = os.environ.get('CRIME_CASE_LOG_BACKEND', 'folders')  # 'folders' = one log.txt per case, 'segments' = case_log_store
+
+if not os.path.exists(program_files_path):                  # Ensure the 'Program Files' directory exists
+    os.makedirs(program_files_path)
+
+log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+writer = None
+writer_lock = threading.Lock()
+
+class CaseLogWriter(threading.Thread):
+    def __init__(self):
+        super(CaseLogWriter, self).__init__(name='case-log-writer', daemon=True)
+        self.open_files = OrderedDict()                     # case_id -> open log file, in least to most recently used order
+        self.created_folders = set()
+        self.store = CaseLogStore() if CASE_LOG_BACKEND == 'segments' else None
+
+    def run(self):
+        next_flush = time.monotonic() + FLUSH_INTERVAL
+        while True:
+            try:
+                item = log_queue.get(timeout=max(next_flush - time.monotonic(), 0))
+            except queue.Empty:
+                item = []
+
+            if item is None:                                # shutdown
+                break
+            try:                                            # a full disk or a bad folder only loses this batch, the writer keeps going
+                if isinstance(item, threading.Event):       # somebody waits in flush()
+                    self.flush_files()
+                else:
+                    self.write_batch(item)
+                if time.monotonic() >= next_flush:
+                    next_flush = time.monotonic() + FLUSH_INTERVAL
+                    self.flush_files()
+            except Exception as e:
+                print(f"An error occurred while writing the case logs: {e}")
+            finally:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+        self.flush_files()                                  # reports files that cannot be written any more
+        for log_file in self.open_files.values():
+            try:
+                log_file.close()
+            except OSError:
+                pass
+        self.open_files.clear()
+
+    def write_batch(self, lines):
+        if self.store is not None:
+            self.store.append(lines)
+            return
+        for case_id, entry_time, message in lines:
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry_time))
+            self.get_file(case_id).write(f'{timestamp} - {message}\n')
+
+    def get_file(self, case_id):
+        if case_id in self.open_files:
+            self.open_files.move_to_end(case_id)
+            return self.open_files[case_id]
+
+        case_folder = os.path.join(program_files_path, f'case_{case_id}') # we let the code know where and under what name the files will be saved
+        if case_folder not in self.created_folders:
+            os.makedirs(case_folder, exist_ok=True)         # create it if it doesnt exist
+            self.created_folders.add(case_folder)
+
+        log_file = open(os.path.join(case_folder, 'log.txt'), 'a')  # Open the log file in append mode
+        self.open_files[case_id] = log_file
+        if len(self.open_files) > OPEN_LOG_FILES:
+            _, oldest_file = self.open_files.popitem(last=False)
+            oldest_file.close()
+        return log_file
+
+    def flush_files(self):
+        for case_id, log_file in list(self.open_files.items()):
+            try:
+                log_file.flush()
+            except OSError as e:                            # drop the file, it is opened again for the next entry
+                print(f"An error occurred while writing the log of case {case_id}: {e}")
+                del self.open_files[case_id]
+                try:
+                    log_file.close()
+                except OSError:
+                    pass
+
+def start_writer():
+    global writer
+    with writer_lock:
+        if writer is None or not writer.is_alive():         # also replaces a writer that died, so the queue never fills up for good
+            writer = CaseLogWriter()
+            writer.start()
+
+def write_entries(entries):                                 # Queue (case_id, message) pairs, they all get the same timestamp
+    entry_time = int(time.time())                           # whole seconds, like the timestamps in the log files
+    lines = [(case_id, entry_time, message) for case_id, message in entries]
+    if lines:
+        start_writer()
+        try:
+            log_queue.put(lines, timeout=QUEUE_TIMEOUT)
+        except queue.Full:                                  # better to lose log lines than to hang the program
+            print(f"An error occurred: the case log writer is stuck, {len(lines)} log entries were not written")
+
+def log_entry(case_id, message):                            # Function to create log entries in 'Program Files'
+    write_entries([(case_id, message)])
+
+def log_entries(case_ids, message):                         # Same log entry for several cases at once, with one shared timestamp
+    write_entries((case_id, message) for case_id in set(case_ids))
+
+def flush():                                                # Wait until everything logged so far is in the files
+    if writer is not None and writer.is_alive():
+        done = threading.Event()
+        try:
+            log_queue.put(done, timeout=QUEUE_TIMEOUT)
+        except queue.Full:
+            return
+        done.wait(QUEUE_TIMEOUT)
+
+def shutdown():                                             # Write what is left, close the files and stop the writer
+    global writer
+    with writer_lock:
+        if writer is not None and writer.is_alive():
+            try:
+                log_queue.put(None, timeout=QUEUE_TIMEOUT)
+                writer.join()
+            except queue.Full:                              # the writer doesnt take anything any more, dont wait for it at exit
+                print("An error occurred: the case log writer is stuck, the last log entries were not written")
+        writer = None
+
+atexit.register(shutdown)
@@ -0,0 +1,262 @@
+# Segmented case-log store, an alternative to one 'Program Files/case_<id>/log.txt' per crime
+#
+# Every entry is appended as one line to the newest segment file (a new one is started after SEGMENT_SIZE bytes).
+# Each segment has its own index: while it is the newest one, an index record (case id, time, offset) is appended
+# to segment_<n>.idx for every line. When the next segment starts, the old one is sealed: its records are sorted by
+# case id into segment_<n>.sorted (with the first/last time in a header), so reading the history of one case is a
+# binary search in every sealed segment plus the small in-memory index of the newest one, and then one seek per
+# entry. A time range scan reads the segments one after the other and skips the ones outside the range.
+#
+#   python case_log_store.py migrate               copy the old case folders into the store
+#   python case_log_store.py show <case_id>        print the history of one case
+#   python case_log_store.py scan [--start "YYYY-mm-dd HH:MM:SS"] [--end "..."]
+import argparse
+import fcntl
+import os
+import re
+import struct
+import time
+from contextlib import contextmanager
+
+
+STORE_PATH = os.path.join(os.path.dirname(__file__), 'Program Files', 'case_log_store')
+SEGMENT_SIZE = 64 * 1024 * 1024                             # Bytes per segment file before a new one is started
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+INDEX_RECORD = struct.Struct('<qdQ')                        # case id, unix time, offset in the segment = 24 bytes
+SORTED_HEADER = struct.Struct('<ddQ')                       # first time, last time, number of records of a sealed segment
+NO_CASE = -1                                                # entries logged without a case (case_id None)
+SEGMENT_NAME = re.compile(r'^segment_(\d+)\.log$')
+
+def escape(message):                                        # one entry = one line, so newlines and tabs are escaped
+    return message.replace('\\', '\\\\').replace('\n', '\\n').replace('\t', '\\t')
+
+def unescape(message):
+    return re.sub(r'\\(.)', lambda match: {'n': '\n', 't': '\t'}.get(match.group(1), match.group(1)), message)
+
+class CaseLogStore:
+    def __init__(self, path=STORE_PATH, segment_size=SEGMENT_SIZE):
+        self.path = path
+        self.segment_size = segment_size
+        os.makedirs(path, exist_ok=True)
+        self.sealed = set()                                 # segments with a sorted index
+        self.segment_times = {}                             # segment -> [first time, last time]
+        self.open_index = {}                                # newest segment(s): segment -> {case_id: [(time, offset), ...]}
+        self.index_read = {}                                # segment -> bytes of its .idx already loaded (other programs may append more)
+        self.segment_number = 1
+        self.refresh()
+
+    def segment_path(self, segment, extension='log'):
+        return os.path.join(self.path, f'segment_{segment:06d}.{extension}')
+
+    @contextmanager
+    def locked(self):                                       # several programs can write to the same store, one at a time
+        with open(os.path.join(self.path, 'store.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def segments(self):
+        return sorted(int(match.group(1)) for match in map(SEGMENT_NAME.match, os.listdir(self.path)) if match)
+
+    def refresh(self):                                      # Pick up new segments, newly sealed segments and new index records
+        for segment in self.segments():
+            self.segment_number = max(self.segment_number, segment)
+            if segment in self.sealed:
+                continue
+            if os.path.exists(self.segment_path(segment, 'sorted')):
+                with open(self.segment_path(segment, 'sorted'), 'rb') as sorted_file:
+                    first, last, count = SORTED_HEADER.unpack(sorted_file.read(SORTED_HEADER.size))
+                if count:
+                    self.segment_times[segment] = [first, last]
+                self.sealed.add(segment)
+                self.open_index.pop(segment, None)
+                self.index_read.pop(segment, None)
+                continue
+            try:
+                with open(self.segment_path(segment, 'idx'), 'rb') as index_file:
+                    index_file.seek(self.index_read.get(segment, 0))
+                    data = index_file.read()
+            except FileNotFoundError:                       # sealed meanwhile (the .idx goes away), or no entries yet
+                continue
+            usable = len(data) - len(data) % INDEX_RECORD.size  # a record that is still being written is read next time
+            cases = self.open_index.setdefault(segment, {})
+            for case_id, entry_time, offset in INDEX_RECORD.iter_unpack(data[:usable]):
+                cases.setdefault(None if case_id == NO_CASE else case_id, []).append((entry_time, offset))
+                times = self.segment_times.setdefault(segment, [entry_time, entry_time])
+                times[0] = min(times[0], entry_time)
+                times[1] = max(times[1], entry_time)
+            self.index_read[segment] = self.index_read.get(segment, 0) + usable
+
+    def seal(self, segment):                                # Sort the index of a segment that gets no more entries (store is locked)
+        try:
+            with open(self.segment_path(segment, 'idx'), 'rb') as index_file:
+                data = index_file.read()
+        except FileNotFoundError:
+            data = b''
+        records = sorted(INDEX_RECORD.iter_unpack(data[:len(data) - len(data) % INDEX_RECORD.size]))
+        times = [entry_time for _, entry_time, _ in records] or [0.0]
+        temporary_path = self.segment_path(segment, 'sorted.tmp')
+        with open(temporary_path, 'wb') as sorted_file:
+            sorted_file.write(SORTED_HEADER.pack(min(times), max(times), len(records)))
+            sorted_file.write(b''.join(INDEX_RECORD.pack(*record) for record in records))
+        os.replace(temporary_path, self.segment_path(segment, 'sorted'))  # readers see the whole file or none of it
+        if os.path.exists(self.segment_path(segment, 'idx')):
+            os.remove(self.segment_path(segment, 'idx'))
+
+    def append(self, entries):                              # entries = [(case_id, unix time, message), ...]
+        with self.locked():
+            self.refresh()
+            segment_path = self.segment_path(self.segment_number)
+            if os.path.exists(segment_path) and os.path.getsize(segment_path) >= self.segment_size:
+                self.segment_number += 1
+                segment_path = self.segment_path(self.segment_number)
+            for segment in self.segments():                 # every segment before the newest one gets its sorted index
+                if segment < self.segment_number and segment not in self.sealed and not os.path.exists(self.segment_path(segment, 'sorted')):
+                    self.seal(segment)
+
+            index_records = []
+            with open(segment_path, 'ab') as segment_file:
+                offset = segment_file.tell()
+                for case_id, entry_time, message in entries:
+                    line = f'{entry_time:.6f}\t{"" if case_id is None else case_id}\t{escape(message)}\n'.encode()
+                    segment_file.write(line)
+                    index_records.append(INDEX_RECORD.pack(NO_CASE if case_id is None else int(case_id), entry_time, offset))
+                    offset += len(line)
+            with open(self.segment_path(self.segment_number, 'idx'), 'ab') as index_file:
+                index_file.write(b''.join(index_records))   # index after the data, so it never points at a missing line
+            self.refresh()
+
+    def parse_line(self, line):
+        entry_time, case_id, message = line.decode().rstrip('\n').split('\t', 2)
+        return float(entry_time), (int(case_id) if case_id else None), unescape(message)
+
+    def find_sorted(self, segment, case_id):                # [(time, offset), ...] of one case in a sealed segment, by binary search
+        key = NO_CASE if case_id is None else case_id
+        found = []
+        with open(self.segment_path(segment, 'sorted'), 'rb') as sorted_file:
+            count = SORTED_HEADER.unpack(sorted_file.read(SORTED_HEADER.size))[2]
+
+            def record_at(position):
+                sorted_file.seek(SORTED_HEADER.size + position * INDEX_RECORD.size)
+                return INDEX_RECORD.unpack(sorted_file.read(INDEX_RECORD.size))
+
+            low, high = 0, count                            # first record with a case id >= key
+            while low < high:
+                middle = (low + high) // 2
+                if record_at(middle)[0] < key:
+                    low = middle + 1
+                else:
+                    high = middle
+            sorted_file.seek(SORTED_HEADER.size + low * INDEX_RECORD.size)
+            for _ in range(low, count):
+                record_case, entry_time, offset = INDEX_RECORD.unpack(sorted_file.read(INDEX_RECORD.size))
+                if record_case != key:
+                    break
+                found.append((entry_time, offset))
+        return found
+
+    def read_case(self, case_id):                           # [(unix time, message), ...] of one case, oldest first
+        self.refresh()
+        locations = []
+        for segment in sorted(self.sealed):
+            locations += [(entry_time, segment, offset) for entry_time, offset in self.find_sorted(segment, case_id)]
+        for segment, cases in self.open_index.items():
+            locations += [(entry_time, segment, offset) for entry_time, offset in cases.get(case_id, [])]
+
+        entries = []
+        open_segments = {}
+        try:
+            for _, segment, offset in sorted(locations):
+                if segment not in open_segments:
+                    open_segments[segment] = open(self.segment_path(segment), 'rb')
+                segment_file = open_segments[segment]
+                segment_file.seek(offset)
+                entry_time, _, message = self.parse_line(segment_file.readline())
+                entries.append((entry_time, message))
+        finally:
+            for segment_file in open_segments.values():
+                segment_file.close()
+        return entries
+
+    def scan(self, start=None, end=None):                   # Yield (unix time, case_id, message) between start and end, in the order they were written
+        self.refresh()
+        for segment in sorted(self.segment_times):
+            first, last = self.segment_times[segment]
+            if (start is not None and last < start) or (end is not None and first > end):
+                continue                                    # nothing in this segment is in the range
+            with open(self.segment_path(segment), 'rb') as segment_file:
+                for line in segment_file:
+                    entry_time, case_id, message = self.parse_line(line)
+                    if (start is None or entry_time >= start) and (end is None or entry_time <= end):
+                        yield entry_time, case_id, message
+
+def migrate_case_folders(store, program_files_path, batch_size=10000):  # Copy every 'case_<id>/log.txt' into the store
+    line_pattern = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - (.*)$')
+    batch = []
+    migrated_cases = migrated_entries = 0
+
+    for folder_name in sorted(os.listdir(program_files_path)):
+        log_path = os.path.join(program_files_path, folder_name, 'log.txt')
+        if not folder_name.startswith('case_') or not os.path.isfile(log_path):
+            continue
+        case_id = folder_name[len('case_'):]
+        if case_id == 'None':
+            case_id = None
+        elif case_id.lstrip('-').isdigit():
+            case_id = int(case_id)
+        else:
+            print(f'Skipping {folder_name}, it is not a crime id')
+            continue
+
+        case_entries = []
+        with open(log_path) as log_file:
+            for line in log_file:
+                match = line_pattern.match(line.rstrip('\n'))
+                if match:
+                    entry_time = time.mktime(time.strptime(match.group(1), TIME_FORMAT))
+                    case_entries.append([case_id, entry_time, match.group(2)])
+                elif case_entries:                          # a message that went over more than one line
+                    case_entries[-1][2] += '\n' + line.rstrip('\n')
+        batch.extend(case_entries)
+        migrated_cases += 1
+        migrated_entries += len(case_entries)
+
+        if len(batch) >= batch_size:
+            store.append(batch)
+            batch = []
+            print(f'{migrated_cases} cases, {migrated_entries} entries migrated')
+    if batch:
+        store.append(batch)
+    print(f'Done: {migrated_cases} cases, {migrated_entries} entries migrated')
+
+def format_entry(entry_time, message):
+    return f'{time.strftime(TIME_FORMAT, time.localtime(entry_time))} - {message}'
+
+def main():
+    parser = argparse.ArgumentParser(description='Segmented case-log store')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('migrate', help="copy the 'Program Files/case_<id>' logs into the store")
+    show = commands.add_parser('show', help='print the history of one case')
+    show.add_argument('case_id', type=int)
+    scan = commands.add_parser('scan', help='print every entry in a time range')
+    scan.add_argument('--start', help='"YYYY-mm-dd HH:MM:SS"')
+    scan.add_argument('--end', help='"YYYY-mm-dd HH:MM:SS"')
+    arguments = parser.parse_args()
+
+    store = CaseLogStore()
+    if arguments.command == 'migrate':
+        migrate_case_folders(store, os.path.dirname(STORE_PATH))
+    elif arguments.command == 'show':
+        for entry_time, message in store.read_case(arguments.case_id):
+            print(format_entry(entry_time, message))
+    else:
+        start = time.mktime(time.strptime(arguments.start, TIME_FORMAT)) if arguments.start else None
+        end = time.mktime(time.strptime(arguments.end, TIME_FORMAT)) if arguments.end else None
+        for entry_time, case_id, message in store.scan(start, end):
+            print(f'case {case_id}: {format_entry(entry_time, message)}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+# Scriptable command line for the same operations as the menus, without prompts, pauses or screen clears
+#
+#   python cli.py add-crime --type Burglary --date 2024-01-01 --location "Main Street 1, Bern"   -> prints the new CrimeID
+#   python cli.py attach-evidence --type DNA --description "Found on the knife" --crimes 12,15
+#   python cli.py update Crimes 12 location "Main Street 3, Bern"
+#   python cli.py delete Crimes 12,15 [--keep-related]
+#   python cli.py show [--crimes 12,15]                  every crime with its records, one JSON object per line
+#   python cli.py show Evidence                          one table, one JSON object per line
+#   python cli.py print Evidence [--truncate]            one table as a text table, streamed row by row
+#   python cli.py export Evidence evidence.csv           or: export --dossier crimes.jsonl.gz
+#   python cli.py batch commands.txt                     one command per line ("-" or nothing = stdin), # starts a comment
+#
+# Writes use crime_data and case_log like the menus, every command is its own transaction. In a batch a failing
+# line is reported on stderr with its line number and the batch goes on (--stop-on-error stops it), the exit
+# code is 1 if any line failed.
+import argparse
+import json
+import shlex
+import sys
+
+import bulk_export
+import case_log
+import crime_data
+import database
+import schema_catalog
+import schema_migrations
+import table_display
+from case_log import log_entry, log_entries
+
+
+CORE_TABLES = ['Crimes', 'Evidence', 'Officers', 'Suspects']
+
+class CommandError(Exception):                              # A command that cannot run, e.g. an unknown column
+    pass
+
+def crime_id_list(text):                                    # '12,15' -> [12, 15]
+    try:
+        crime_ids = [int(crime_id) for crime_id in text.split(',') if crime_id.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'not a list of CrimeIDs: {text}')
+    if not crime_ids or min(crime_ids) <= 0:
+        raise argparse.ArgumentTypeError(f'not a list of CrimeIDs: {text}')
+    return crime_ids
+
+def add_crime(arguments):
+    with database.get_cursor(commit=True) as cursor:
+        crime_id = crime_data.add_crime(cursor, arguments.type, arguments.date, arguments.location)
+    log_entry(crime_id, f'New crime added: {arguments.type}, Date: {arguments.date}, Location: {arguments.location}')
+    print(crime_id)
+
+def attach(table_name, values, message, crime_ids):        # Same record for every crime, prints the new ids
+    with database.get_cursor(commit=True) as cursor:
+        record_ids = crime_data.attach_to_crimes(cursor, table_name, values, crime_ids)
+    log_entries(crime_ids, message)
+    print(' '.join(map(str, record_ids)))
+
+def attach_evidence(arguments):
+    attach('Evidence', (arguments.type, arguments.description),
+           f'New evidence added: {arguments.type}, Description: {arguments.description}', arguments.crimes)
+
+def attach_officer(arguments):
+    attach('Officers', (arguments.name, arguments.rank, arguments.department),
+           f'Officer added: {arguments.name}, Rank: {arguments.rank}, Department: {arguments.department}', arguments.crimes)
+
+def attach_suspect(arguments):
+    attach('Suspects', (arguments.name, arguments.age, arguments.description),
+           f'Suspect added: {arguments.name}, Age: {arguments.age}, Description: {arguments.description}', arguments.crimes)
+
+def update(arguments):                                      # One field of one record, the record is chosen by its primary key
+    key_column = schema_catalog.get_primary_key(arguments.table)
+    columns = {column.lower(): column for column in schema_catalog.get_column_names(arguments.table)}
+    field_name = columns.get(arguments.field.lower())
+    if field_name is None or field_name.lower() in [key_column.lower(), 'crimeid']:  # only real columns end up in the query
+        raise CommandError(f'{arguments.table} has no field {arguments.field} that can be updated')
+
+    with database.get_cursor(commit=True) as cursor:
+        cursor.execute(f'UPDATE "{arguments.table}" SET {field_name} = %s WHERE {key_column} = %s RETURNING CrimeID',
+                       (arguments.value, arguments.record_id))
+        crime_ids = [row[0] for row in cursor.fetchall()]
+    if not crime_ids:
+        raise CommandError(f'There is no record {arguments.record_id} in {arguments.table}')
+    log_entries([crime_id for crime_id in crime_ids if crime_id is not None], f'Updated {field_name} to {arguments.value} in {arguments.table} table')
+    print(len(crime_ids))
+
+def delete(arguments):                                      # Crimes (with or without their records) or the records of some crimes
+    with database.get_cursor(commit=True) as cursor:
+        if arguments.table == 'Crimes':
+            deleted_ids, row_counts = crime_data.delete_crimes(cursor, arguments.crimes, keep_related=arguments.keep_related)
+        else:
+            deleted_ids, row_counts = crime_data.delete_crime_records(cursor, arguments.table, arguments.crimes)
+    if arguments.table != 'Crimes':
+        message = f'Record deleted from {arguments.table}'
+    elif arguments.keep_related:
+        message = 'Crime deleted, related information retained'
+    else:
+        message = 'Crime and all related information deleted'
+    log_entries(deleted_ids, message)
+    print(' | '.join(f'{table_name}: {count}' for table_name, count in row_counts.items()))
+
+def show(arguments):                                        # JSON lines, streamed from a server-side cursor
+    if arguments.table and arguments.table not in schema_catalog.get_tables():
+        raise CommandError(f'There is no table called {arguments.table}')
+
+    with database.get_streaming_cursor('cli_show') as cursor:
+        if arguments.table:
+            if arguments.crimes:
+                cursor.execute(f'SELECT * FROM "{arguments.table}" WHERE CrimeID = ANY(%s)', (arguments.crimes,))
+            else:
+                cursor.execute(f'SELECT * FROM "{arguments.table}"')
+            column_names = None
+            for row in cursor:
+                column_names = column_names or [description[0] for description in cursor.description]
+                print(json.dumps(dict(zip(column_names, row)), default=str))
+        else:
+            for crime_id, crime_type, crime_date, crime_location, evidence, officers, suspects in crime_data.fetch_crime_dossiers(cursor, arguments.crimes):
+                print(json.dumps({'crimeid': crime_id, 'type': crime_type, 'date': crime_date, 'location': crime_location,
+                                  'evidence': evidence, 'officers': officers, 'suspects': suspects}, default=str))
+
+def print_table(arguments):                                 # Column widths come from the types and a sample, so the first line is out right away
+    if arguments.table not in schema_catalog.get_tables():
+        raise CommandError(f'There is no table called {arguments.table}')
+    table_display.print_table(arguments.table, overflow='truncate' if arguments.truncate else 'wrap')
+
+def export(arguments):
+    if arguments.dossier == bool(arguments.table):
+        raise CommandError('give either a table name or --dossier')
+    file_format = arguments.format or bulk_export.file_format_for(arguments.output)
+    try:
+        if arguments.dossier:
+            bulk_export.export_dossier(arguments.output, file_format)
+        else:
+            bulk_export.export_table(arguments.table, arguments.output, file_format)
+    except ValueError as e:
+        raise CommandError(str(e))
+
+def batch(arguments):                                       # Run every line of a file (or stdin) as a command
+    parser = build_parser()
+    batch_file = sys.stdin if arguments.file == '-' else open(arguments.file)
+    failed = 0
+    try:
+        for line_number, line in enumerate(batch_file, start=1):
+            try:
+                words = shlex.split(line, comments=True)   # an unbalanced quote is a ValueError
+                if not words:
+                    continue
+                if words[0] == 'batch':
+                    raise CommandError('batches cannot be nested')
+                run(parser.parse_args(words))
+            except SystemExit:                              # argparse already printed what was wrong
+                print(f'line {line_number}: {line.strip()}', file=sys.stderr)
+                failed += 1
+            except (CommandError, ValueError, OSError, *database.Error) as e:  # OSError: e.g. an export file that cannot be written
+                print(f'line {line_number}: {e}', file=sys.stderr)
+                failed += 1
+            if failed and arguments.stop_on_error:
+                break
+    finally:
+        if batch_file is not sys.stdin:
+            batch_file.close()
+    if failed:
+        raise CommandError(f'{failed} line(s) failed')
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Crime database operations without the menus')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('add-crime', help='add a crime, prints its CrimeID')
+    command.add_argument('--type', required=True)
+    command.add_argument('--date', required=True)
+    command.add_argument('--location', required=True)
+    command.set_defaults(handler=add_crime)
+
+    command = commands.add_parser('attach-evidence', help='add the same evidence to one or more crimes')
+    command.add_argument('--type', required=True)
+    command.add_argument('--description', required=True)
+    command.add_argument('--crimes', type=crime_id_list, required=True, help='e.g. 12 or 12,15,20')
+    command.set_defaults(handler=attach_evidence)
+
+    command = commands.add_parser('attach-officer', help='add the same officer to one or more crimes')
+    command.add_argument('--name', required=True)
+    command.add_argument('--rank', required=True)
+    command.add_argument('--department', required=True)
+    command.add_argument('--crimes', type=crime_id_list, required=True, help='e.g. 12 or 12,15,20')
+    command.set_defaults(handler=attach_officer)
+
+    command = commands.add_parser('attach-suspect', help='add the same suspect to one or more crimes')
+    command.add_argument('--name', required=True)
+    command.add_argument('--age', required=True)
+    command.add_argument('--description', required=True)
+    command.add_argument('--crimes', type=crime_id_list, required=True, help='e.g. 12 or 12,15,20')
+    command.set_defaults(handler=attach_suspect)
+
+    command = commands.add_parser('update', help='change one field of one record')
+    command.add_argument('table', choices=CORE_TABLES)
+    command.add_argument('record_id', type=int, help='primary key of the record (the CrimeID for Crimes)')
+    command.add_argument('field')
+    command.add_argument('value')
+    command.set_defaults(handler=update)
+
+    command = commands.add_parser('delete', help='delete crimes, or the records of a table that belong to some crimes')
+    command.add_argument('table', choices=CORE_TABLES)
+    command.add_argument('crimes', type=crime_id_list, help='CrimeIDs, e.g. 12 or 12,15,20')
+    command.add_argument('--keep-related', action='store_true', help='Crimes only: keep the evidence, officers and suspects')
+    command.set_defaults(handler=delete)
+
+    command = commands.add_parser('show', help='print crimes with their records, or a table, as JSON lines')
+    command.add_argument('table', nargs='?')
+    command.add_argument('--crimes', type=crime_id_list, help='only these CrimeIDs')
+    command.set_defaults(handler=show)
+
+    command = commands.add_parser('print', help='print a table as text, long values are wrapped')
+    command.add_argument('table')
+    command.add_argument('--truncate', action='store_true', help='cut long values instead of wrapping them')
+    command.set_defaults(handler=print_table)
+
+    command = commands.add_parser('export', help='export a table or the crime dossier to a file (COPY)')
+    command.add_argument('table', nargs='?')
+    command.add_argument('output', help='output file (.csv, .jsonl, optionally .gz) or - for the screen')
+    command.add_argument('--dossier', action='store_true')
+    command.add_argument('--format', choices=['csv', 'jsonl'])
+    command.set_defaults(handler=export)
+
+    command = commands.add_parser('batch', help='run one command per line from a file or stdin')
+    command.add_argument('file', nargs='?', default='-')
+    command.add_argument('--stop-on-error', action='store_true')
+    command.set_defaults(handler=batch)
+    return parser
+
+def run(arguments):
+    arguments.handler(arguments)
+
+def main():
+    parser = build_parser()
+    arguments = parser.parse_args()
+    schema_migrations.migrate()
+    try:
+        run(arguments)
+    except (CommandError, OSError, *database.Error) as e:
+        print(f'An error occurred: {e}', file=sys.stderr)
+        sys.exit(1)
+    finally:
+        case_log.shutdown()                                 # every log entry is written before we leave
+        database.close_pool()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# Set-based queries for the core tables ("Crimes", "Evidence", "Officers", "Suspects")
+import json
+
+import database
+import prepared_statements
+import schema_catalog
+
+
+CRIME_COLUMNS = ('Type', 'Date', 'Location')              # Columns the user fills in for a crime, CrimeID is generated
+
+CHILD_TABLE_COLUMNS = {                                     # Columns the user fills in for each table that belongs to a crime
+    'Evidence': ('Type', 'Description'),
+    'Officers': ('Name', 'Rank', 'Department'),
+    'Suspects': ('Name', 'Age', 'Description'),
+}
+
+# crimes with their record counts from crime_meta.crime_summary (kept up to date by triggers, see schema_migrations)
+CRIME_SUMMARY_QUERY = '''
+    SELECT CrimeID, Type, Date, Location, COALESCE(s.EvidenceCount, 0), COALESCE(s.OfficerCount, 0),
+           COALESCE(s.SuspectCount, 0), s.LastModified
+    FROM "Crimes" LEFT JOIN crime_meta.crime_summary s USING (CrimeID)'''
+
+CRIME_DOSSIER_QUERY = '''
+    SELECT c.CrimeID, c.Type, c.Date, c.Location,
+           COALESCE(evidence.items, '[]') AS evidence, COALESCE(officers.items, '[]') AS officers,
+           COALESCE(suspects.items, '[]') AS suspects
+    FROM "Crimes" c
+    LEFT JOIN LATERAL (SELECT json_agg(json_build_array(e.Type, e.Description)) AS items
+                       FROM "Evidence" e WHERE e.CrimeID = c.CrimeID) evidence ON true
+    LEFT JOIN LATERAL (SELECT json_agg(json_build_array(o.Name, o.Rank, o.Department)) AS items
+                       FROM "Officers" o WHERE o.CrimeID = c.CrimeID) officers ON true
+    LEFT JOIN LATERAL (SELECT json_agg(json_build_array(s.Name, s.Age, s.Description)) AS items
+                       FROM "Suspects" s WHERE s.CrimeID = c.CrimeID) suspects ON true
+'''
+
+SQLITE_CRIME_DOSSIER_QUERY = '''
+    SELECT c.CrimeID, c.Type, c.Date, c.Location,
+           (SELECT json_group_array(json_array(e.Type, e.Description)) FROM "Evidence" e WHERE e.CrimeID = c.CrimeID),
+           (SELECT json_group_array(json_array(o.Name, o.Rank, o.Department)) FROM "Officers" o WHERE o.CrimeID = c.CrimeID),
+           (SELECT json_group_array(json_array(s.Name, s.Age, s.Description)) FROM "Suspects" s WHERE s.CrimeID = c.CrimeID)
+    FROM "Crimes" c
+'''                                                         # no LATERAL in SQLite, the correlated subqueries use the crimeid indexes
+
+prepared_statements.register('insert_crime', 'INSERT INTO "Crimes" (Type, Date, Location) VALUES (%s, %s, %s) RETURNING CrimeID')
+prepared_statements.register('delete_crimes', 'DELETE FROM "Crimes" WHERE CrimeID = ANY(%s) RETURNING CrimeID')
+for child_table in CHILD_TABLE_COLUMNS:
+    prepared_statements.register(f'delete_{child_table.lower()}_of_crimes', f'DELETE FROM "{child_table}" WHERE CrimeID = ANY(%s) RETURNING CrimeID')
+    prepared_statements.register(f'unlink_{child_table.lower()}_of_crimes', f'UPDATE "{child_table}" SET CrimeID = NULL WHERE CrimeID = ANY(%s)')
+
+def format_counts(crime):                                   # 'Evidence: 2 | Officers: 1 | Suspects: 0 | Modified: 2024-05-01 14:02' for a CRIME_SUMMARY_QUERY row
+    evidence_count, officer_count, suspect_count, last_modified = crime[4:8]
+    modified = str(last_modified)[:16] if last_modified is not None else '-'  # to the minute, both backends
+    return f'Evidence: {evidence_count} | Officers: {officer_count} | Suspects: {suspect_count} | Modified: {modified}'
+
+def add_crime(cursor, crime_type, crime_date, crime_location):  # Returns the new CrimeID
+    prepared_statements.execute(cursor, 'insert_crime', (crime_type, crime_date, crime_location))
+    return cursor.fetchone()[0]
+
+def fetch_crime_dossiers(cursor, crime_ids=None):           # Every crime (or only crime_ids) together with its evidence, officers and suspects in one query
+    where, params = ('WHERE c.CrimeID = ANY(%s)', (sorted(set(crime_ids)),)) if crime_ids is not None else ('', None)
+    if database.BACKEND == 'sqlite':
+        cursor.execute(f'{SQLITE_CRIME_DOSSIER_QUERY} {where}', params)
+        for crime_id, crime_type, crime_date, crime_location, evidence, officers, suspects in cursor:  # SQLite returns the JSON as text
+            yield crime_id, crime_type, crime_date, crime_location, json.loads(evidence), json.loads(officers), json.loads(suspects)
+        return
+    cursor.execute(f'{CRIME_DOSSIER_QUERY} {where}', params)
+    for crime_id, crime_type, crime_date, crime_location, evidence, officers, suspects in cursor:  # rows are streamed when the cursor is a named one
+        yield crime_id, crime_type, crime_date, crime_location, evidence, officers, suspects
+
+def attach_to_crimes(cursor, table_name, values, crime_ids):  # Add the same record to every selected crime in one INSERT, returns the new ids
+    if not crime_ids:
+        return []
+    columns = CHILD_TABLE_COLUMNS[table_name] + ('CrimeID',)
+    row_placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    params = [value for crime_id in crime_ids for value in (*values, crime_id)]
+    cursor.execute(f'INSERT INTO "{table_name}" ({", ".join(columns)}) VALUES {", ".join([row_placeholders] * len(crime_ids))} RETURNING *;',
+                   params)                                  # one multi-row VALUES, works on PostgreSQL and SQLite
+    return [row[0] for row in cursor.fetchall()]            # the first column is the primary key
+
+def delete_crimes(cursor, crime_ids, keep_related=False):  # Delete many crimes with a few = ANY() statements, returns (deleted crime ids, {table: rows})
+    crime_ids = sorted(set(crime_ids))                      # same lock order for everybody
+    row_counts = {}
+    for table_name in CHILD_TABLE_COLUMNS:                  # done explicitly (not only by ON DELETE CASCADE) to get the counts
+        action = 'unlink' if keep_related else 'delete'
+        prepared_statements.execute(cursor, f'{action}_{table_name.lower()}_of_crimes', (crime_ids,))
+        row_counts[table_name] = cursor.rowcount
+    prepared_statements.execute(cursor, 'delete_crimes', (crime_ids,))
+    deleted_ids = [row[0] for row in cursor.fetchall()]
+    row_counts['Crimes'] = len(deleted_ids)
+    return deleted_ids, row_counts
+
+def delete_crime_records(cursor, table_name, crime_ids):    # Delete the rows of one table that belong to any of the crimes
+    prepared_statements.execute(cursor, f'delete_{table_name.lower()}_of_crimes', (sorted(set(crime_ids)),))
+    affected = [row[0] for row in cursor.fetchall()]
+    return sorted(set(affected)), {table_name: len(affected)}
+
+def delete_row(cursor, table_name, row):                    # Delete one row of any table (as returned by SELECT *) by its primary key, returns the rows deleted
+    primary_key_column = schema_catalog.get_primary_key(table_name)  # the first column when the table has no primary key
+    primary_key = row[schema_catalog.get_column_names(table_name).index(primary_key_column)]
+    cursor.execute(f'DELETE FROM "{table_name}" WHERE {primary_key_column} = %s', (primary_key,))
+    return cursor.rowcount
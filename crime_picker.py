@@ -0,0 +1,134 @@
+# Choose crimes one page at a time instead of printing every crime first
+# Pages use keyset pagination on CrimeID (WHERE CrimeID > last id shown ORDER BY CrimeID LIMIT page size), so only
+# the page on the screen is fetched and the 1000th page costs the same as the first. The user can jump straight
+# to an id or filter on type, location and date.
+import os
+import time
+
+import crime_data
+import database
+import prepared_statements
+from table_display import PAGE_SIZE, escape_like
+
+
+CRIME_QUERY = crime_data.CRIME_SUMMARY_QUERY               # the counts come from the summary table, no joins on the child tables
+FILTER_COLUMNS = ('Type', 'Location', 'Date')
+
+# the pages without a filter are the ones used all the time, they get prepared statements
+prepared_statements.register('crime_picker_first', f'{CRIME_QUERY} ORDER BY CrimeID LIMIT %s')
+prepared_statements.register('crime_picker_after', f'{CRIME_QUERY} WHERE CrimeID > %s ORDER BY CrimeID LIMIT %s')
+prepared_statements.register('crime_picker_before', f'{CRIME_QUERY} WHERE CrimeID < %s ORDER BY CrimeID DESC LIMIT %s')
+prepared_statements.register('crime_picker_by_id', f'{CRIME_QUERY} WHERE CrimeID = ANY(%s) ORDER BY CrimeID')
+
+def fetch_crimes(after=None, before=None, filters=None, page_size=None):  # One page of crimes, after/before = a CrimeID
+    page_size = page_size or PAGE_SIZE
+    if not filters:
+        with database.get_cursor() as cursor:
+            if before is not None:
+                prepared_statements.execute(cursor, 'crime_picker_before', (before, page_size))
+            elif after is not None:
+                prepared_statements.execute(cursor, 'crime_picker_after', (after, page_size))
+            else:
+                prepared_statements.execute(cursor, 'crime_picker_first', (page_size,))
+            crimes = cursor.fetchall()
+        return crimes[::-1] if before is not None else crimes
+
+    conditions, params = [], []
+    for column, text in (filters or {}).items():
+        conditions.append(f'CAST({column} AS text) ILIKE %s')
+        params.append(f'%{escape_like(text)}%')
+    if before is not None:                                  # previous page = the crimes right before the first one shown
+        conditions.append('CrimeID < %s')
+        params.append(before)
+    elif after is not None:
+        conditions.append('CrimeID > %s')
+        params.append(after)
+
+    where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+    order = 'DESC' if before is not None else 'ASC'
+    with database.get_cursor() as cursor:
+        cursor.execute(f'{CRIME_QUERY} {where} ORDER BY CrimeID {order} LIMIT %s', params + [page_size])
+        crimes = cursor.fetchall()
+    return crimes[::-1] if before is not None else crimes
+
+def fetch_crimes_by_id(crime_ids):
+    with database.get_cursor() as cursor:
+        prepared_statements.execute(cursor, 'crime_picker_by_id', (sorted(set(crime_ids)),))
+        return cursor.fetchall()
+
+def ask_filters():
+    filters = {}
+    for column in FILTER_COLUMNS:
+        text = input(f'{column} contains [Enter to skip]: ').strip()
+        if text:
+            filters[column] = text
+    return filters
+
+def pick_crimes(title, multiple=False):                     # Returns the chosen crimes, [] if there are no crimes at all, None for "back"
+    filters = {}
+    crimes = fetch_crimes()
+    if not crimes:
+        return []
+
+    while True:
+        os.system('clear')
+        print(f'{title}\n')
+        if filters:
+            print('Filter: ' + ', '.join(f'{column} contains "{text}"' for column, text in filters.items()) + '\n')
+
+        if crimes:
+            for crime in crimes:
+                print(f"CrimeID: {crime[0]} | Type: {crime[1]} | Date: {crime[2]} | Location: {crime[3]} | {crime_data.format_counts(crime)}")
+        else:
+            print('No crimes match.')
+
+        example = 'e.g. 12 or 12,15,20' if multiple else 'e.g. 12'
+        choice = input(f'\nEnter the CrimeID [{example}], [n]ext / [p]revious page, [j]ump to an id, [f]ilter, '
+                       f'[c]lear the filter or "back" to return: ').strip().lower()
+
+        if choice == 'back':
+            return None
+        elif choice in ['n', 'next']:
+            if crimes:
+                next_crimes = fetch_crimes(after=crimes[-1][0], filters=filters)
+                if next_crimes:                             # stay on the last page
+                    crimes = next_crimes
+        elif choice in ['p', 'previous']:
+            if crimes:
+                previous_crimes = fetch_crimes(before=crimes[0][0], filters=filters)
+                if previous_crimes:
+                    crimes = previous_crimes
+        elif choice.startswith('j'):
+            target = choice[1:].strip() or input('Jump to CrimeID: ').strip()
+            if not target.isdigit():
+                print('Enter a valid CrimeID')
+                time.sleep(2)
+                continue
+            crimes = fetch_crimes(after=int(target) - 1, filters=filters)
+            if not crimes:                                  # past the end, show the last page instead
+                crimes = fetch_crimes(before=int(target), filters=filters)
+        elif choice in ['f', 'filter']:
+            filters = ask_filters()
+            crimes = fetch_crimes(filters=filters)
+        elif choice in ['c', 'clear']:
+            filters = {}
+            crimes = fetch_crimes()
+        else:
+            try:
+                crime_ids = [int(i.strip()) for i in choice.split(',')]
+            except ValueError:
+                print('Enter a valid choice...')
+                time.sleep(2)
+                continue
+            if not multiple and len(crime_ids) != 1:
+                print('Enter only one CrimeID')
+                time.sleep(2)
+                continue
+
+            chosen = fetch_crimes_by_id(crime_ids)          # any crime can be chosen, not only the ones on this page
+            missing = set(crime_ids) - {crime[0] for crime in chosen}
+            if missing:
+                print(f'There is no crime with CrimeID {", ".join(map(str, sorted(missing)))}')
+                time.sleep(2)
+                continue
+            return chosen
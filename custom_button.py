@@ -0,0 +1,126 @@
+# Custom Button class with 3D effect, hover brightness change, and dynamic bold text
+# All buttons share one HoverDispatcher: one Window.mouse_pos binding for the whole program. The buttons are kept per
+# screen (or popup) they are on, a screen's buttons are only hit-tested between its on_pre_enter and on_leave (a popup's
+# while it is open), so a mouse move costs the buttons on the window, not all of them. A button is only redrawn when
+# it starts or stops being hovered, the canvas instructions are made once and changed in place afterwards.
+import weakref
+
+from kivy.core.window import Window
+from kivy.graphics import Color, RoundedRectangle
+from kivy.properties import BooleanProperty
+from kivy.uix.button import Button
+from kivy.uix.modalview import ModalView
+from kivy.uix.screenmanager import Screen
+
+
+BUTTON_COLOR = (0.2, 0.7, 0.6, 1)
+HOVER_COLOR = (0.3, 0.9, 0.8, 1)
+
+class HoverDispatcher:
+    def __init__(self):
+        self.groups = weakref.WeakKeyDictionary()           # screen or popup -> its buttons (thrown away buttons disappear by themselves)
+        self.shown = weakref.WeakSet()                      # screens and popups on the window, only their buttons are hit-tested
+        self.unplaced = weakref.WeakSet()                   # buttons not on a screen or popup yet (just made, or their layout isnt added yet)
+        self.hovered = set()
+        self.bound = False
+
+    def register(self, widget):
+        widget.hover_owner = None
+        widget.bind(parent=self.on_parent)
+        self.unplaced.add(widget)
+        if not self.bound:
+            Window.bind(mouse_pos=self.on_mouse_pos)
+            self.bound = True
+
+    def on_parent(self, widget, parent):                    # moved to another layout, its screen is looked up again
+        if widget.hover_owner is not None:
+            self.groups[widget.hover_owner].discard(widget)
+            widget.hover_owner = None
+        self.unhover(widget)
+        self.unplaced.add(widget)
+
+    def place(self):
+        for widget in list(self.unplaced):
+            owner = widget.parent
+            while owner is not None and not isinstance(owner, (Screen, ModalView)):
+                owner = getattr(owner, 'parent', None)      # the Window at the top has no parent
+            if owner is None:
+                continue
+            self.unplaced.discard(widget)
+            widget.hover_owner = owner
+            if owner not in self.groups:
+                self.groups[owner] = weakref.WeakSet()
+                self.watch(owner)
+            self.groups[owner].add(widget)
+
+    def watch(self, owner):
+        if isinstance(owner, Screen):
+            owner.bind(on_pre_enter=self.show, on_leave=self.hide)
+        else:
+            owner.bind(on_pre_open=self.show, on_dismiss=self.hide)
+        if owner.get_root_window() is not None:             # already on the window
+            self.shown.add(owner)
+
+    def show(self, owner):
+        self.shown.add(owner)
+
+    def hide(self, owner):                                  # returns None, a popup's on_dismiss would be stopped by True
+        self.shown.discard(owner)
+        for widget in list(self.groups.get(owner, ())):
+            self.unhover(widget)
+
+    def unhover(self, widget):
+        if widget in self.hovered:
+            widget.hovered = False
+            self.hovered.discard(widget)
+
+    def on_mouse_pos(self, window, pos):
+        if self.unplaced:
+            self.place()
+        for owner in list(self.shown):
+            for widget in list(self.groups.get(owner, ())):
+                # a button whose layout was taken off the screen is still in the group, it has no window
+                if widget.disabled or widget.get_root_window() is None:
+                    hovered = False
+                else:
+                    hovered = widget.collide_point(*widget.to_widget(*pos))
+                if hovered != widget.hovered:               # only transitions cause a redraw
+                    widget.hovered = hovered
+                    if hovered:
+                        self.hovered.add(widget)
+                    else:
+                        self.hovered.discard(widget)
+
+hover_dispatcher = HoverDispatcher()
+
+class CustomButton(Button):
+    hovered = BooleanProperty(False)
+
+    def __init__(self, **kwargs):
+        super(CustomButton, self).__init__(**kwargs)
+        self.background_normal = ''
+        self.background_color = (0, 0, 0, 0)
+        self.font_name = "Roboto-Bold"
+        self.font_size = self.height * 0.4
+        with self.canvas.before:                            # made once, update_canvas/update_color only change them
+            Color(0, 0, 0, 0.25)
+            self.shadow = RoundedRectangle(radius=[15])
+            self.body_color = Color(*BUTTON_COLOR)
+            self.body = RoundedRectangle(radius=[15])
+            Color(0.2, 1, 0.8, 1)
+            self.highlight = RoundedRectangle(radius=[15, 15, 0, 0])
+        self.update_canvas()
+        self.bind(pos=self.update_canvas, size=self.update_canvas, hovered=self.update_color)
+        hover_dispatcher.register(self)
+
+    def update_canvas(self, *args):
+        self.font_size = self.height * 0.4
+        self.shadow.pos = (self.x + 3, self.y - 3)
+        self.shadow.size = self.size
+        self.body.pos = self.pos
+        self.body.size = self.size
+        self.highlight.pos = (self.x, self.y + self.height - 10)
+        self.highlight.size = (self.width, 10)
+
+    def update_color(self, *args):
+        self.body_color.rgba = HOVER_COLOR if self.hovered else BUTTON_COLOR
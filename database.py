@@ -0,0 +1,165 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import pool
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, cursor as base_cursor
+
+import query_stats
+import sqlite_backend
+
+
+DATABASE_SETTINGS = {                                       # Connection details, can be overridden with environment variables
+    'host': os.environ.get('CRIME_DB_HOST', '127.0.0.1'),
+    'dbname': os.environ.get('CRIME_DB_NAME', 'postgres'),
+    'user': os.environ.get('CRIME_DB_USER', 'postgres'),
+    'password': os.environ.get('CRIME_DB_PASSWORD', 'postgres'),
+    'port': os.environ.get('CRIME_DB_PORT', '5432'),
+}
+
+POOL_MIN_SIZE = int(os.environ.get('CRIME_DB_POOL_MIN', '1'))   # Connections kept open even when nobody is using them
+POOL_MAX_SIZE = int(os.environ.get('CRIME_DB_POOL_MAX', '10'))  # Upper limit of connections handed out at the same time
+STREAM_ITERSIZE = int(os.environ.get('CRIME_DB_ITERSIZE', '2000'))  # Rows fetched per round trip by server-side cursors
+BACKEND = os.environ.get('CRIME_DB_BACKEND', 'postgresql')  # 'postgresql' or 'sqlite' (a local file, see sqlite_backend.py)
+
+Error = (psycopg2.Error, sqlite3.Error)                     # except database.Error: works with both backends
+
+connection_pool = None
+
+class InstrumentedCursor(base_cursor):                      # Every cursor of the pool, reports each query to query_stats
+    # A server-side (named) cursor only sends DECLARE in execute(), the query runs while its rows are fetched, so the
+    # time and rows of the fetches are added up and the query is reported once the cursor is closed.
+    report_as = None                                        # set by prepared_statements, reported instead of "EXECUTE name"
+    pending = None                                          # [query, vars, rows, seconds] of a server-side cursor still being read
+
+    def execute(self, query, vars=None):
+        self.report_pending()
+        reported = self.report_as or query
+        started = time.perf_counter()
+        rows = None
+        try:
+            result = super().execute(query, vars)
+            rows = self.rowcount                            # -1 for server-side cursors, their rows are read later
+            return result
+        finally:
+            seconds = time.perf_counter() - started
+            if self.name is not None and rows is not None:
+                self.pending = [reported, vars, 0, seconds]
+            else:
+                query_stats.record(reported, vars, rows, seconds)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        rows = None
+        try:
+            result = super().executemany(query, vars_list)
+            rows = self.rowcount
+            return result
+        finally:
+            query_stats.record(query, None, rows, time.perf_counter() - started)
+
+    def copy_expert(self, sql, file, size=8192):
+        started = time.perf_counter()
+        rows = None
+        try:
+            result = super().copy_expert(sql, file, size)
+            rows = self.rowcount                            # rows copied in or out
+            return result
+        finally:
+            query_stats.record(sql, None, rows, time.perf_counter() - started)
+
+    def timed_fetch(self, fetch, *args):
+        started = time.perf_counter()
+        try:
+            result = fetch(*args)
+        except Exception:
+            if self.pending is not None:
+                self.pending[2] = None                      # reported as failed
+            raise
+        finally:
+            if self.pending is not None:
+                self.pending[3] += time.perf_counter() - started
+        if self.pending is not None and self.pending[2] is not None:
+            self.pending[2] += len(result) if isinstance(result, list) else int(result is not None)  # fetchone gives one row or None
+        return result
+
+    def fetchone(self):
+        return self.timed_fetch(super().fetchone) if self.pending is not None else super().fetchone()
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        return self.timed_fetch(super().fetchmany, size) if self.pending is not None else super().fetchmany(size)
+
+    def fetchall(self):
+        return self.timed_fetch(super().fetchall) if self.pending is not None else super().fetchall()
+
+    def __iter__(self):                                     # psycopg2 reads itersize rows per round trip while we iterate
+        if self.pending is None:
+            return super().__iter__()
+        return self.timed_rows()
+
+    def timed_rows(self):
+        while True:
+            rows = self.timed_fetch(super().fetchmany, self.itersize)
+            if not rows:
+                return
+            yield from rows
+
+    def report_pending(self):
+        if self.pending is not None:
+            query, vars, rows, seconds = self.pending
+            self.pending = None
+            query_stats.record(query, vars, rows, seconds)
+
+    def close(self):
+        self.report_pending()
+        super().close()
+
+def open_pool(min_size=None, max_size=None):                # Create the shared pool once, later calls just return it
+    global connection_pool
+    if BACKEND == 'sqlite':                                 # sqlite_backend keeps its own connections
+        return None
+    if connection_pool is None:
+        connection_pool = pool.ThreadedConnectionPool(min_size or POOL_MIN_SIZE, max_size or POOL_MAX_SIZE,
+                                                      cursor_factory=InstrumentedCursor, **DATABASE_SETTINGS)
+    return connection_pool
+
+def close_pool():                                           # Close every connection, called when the program exits
+    global connection_pool
+    if BACKEND == 'sqlite':
+        sqlite_backend.close_connections()
+    if connection_pool is not None:
+        connection_pool.closeall()
+        connection_pool = None
+
+@contextmanager
+def get_connection():                                       # Borrow a connection for one operation and always give it back
+    if BACKEND == 'sqlite':
+        with sqlite_backend.get_connection() as connection:
+            yield connection
+        return
+    current_pool = open_pool()
+    connection = current_pool.getconn()
+    try:
+        yield connection
+    finally:
+        if not connection.closed and connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            connection.rollback()                           # anything the operation didnt commit is thrown away
+        current_pool.putconn(connection, close=bool(connection.closed))
+
+@contextmanager
+def get_cursor(commit=False):                               # Short-lived cursor for one operation, commits at the end if asked to
+    with get_connection() as connection:
+        with connection.cursor() as cursor:
+            yield cursor
+        if commit:
+            connection.commit()
+
+@contextmanager
+def get_streaming_cursor(name, itersize=None):              # Server-side (named) cursor, rows arrive in batches of itersize instead of all at once
+    with get_connection() as connection:
+        with connection.cursor(name=name) as cursor:
+            cursor.itersize = itersize or STREAM_ITERSIZE
+            yield cursor
@@ -0,0 +1,122 @@
+# Runs database work for the Kivy GUI on background threads, so a slow query never freezes the window
+#
+#   task = db_worker.submit_query(function, *args, on_done=..., on_error=..., commit=False)
+#
+# function(cursor, *args) runs on a worker thread with a cursor from the pool, on_done(result) or on_error(exception)
+# are then called on the Kivy main thread through Clock.schedule_once. submit() does the same for functions that
+# dont need a cursor (for example the schema catalog). task.cancel() drops a task that hasnt started and makes sure
+# none of its callbacks are called afterwards. Only submit_query() tasks are also stopped on the server, a submit()
+# task that already runs is left to finish, so every read that sends a query of its own goes through submit_query().
+# A commit=True task cancelled before its commit is rolled back, once the commit has started it goes through.
+# Screens only cancel their reads, shutdown() also waits for the writes.
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from kivy.clock import Clock
+
+import database
+
+
+WORKER_THREADS = int(os.environ.get('CRIME_GUI_DB_WORKERS', '4'))  # Keep this below CRIME_DB_POOL_MAX, every worker borrows a connection
+
+executor = None
+active_tasks = set()                                        # tasks that were submitted and havent finished yet
+tasks_lock = threading.Lock()
+
+class DatabaseTask:
+    def __init__(self, function, args, on_done, on_error, use_cursor, commit):
+        self.function = function
+        self.args = args
+        self.on_done = on_done
+        self.on_error = on_error
+        self.use_cursor = use_cursor
+        self.commit = commit
+        self.cancelled = False
+        self.connection = None                              # set while the query runs, so cancel() can interrupt it
+        self.future = None
+        self.lock = threading.Lock()
+
+    def run(self):                                          # worker thread
+        try:
+            if self.cancelled:
+                return
+            try:
+                result = self.run_query() if self.use_cursor else self.function(*self.args)
+            except Exception as e:
+                self.deliver(self.on_error, e)
+            else:
+                self.deliver(self.on_done, result)
+        finally:
+            with tasks_lock:
+                active_tasks.discard(self)
+
+    def run_query(self):
+        with database.get_connection() as connection:      # rolled back by get_connection if it doesnt get committed
+            with self.lock:
+                if self.cancelled:
+                    return None
+                self.connection = connection
+            try:
+                with connection.cursor() as cursor:
+                    result = self.function(cursor, *self.args)
+                if self.commit:
+                    with self.lock:                         # decided together with cancel(): either it is rolled back or committed whole
+                        if self.cancelled:
+                            return None
+                        self.connection = None              # a cancel() from now on cannot interrupt the commit
+                    connection.commit()
+                return result
+            finally:
+                with self.lock:
+                    self.connection = None
+
+    def deliver(self, callback, value):                     # hand the result over to the main thread
+        if self.cancelled:
+            return
+        if callback is None:
+            if isinstance(value, Exception):
+                print(f"An error occurred: {value}")
+            return
+        Clock.schedule_once(lambda dt: self.call(callback, value))
+
+    def call(self, callback, value):                        # main thread
+        if not self.cancelled:                              # cancelled after the result arrived but before we got here
+            callback(value)
+
+    def cancel(self):                                       # main thread, safe to call more than once, see the top of the file for what it stops
+        with self.lock:
+            self.cancelled = True
+            if self.future is not None:
+                self.future.cancel()
+            if self.connection is not None:
+                self.connection.cancel()                    # the server stops the query, the worker gets QueryCanceledError
+
+def start():
+    global executor
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix='gui-db')
+    return executor
+
+def schedule(task):
+    with tasks_lock:
+        active_tasks.add(task)
+    task.future = start().submit(task.run)
+    return task
+
+def submit(function, *args, on_done=None, on_error=None):  # function(*args) in the background
+    return schedule(DatabaseTask(function, args, on_done, on_error, use_cursor=False, commit=False))
+
+def submit_query(function, *args, on_done=None, on_error=None, commit=False):  # function(cursor, *args) in the background
+    return schedule(DatabaseTask(function, args, on_done, on_error, use_cursor=True, commit=commit))
+
+def shutdown():                                             # Cancel the reads that are still running, let the writes finish and stop the threads
+    global executor
+    with tasks_lock:
+        tasks = list(active_tasks)
+    for task in tasks:
+        if not task.commit:
+            task.cancel()
+    if executor is not None:
+        executor.shutdown(wait=True)
+        executor = None
@@ -1,16 +1,27 @@
-import psycopg2
 import time
 import os
 
+import case_log
+import crime_data
+import crime_picker
+import database
+import query_stats
+import schema_catalog
+import schema_migrations
+import search
+import table_display
+from case_log import log_entry, log_entries
 
-program_files_path = os.path.join(os.path.dirname(__file__), 'Program Files')
 
-if not os.path.exists(program_files_path):                  # Ensure the 'Program Files' directory exists
-    os.makedirs(program_files_path)
+# CRIME_DB_BACKEND=sqlite runs everything on the local file crime_investigation.db instead (see sqlite_backend.py)
+database.open_pool()                                        # Open the connection pool, every operation borrows its own cursor from it
+if schema_catalog.LISTEN_FOR_CHANGES:                       # Pick up tables created or dropped by other programs
+    schema_catalog.listen_for_changes()
+schema_migrations.migrate()                                 # Create the core tables or upgrade them to the current schema version
 
-#database_link = sqlite3.connect(os.path.join(os.path.dirname(__file__), 'crime_investigation.db'))  # Connect to the SQLite database  -  SQLITE VERSION
-database_link = psycopg2.connect(host='127.0.0.1', dbname='postgres', user='postgres', password='postgres', port='5432')
-interact_with_database = database_link.cursor()             # Create a cursor for database interaction
+def run_menus(screen):                                      # Every menu returns the next one to show instead of calling it, None ends the program
+    while screen is not None:                               # so the call stack stays one menu deep, however long the program runs
+        screen = screen()
 
 def wait_and_clear():                                       # Helper function to wait and clear the screen
     time.sleep(2)
@@ -29,52 +40,47 @@ _________________________
  7. Delete extra tables
  8. Add info to extra tables
  9. Delete info from extra tables
-10. Exit
+10. Search
+11. Performance stats
+12. Exit
         ''')
     menu_choice = input('Enter a choice [number]: ')
-    while True:
-        if menu_choice == '1':
-            add_new_info_to_a_table()
-        elif menu_choice == '2':
-            update_tables()
-        elif menu_choice == '3':
-            display_information_menu()
-        elif menu_choice == '4':
-            delete_information()
-        elif menu_choice == '5':
-            os.system('clear')
-            print('Currently existing tables\n_________________________')
-            display_existing_tables()
-            input('\nPress enter for menu ')
-            main_menu()
-        elif menu_choice == '6':
-            create_tables()
-            go_to_menu()
-        elif menu_choice == '7':
-            delete_tables()
-        elif menu_choice == '8':
-            add_info_to_special_tables()
-        elif menu_choice == '9':
-            manage_special_tables()
-        elif menu_choice == '10':
-            database_link.close()
-            exit()
-        else:
-            print('Enter a valid choice...')
-            time.sleep(2)
-            main_menu()
+    if menu_choice == '1':
+        return add_new_info_to_a_table
+    elif menu_choice == '2':
+        return update_tables
+    elif menu_choice == '3':
+        return display_information_menu
+    elif menu_choice == '4':
+        return delete_information
+    elif menu_choice == '5':
+        os.system('clear')
+        print('Currently existing tables\n_________________________')
+        display_existing_tables()
+        input('\nPress enter for menu ')
+        return main_menu
+    elif menu_choice == '6':
+        return create_tables
+    elif menu_choice == '7':
+        return delete_tables
+    elif menu_choice == '8':
+        return add_info_to_special_tables
+    elif menu_choice == '9':
+        return manage_special_tables
+    elif menu_choice == '10':
+        return search_menu
+    elif menu_choice == '11':
+        return performance_stats_menu
+    elif menu_choice == '12':
+        return None                                         # run_menus stops, the program closes everything at the bottom
+    else:
+        print('Enter a valid choice...')
+        time.sleep(2)
+        return main_menu
 
 def go_to_menu():                                           # Helper function to wait and clear the screen, then go to the main menu
     wait_and_clear()
-    main_menu()
-
-def log_entry(case_id, message):                            # Function to create log entries in 'Program Files'
-    case_folder = os.path.join(program_files_path, f'case_{case_id}') # we let the code know where and under what name the files will be saved
-    if not os.path.exists(case_folder):                     # if the file doesnt exist
-        os.makedirs(case_folder)                            # create it
-
-    with open(os.path.join(case_folder, 'log.txt'), 'a') as log_file:  # Open the log file in append mode
-        log_file.write(f'{time.strftime("%Y-%m-%d %H:%M:%S")} - {message}\n')  # Write the log entry with a timestamp
+    return main_menu
 
 def add_new_info_to_a_table():                              # Function to add new information to tables
     os.system('clear')
@@ -84,186 +90,138 @@ def add_new_info_to_a_table():                              # Function to add ne
     table_choice = input('\nEnter a choice [number / item name]: ').capitalize()
 
     if table_choice.lower() == 'back to main menu' or table_choice.lower() == 'back':
-        main_menu()
-        return
+        return main_menu
 
     try:                                                    # Match input with table name or number
         table_index = int(table_choice) - 1                 # we will choose 1 for the 0 element so we have to bring it down by 1 to match the 0
         if 0 <= table_index < len(sorted_tables):           # if the user input was between 1-5 or the right word
             table_choice = sorted_tables[table_index]       # the user choice = the right item
-        else:                                               
+        else:
             raise ValueError                                # happens when we enter smth we are not supposed to and then...
     except ValueError:                                      # ...we go to this code
         if table_choice not in sorted_tables:               # if we choose smth other than 1-5 or some other bs
             print('Enter a valid choice')
             time.sleep(2)
-            add_new_info_to_a_table()                       # the menu starts all over after giving a 2 second message
-            return
-
-    while True:                                             # if we entered our option correctly we continue to the appropriate option
-        if table_choice == 'Crimes':                        # only Crimes table works with ID because its a bit more special than the others
-            os.system('clear')
-            crime_type = input('What type of crime is it?:          ')
-            crime_date = input('When did the crime happen? (date):  ')
-            crime_location = input('Where did the crime happen?:        ')
-            interact_with_database.execute(f'INSERT INTO "Crimes" (Type, Date, Location) VALUES (%s, %s, %s) RETURNING crimeid;',
-                                           (crime_type, crime_date, crime_location))
-            crime_id = interact_with_database.fetchone()[0] # Get the last inserted row ID (CrimeID)   (chatgpt helped with this line)
-            if save_confirmation():                         # the user gets asked if hes sure and if the answe is yes the info gets added to the table
-                log_entry(crime_id, f'New crime added: {crime_type}, Date: {crime_date}, Location: {crime_location}')
-            print('\nNew crime added.')
-            time.sleep(3)
-            add_new_info_to_a_table()                       # after all that we go back to the previous menu
-
-        elif table_choice == 'Evidence':
-            os.system('clear')
-            evidence_type = input('What type of evidence is it?:                        ')
-            evidence_description = input('Short description of the evidence:                   ')
-            crime_indices = select_multiple_crimes()
-            if crime_indices:
-                for crime_id in crime_indices:
-                    interact_with_database.execute(f'INSERT INTO "Evidence" (Type, Description, CrimeID) VALUES (%s, %s, %s);',
-                                                   (evidence_type, evidence_description, crime_id))
-                if save_confirmation():
-                    for crime_id in crime_indices:
-                        log_entry(crime_id, f'New evidence added: {evidence_type}, Description: {evidence_description}')
-                print(f'\nNew evidence added to Crimes: {", ".join(map(str, crime_indices))}.')
-            time.sleep(3)
-            add_new_info_to_a_table()
-
-        elif table_choice == 'Officers':
-            os.system('clear')
-            officers_name = input("Officers' first and last name:                      ")
-            officers_rank = input("Officers' rank:                                     ")
-            officers_department = input("Officers' department:                               ")
-            crime_indices = select_multiple_crimes()
-            if crime_indices:
-                for crime_id in crime_indices:
-                    interact_with_database.execute(f'INSERT INTO "Officers" (Name, Rank, Department, CrimeID) VALUES (%s, %s, %s, %s);',
-                                                   (officers_name, officers_rank, officers_department, crime_id))
-                if save_confirmation():
-                    for crime_id in crime_indices:
-                        log_entry(crime_id, f'Officer added: {officers_name}, Rank: {officers_rank}, Department: {officers_department}')
-                print(f'\nNew officer added to Crimes: {", ".join(map(str, crime_indices))}.')
-            time.sleep(3)
-            add_new_info_to_a_table()
-
-        elif table_choice == 'Suspects':
-            os.system('clear')
-            suspects_name = input('What is the name of the suspect?:                      ')
-            suspects_age = input('How old is the suspect?:                               ')
-            suspects_description = input('Short description of the suspect:                      ')
-            crime_indices = select_multiple_crimes()
-            if crime_indices:
-                for crime_id in crime_indices:
-                    interact_with_database.execute(f'INSERT INTO "Suspects" (Name, Age, Description, CrimeID) VALUES (%s, %s, %s, %s);', 
-                                                   (suspects_name, suspects_age, suspects_description, crime_id))
-                if save_confirmation():
-                    for crime_id in crime_indices:
-                        log_entry(crime_id, f'Suspect added: {suspects_name}, Age: {suspects_age}, Description: {suspects_description}')
-                print(f'\nNew suspect added to Crimes: {", ".join(map(str, crime_indices))}.')
-            time.sleep(3)
-            add_new_info_to_a_table()
-
-        elif table_choice.lower() == 'back to main menu' or table_choice.lower() == 'back':
-            main_menu()
+            return add_new_info_to_a_table                  # the menu starts all over after giving a 2 second message
+
+    # if we entered our option correctly we continue to the appropriate option
+    if table_choice == 'Crimes':                            # only Crimes table works with ID because its a bit more special than the others
+        os.system('clear')
+        crime_type = input('What type of crime is it?:          ')
+        crime_date = input('When did the crime happen? (date):  ')
+        crime_location = input('Where did the crime happen?:        ')
+        if not save_confirmation():                         # the user gets asked if hes sure and if the answe is yes the info gets added to the table
+            return main_menu
+        with database.get_cursor(commit=True) as cursor:
+            crime_id = crime_data.add_crime(cursor, crime_type, crime_date, crime_location)  # Get the new CrimeID (prepared INSERT ... RETURNING)
+        log_entry(crime_id, f'New crime added: {crime_type}, Date: {crime_date}, Location: {crime_location}')
+        print('\nNew crime added.')
+        time.sleep(3)
+        return add_new_info_to_a_table                      # after all that we go back to the previous menu
+
+    elif table_choice == 'Evidence':
+        os.system('clear')
+        evidence_type = input('What type of evidence is it?:                        ')
+        evidence_description = input('Short description of the evidence:                   ')
+        crime_indices = select_multiple_crimes()
+        if crime_indices is None:
+            return main_menu
+        if crime_indices:
+            if not save_confirmation():
+                return main_menu
+            with database.get_cursor(commit=True) as cursor:   # one INSERT for all the selected crimes
+                crime_data.attach_to_crimes(cursor, 'Evidence', (evidence_type, evidence_description), crime_indices)
+            log_entries(crime_indices, f'New evidence added: {evidence_type}, Description: {evidence_description}')
+            print(f'\nNew evidence added to Crimes: {", ".join(map(str, crime_indices))}.')
+        time.sleep(3)
+        return add_new_info_to_a_table
+
+    elif table_choice == 'Officers':
+        os.system('clear')
+        officers_name = input("Officers' first and last name:                      ")
+        officers_rank = input("Officers' rank:                                     ")
+        officers_department = input("Officers' department:                               ")
+        crime_indices = select_multiple_crimes()
+        if crime_indices is None:
+            return main_menu
+        if crime_indices:
+            if not save_confirmation():
+                return main_menu
+            with database.get_cursor(commit=True) as cursor:   # one INSERT for all the selected crimes
+                crime_data.attach_to_crimes(cursor, 'Officers', (officers_name, officers_rank, officers_department), crime_indices)
+            log_entries(crime_indices, f'Officer added: {officers_name}, Rank: {officers_rank}, Department: {officers_department}')
+            print(f'\nNew officer added to Crimes: {", ".join(map(str, crime_indices))}.')
+        time.sleep(3)
+        return add_new_info_to_a_table
+
+    elif table_choice == 'Suspects':
+        os.system('clear')
+        suspects_name = input('What is the name of the suspect?:                      ')
+        suspects_age = input('How old is the suspect?:                               ')
+        suspects_description = input('Short description of the suspect:                      ')
+        crime_indices = select_multiple_crimes()
+        if crime_indices is None:
+            return main_menu
+        if crime_indices:
+            if not save_confirmation():
+                return main_menu
+            with database.get_cursor(commit=True) as cursor:   # one INSERT for all the selected crimes
+                crime_data.attach_to_crimes(cursor, 'Suspects', (suspects_name, suspects_age, suspects_description), crime_indices)
+            log_entries(crime_indices, f'Suspect added: {suspects_name}, Age: {suspects_age}, Description: {suspects_description}')
+            print(f'\nNew suspect added to Crimes: {", ".join(map(str, crime_indices))}.')
+        time.sleep(3)
+        return add_new_info_to_a_table
+
+    elif table_choice.lower() == 'back to main menu' or table_choice.lower() == 'back':
+        return main_menu
 
-        else:
-            print('Please enter a valid choice...')
-            time.sleep(2)
-            add_new_info_to_a_table()
+    else:
+        print('Please enter a valid choice...')
+        time.sleep(2)
+        return add_new_info_to_a_table
 
 def prepare_to_delete_crime():                              # A special function that works only with Crimes because 'Crimes' has more options than other tables
     os.system('clear')
-    interact_with_database.execute('SELECT CrimeID, Type, Date, Location FROM "Crimes"') # returns all the requested info from the table
-    crimes = interact_with_database.fetchall()              # allows us to access all the info in the form of a list in which each item is a tupple
-
-    if not crimes:                                          # if the list of tupples is empty = []
-        print('No crimes found. Returning to menu...')
-        time.sleep(2)
-        main_menu()
-        return None
-
-    print('Select a crime:\n')
-    for index, crime in enumerate(crimes, start=1):         # for each tupple() in the list[] we print a tupple and add an index to it
-        print(f"{index}. CrimeID: {crime[0]} | Type: {crime[1]} | Date: {crime[2]} | Location: {crime[3]}")
-
-    choice = input(f'\nEnter the crime number [1-{len(crimes)}] or "back" to return: ') # user help if they dont know what to enter (1-4) + hidden back option
+    return crime_picker.pick_crimes('Select a crime:')     # pages through the crimes, only the page on the screen is fetched
 
-    if choice.lower() == 'back':
-        delete_information()
-        return None
-
-    try:
-        crime_index = int(choice) - 1
-        if 0 <= crime_index < len(crimes):
-            return crimes[crime_index]                      # Return the selected crime details
-        else:
-            raise ValueError
-    except ValueError:
-        print('Enter a valid crime number')
-        time.sleep(2)
-        return prepare_to_delete_crime()
-
-def select_multiple_crimes():
+def select_multiple_crimes():                               # The chosen CrimeIDs, [] for "back", None when there are no crimes at all
     os.system('clear')
-    interact_with_database.execute('SELECT CrimeID, Type, Date, Location FROM "Crimes"')
-    crimes = interact_with_database.fetchall()
+    crimes = crime_picker.pick_crimes('Select for which crimes:', multiple=True)
+
+    if crimes is None:
+        return []
 
     if not crimes:
         print('No crimes found. Returning to menu...')
         time.sleep(2)
-        main_menu()
-        return []
-
-    print('Select for which crimes:\n')
-    for index, crime in enumerate(crimes, start=1):
-        print(f"{index}. CrimeID: {crime[0]} | Type: {crime[1]} | Date: {crime[2]} | Location: {crime[3]}")
-
-    choice = input(f'\nEnter the crime numbers [e.g., 1,3,5 for multiple choices] or "back" to return: ')
+        return None
 
-    if choice.lower() == 'back':
-        return []
+    return [crime[0] for crime in crimes]
 
-    try:
-        crime_indices = [int(i.strip()) - 1 for i in choice.split(',')]
-        valid_crimes = [crimes[i][0] for i in crime_indices if 0 <= i < len(crimes)]
-        if not valid_crimes:
-            raise ValueError
-        return valid_crimes
-    except ValueError:
-        print('Enter valid crime numbers')
-        time.sleep(2)
-        return select_multiple_crimes()
-
-def save_confirmation():
-    answer = input('\nAre you sure you want to save this? (yes/no) \n')
+def save_confirmation():                                    # True = save, False = cancelled (the caller goes back to the main menu)
     while True:
+        answer = input('\nAre you sure you want to save this? (yes/no) \n')
         if answer.lower() in ['yes', 'y']:
-            database_link.commit()
             return True
         elif answer.lower() in ['no', 'n']:
             print('\nOperation cancelled, going to main menu...')
             wait_and_clear()
-            main_menu()
             return False
         else:
             print('Enter a valid option...')
             wait_and_clear()
-            save_confirmation()
 
 def update_tables():
     os.system('clear')
     print('Which table would you\nlike to update?\n_________________________')
     sorted_tables = display_existing_tables()
-    
+
     back_option_index = len(sorted_tables)                  # Calculate the index of the "Back to main menu" option
 
     table_choice = input('\nEnter a choice [number / item name] or "back" to return: ').capitalize()
 
     if table_choice.lower() == 'back':
-        main_menu()
-        return
+        return main_menu
 
     try:
         table_index = int(table_choice) - 1
@@ -272,27 +230,24 @@ def update_tables():
             if " [not working]" in table_choice:            # Check if the selected table is in the [not working] range
                 raise ValueError
         elif table_index == back_option_index - 1:
-            main_menu()
-            return
+            return main_menu
         else:
             raise ValueError
     except ValueError:
         print('Choose a valid option')
         time.sleep(2)
-        update_tables()
-        return
+        return update_tables
 
     os.system('clear')
-    interact_with_database.execute(f'SELECT crimeid, * FROM "{table_choice}"')    
-    rows = interact_with_database.fetchall()
+    with database.get_cursor() as cursor:
+        cursor.execute(f'SELECT crimeid, * FROM "{table_choice}"')
+        rows = cursor.fetchall()
+        column_names = [description[0] for description in cursor.description]
 
     if not rows:
         print(f'No records found in {table_choice}. Returning to menu...')
         time.sleep(2)
-        main_menu()
-        return
-
-    column_names = [description[0] for description in interact_with_database.description]
+        return main_menu
 
     print(f'Select a record from the {table_choice} table to update or "back" to return:\n')     # Display the records for selection
 
@@ -303,9 +258,8 @@ def update_tables():
     record_choice = input(f'\nEnter the record number to update [1-{len(rows)}]: ')
 
     if record_choice.lower() == 'back':
-        update_tables()
-        return
-    
+        return update_tables
+
     try:
         record_index = int(record_choice) - 1
         if 0 <= record_index < len(rows):
@@ -315,8 +269,8 @@ def update_tables():
     except ValueError:
         print('Enter a valid record number')
         time.sleep(2)
-        update_tables()
-        return
+        return update_tables
+    rows = None                                             # only the selected row is needed from here on
 
     os.system('clear')
     print(f'Which field would you like to update in the selected record?\n')
@@ -326,8 +280,7 @@ def update_tables():
     field_choice = input(f'\nEnter the field number to update [1-{len(column_names) - 2}] or "back" to return: ')
 
     if field_choice.lower() == 'back':
-        update_tables()
-        return
+        return update_tables
 
     try:
         field_index = int(field_choice) - 1
@@ -338,52 +291,29 @@ def update_tables():
     except ValueError:
         print('Enter a valid field number')
         time.sleep(2)
-        update_tables()
-        return
+        return update_tables
 
     new_value = input(f'Enter the new value for {field_name} or "back" to return: ')
 
     if new_value.lower() == 'back':
-        update_tables()
-        return
+        return update_tables
 
+    if not save_confirmation():
+        return main_menu
     try:                                                    # Update the record in the database
-        interact_with_database.execute(f'UPDATE "{table_choice}" SET {field_name} = %s WHERE crimeid = %s', (new_value, selected_row[0]))
-        if save_confirmation():
-            log_entry(selected_row[0], f'Updated {field_name} to {new_value} in {table_choice} table')
+        with database.get_cursor(commit=True) as cursor:
+            cursor.execute(f'UPDATE "{table_choice}" SET {field_name} = %s WHERE crimeid = %s', (new_value, selected_row[0]))
+        log_entry(selected_row[0], f'Updated {field_name} to {new_value} in {table_choice} table')
         print(f'\nRecord updated successfully in {table_choice}.')
-    except psycopg2.Error as e:
+    except database.Error as e:
         print(f"An error occurred: {e}")
 
     time.sleep(2)
-    update_tables()
-
-def displaying_function(table_choice):                      # Function to display information from tables
-    os.system('clear')
-    print(f'All {table_choice}')
-    print('_________________________')
-
-    interact_with_database.execute(f'SELECT * FROM "{table_choice}"') # Execute the query to fetch all rows from the chosen table
-    rows = interact_with_database.fetchall()
-
-    # Fetch column names to use as headers
-    column_names = [description[0] for description in interact_with_database.description]
+    return update_tables
 
-    # Find the maximum width of each column for pretty printing
-    column_widths = [max(len(str(value)) for value in column) for column in zip(*([column_names] + rows))]
-
-    # Create a format string for each row
-    format_string = '  '.join(f'{{:<{width}}}' for width in column_widths)
-
-    # Print the header row
-    print(format_string.format(*column_names))
-    print('-' * sum(column_widths))
-
-    for row in rows:
-        print(format_string.format(*row))
-
-    input('\nPress Enter to continue ')
-    display_information_menu()
+def displaying_function(table_choice):                      # Function to display information from tables, one page at a time
+    table_display.display_table_pages(table_choice)
+    return display_information_menu
 
 def display_crimes_data(full_info=True):
     os.system('clear')
@@ -393,89 +323,130 @@ def display_crimes_data(full_info=True):
     else:
         print('Displaying all crimes...\n')
 
-    # Fetch all crimes
-    interact_with_database.execute('SELECT CrimeID, Type, Date, Location FROM "Crimes"')
-    crimes = interact_with_database.fetchall()
-
-    for crime in crimes:
-        crime_id, crime_type, crime_date, crime_location = crime
-        print(f"Crime #{crime_id}:")
-        print(f"  Type: {crime_type}")
-        print(f"  Date: {crime_date}")
-        print(f"  Location: {crime_location}")
-
+    with database.get_streaming_cursor('display_crimes') as cursor:  # rows are printed as they arrive instead of after fetching everything
         if full_info:
-            # Fetch corresponding evidence
-            interact_with_database.execute('SELECT Type, Description FROM "Evidence" WHERE crimeid = %s', (crime_id,))
-            evidence = interact_with_database.fetchall()
-            if evidence:
-                print("  Evidence:")
-                for ev in evidence:
-                    print(f"    - Type: {ev[0]}, Description: {ev[1]}")
-            else:
-                print("  Evidence: None")
-
-            # Fetch corresponding officers
-            interact_with_database.execute('SELECT Name, Rank, Department FROM "Officers" WHERE CrimeID = %s', (crime_id,))
-            officers = interact_with_database.fetchall()
-            if officers:
-                print("  Officers:")
-                for officer in officers:
-                    print(f"    - Name: {officer[0]}, Rank: {officer[1]}, Department: {officer[2]}")
-            else:
-                print("  Officers: None")
-
-            # Fetch corresponding suspects
-            interact_with_database.execute('SELECT Name, Age, Description FROM "Suspects" WHERE CrimeID = %s', (crime_id,))
-            suspects = interact_with_database.fetchall()
-            if suspects:
-                print("  Suspects:")
-                for suspect in suspects:
-                    print(f"    - Name: {suspect[0]}, Age: {suspect[1]}, Description: {suspect[2]}")
+            # Fetch all crimes with their evidence, officers and suspects in a single query
+            crimes = crime_data.fetch_crime_dossiers(cursor)
+        else:
+            # Fetch all crimes with their record counts (kept in the summary table, no joins on evidence, officers and suspects)
+            cursor.execute(crime_data.CRIME_SUMMARY_QUERY)
+            crimes = cursor
+
+        for crime in crimes:
+            crime_id, crime_type, crime_date, crime_location = crime[:4]
+            print(f"Crime #{crime_id}:")
+            print(f"  Type: {crime_type}")
+            print(f"  Date: {crime_date}")
+            print(f"  Location: {crime_location}")
+
+            if full_info:
+                evidence, officers, suspects = crime[4:]   # corresponding evidence, officers and suspects came with the crime
+
+                if evidence:
+                    print("  Evidence:")
+                    for ev in evidence:
+                        print(f"    - Type: {ev[0]}, Description: {ev[1]}")
+                else:
+                    print("  Evidence: None")
+
+                if officers:
+                    print("  Officers:")
+                    for officer in officers:
+                        print(f"    - Name: {officer[0]}, Rank: {officer[1]}, Department: {officer[2]}")
+                else:
+                    print("  Officers: None")
+
+                if suspects:
+                    print("  Suspects:")
+                    for suspect in suspects:
+                        print(f"    - Name: {suspect[0]}, Age: {suspect[1]}, Description: {suspect[2]}")
+                else:
+                    print("  Suspects: None")
             else:
-                print("  Suspects: None")
+                print(f"  {crime_data.format_counts(crime)}")
 
-        print("\n" + "-"*40 + "\n")  # Separator between crimes
+            print("\n" + "-"*40 + "\n")  # Separator between crimes
 
     input('Press Enter to return to the menu ')
-    display_information_menu()
+    return display_information_menu
 
 def display_information_menu():
     os.system('clear')
     print('What would you like to display?\n_________________________')
-    
+
     sorted_tables = display_existing_tables_option3()
-    
+
     # Calculate the index of the "Back to main menu" option
     back_option_index = len(sorted_tables)
 
     choice = input('\nEnter a choice [number / table name] or "back" to return: ').strip().capitalize()
 
     if choice.lower() == 'back':
-        main_menu()
-        return
+        return main_menu
 
     try:
         choice_index = int(choice) - 1
         if choice_index == 0:  # Crimes [full]
-            display_crimes_data(full_info=True)
-            return
+            return lambda: display_crimes_data(full_info=True)
         elif choice_index == 1:  # Crimes [only]
-            display_crimes_data(full_info=False)
-            return
+            return lambda: display_crimes_data(full_info=False)
         elif 2 <= choice_index < back_option_index - 1:  # Other valid tables
             selected_table = sorted_tables[choice_index]
-            displaying_function(selected_table)
+            return lambda: displaying_function(selected_table)
         elif choice_index == back_option_index - 1:  # Back to main menu
-            main_menu()
-            return
+            return main_menu
         else:
             raise ValueError
     except ValueError:
         print('Choose a valid option...')
         time.sleep(2)
-        display_information_menu()
-        return
+        return display_information_menu
+
+def search_menu():                                          # Ranked search in crimes, evidence and suspects
+    os.system('clear')
+    print('Search crimes, evidence and suspects\n_________________________')
+    text = input('Search for [words, "exact phrase", -word to leave out] or "back" to return: ').strip()
+
+    if text.lower() in ['back', '']:
+        return main_menu
+
+    try:
+        results = search.search(text)
+    except database.Error as e:
+        print(f"An error occurred: {e}")
+        results = []
+
+    if results:
+        print()
+        for source, record_id, crime_id, summary, rank in results:
+            print(f"{rank:.3f} | {source} #{record_id} | Crime #{crime_id} | {summary}")
+    else:
+        print('\nNothing found.')
+
+    choice = input('\nPress Enter to search again or type "back" for the menu ').strip()
+    if choice.lower() == 'back':
+        return main_menu
+    return search_menu
+
+def performance_stats_menu():                               # The queries that took the most time since the program started
+    os.system('clear')
+    print('Performance stats - top queries by total time\n_________________________')
+    queries = query_stats.top_queries()
+
+    if queries:
+        print(f"{'Total ms':>10} | {'Calls':>6} | {'Mean ms':>8} | {'p95 ms':>8} | {'Max ms':>8} | {'Rows':>7} | Caller | Query")
+        for total, calls, mean, p95, maximum, rows, caller, query in queries:
+            print(f"{total:10.1f} | {calls:6} | {mean:8.2f} | {p95:8.2f} | {maximum:8.2f} | {rows:7} | {caller} | {query[:100]}")
+    else:
+        print('No queries recorded yet.')
+    if query_stats.SLOW_QUERY_MS:
+        print(f'\nQueries slower than {query_stats.SLOW_QUERY_MS:g} ms are written to {query_stats.SLOW_QUERY_LOG}')
+
+    choice = input('\nPress Enter for menu or type "reset" to clear the stats ').strip()
+    if choice.lower() == 'reset':
+        query_stats.reset()
+        return performance_stats_menu
+    return main_menu
 
 def delete_information():                                   # Function to delete specific information
     os.system('clear')
@@ -490,79 +461,84 @@ def delete_information():                                   # Function to delete
     choice = input('\nEnter a choice [number]: ').strip()
 
     if choice == '1':
-        delete_crime()
+        return delete_crime
     elif choice == '2':
-        delete_from_table('Evidence')
+        return lambda: delete_from_table('Evidence')
     elif choice == '3':
-        delete_from_table('Officers')
+        return lambda: delete_from_table('Officers')
     elif choice == '4':
-        delete_from_table('Suspects')
+        return lambda: delete_from_table('Suspects')
     elif choice == '5':
-        delete_multiple_records()
+        return delete_multiple_records
     elif choice == '6':
-        main_menu()
+        return main_menu
     else:
         print('Enter a valid choice...')
         time.sleep(2)
-        delete_information()
+        return delete_information
 
 def delete_crime():                                         # Delete a crime with options
     os.system('clear')
-    crime = prepare_to_delete_crime()
-    if crime is not None:
-        crime_id = crime[0]  # Get the CrimeID from the selected crime
-
-        print('\nChoose an option:')
-        print('1. Delete crime and all related information')
-        print('2. Delete only the crime (leave related information)')
-
-        choice = input('\nEnter your choice [1/2] or "back" to return: ').strip()
-
-        if choice == '1':
-            delete_confirmation()
-
-            try:
-                interact_with_database.execute('DELETE FROM "Evidence" WHERE crimeid = %s', (crime_id,))
-                interact_with_database.execute('DELETE FROM "Officers" WHERE crimeid = %s', (crime_id,))
-                interact_with_database.execute('DELETE FROM "Suspects" WHERE crimeid = %s', (crime_id,))
-                interact_with_database.execute('DELETE FROM "Crimes" WHERE crimeid = %s', (crime_id,))
-                if save_confirmation():
-                    log_entry(crime_id, 'Crime and all related information deleted')
-                print(f'\nCrime #{crime_id} and all related information deleted.')
-            except psycopg2.Error as e:
-                print(f"An error occurred: {e}")
-        elif choice == '2':
-            delete_confirmation()
-
-            try:
-                interact_with_database.execute('DELETE FROM "Crimes" WHERE crimeid = %s', (crime_id,))
-                if save_confirmation():
-                    log_entry(crime_id, 'Crime deleted, related information retained')
-                print(f'\nCrime #{crime_id} deleted, but related information retained.')
-            except psycopg2.Error as e:
-                print(f"An error occurred: {e}")
-        elif choice.lower() == 'back':
-            delete_information()
-            return
-        else:
-            print('Invalid choice. Returning to menu...')
-            time.sleep(2)
-            main_menu()
+    crimes = prepare_to_delete_crime()
 
-    go_to_menu()
+    if crimes is None:                                      # the user typed "back"
+        return delete_information
+
+    if not crimes:                                          # there are no crimes at all
+        print('No crimes found. Returning to menu...')
+        time.sleep(2)
+        return main_menu
+
+    crime_id = crimes[0][0]  # Get the CrimeID from the selected crime
+
+    print('\nChoose an option:')
+    print('1. Delete crime and all related information')
+    print('2. Delete only the crime (leave related information)')
+
+    choice = input('\nEnter your choice [1/2] or "back" to return: ').strip()
+
+    if choice == '1':
+        if not delete_confirmation() or not save_confirmation():
+            return main_menu
+
+        try:
+            with database.get_cursor(commit=True) as cursor:
+                deleted_ids, row_counts = crime_data.delete_crimes(cursor, [crime_id])
+            log_entries(deleted_ids, 'Crime and all related information deleted')
+            print(f'\nCrime #{crime_id} and all related information deleted.')
+            print_row_counts(row_counts)
+        except database.Error as e:
+            print(f"An error occurred: {e}")
+    elif choice == '2':
+        if not delete_confirmation() or not save_confirmation():
+            return main_menu
+
+        try:
+            with database.get_cursor(commit=True) as cursor:
+                deleted_ids, row_counts = crime_data.delete_crimes(cursor, [crime_id], keep_related=True)
+            log_entries(deleted_ids, 'Crime deleted, related information retained')
+            print(f'\nCrime #{crime_id} deleted, but related information retained.')
+            print_row_counts(row_counts)
+        except database.Error as e:
+            print(f"An error occurred: {e}")
+    elif choice.lower() == 'back':
+        return delete_information
+    else:
+        print('Invalid choice. Returning to menu...')
+
+    return go_to_menu
 
 def delete_from_table(table_name):                          # Delete specific records from a table
     os.system('clear')
-    interact_with_database.execute(f'SELECT crimeid, * FROM "{table_name}"')
-    rows = interact_with_database.fetchall()
+    with database.get_cursor() as cursor:
+        cursor.execute(f'SELECT crimeid, * FROM "{table_name}"')
+        rows = cursor.fetchall()
+        column_names = [description[0] for description in cursor.description]
 
     if not rows:
         print(f'No records found in {table_name}. Returning to menu...')
         time.sleep(2)
-        main_menu()
-        return
-
-    column_names = [description[0] for description in interact_with_database.description]
+        return main_menu
 
     # Display the records for selection
     print(f'Select a record from the {table_name} table to delete or "back" to return:\n')
@@ -573,28 +549,33 @@ def delete_from_table(table_name):                          # Delete specific re
     record_choice = input(f'\nEnter the ID number you wish to delete [or multiple e.g 1,2,3] or "back" to return: ')
 
     if record_choice.lower() == 'back':
-        delete_information()
-        return
+        return delete_information
 
-    delete_records_by_indices(table_name, record_choice)
+    return lambda: delete_records_by_indices(table_name, record_choice)
 
 def delete_records_by_indices(table_name, record_choice):
     try:
-        indices = [int(i.strip()) - 1 for i in record_choice.split(',')]
-        for index in indices:
-            if index >= 0:
-                interact_with_database.execute(f'DELETE FROM "{table_name}" WHERE crimeid = %s', (index + 1,))
-        if save_confirmation():
-            for index in indices:
-                log_entry(index + 1, f'Record deleted from {table_name}')
-        database_link.commit()
+        crime_ids = [int(i.strip()) for i in record_choice.split(',')]
+        crime_ids = [crime_id for crime_id in crime_ids if crime_id > 0]
+        if not save_confirmation():
+            return main_menu
+        with database.get_cursor(commit=True) as cursor:   # one transaction, one statement per table
+            if table_name == 'Crimes':
+                deleted_ids, row_counts = crime_data.delete_crimes(cursor, crime_ids)
+            else:
+                deleted_ids, row_counts = crime_data.delete_crime_records(cursor, table_name, crime_ids)
+        log_entries(deleted_ids, f'Record deleted from {table_name}')
         print(f'\nSelected records deleted successfully from {table_name}.')
+        print_row_counts(row_counts)
     except ValueError:
         print('Invalid input. Please enter valid numbers separated by commas.')
-    except psycopg2.Error as e:
+    except database.Error as e:
         print(f"An error occurred: {e}")
 
-    go_to_menu()
+    return go_to_menu
+
+def print_row_counts(row_counts):                           # e.g. "Rows affected - Evidence: 3 | Officers: 1 | Suspects: 0 | Crimes: 1"
+    print('Rows affected - ' + ' | '.join(f'{table_name}: {count}' for table_name, count in row_counts.items()))
 
 def delete_multiple_records():
     os.system('clear')
@@ -608,19 +589,19 @@ def delete_multiple_records():
     choice = input('\nEnter a choice [number]: ').strip()
 
     if choice == '1':
-        delete_from_table('Crimes')
+        return lambda: delete_from_table('Crimes')
     elif choice == '2':
-        delete_from_table('Evidence')
+        return lambda: delete_from_table('Evidence')
     elif choice == '3':
-        delete_from_table('Officers')
+        return lambda: delete_from_table('Officers')
     elif choice == '4':
-        delete_from_table('Suspects')
+        return lambda: delete_from_table('Suspects')
     elif choice == '5':
-        delete_information()
+        return delete_information
     else:
         print('Enter a valid choice...')
         time.sleep(2)
-        delete_multiple_records()
+        return delete_multiple_records
 
 def create_tables():                                        # Function to create tables
     os.system('clear')
@@ -642,18 +623,18 @@ def create_tables():                                        # Function to create
     '''
 
     try:
-        interact_with_database.execute(create_a_table)
-        database_link.commit()
+        with database.get_cursor(commit=True) as cursor:
+            cursor.execute(create_a_table)
+        schema_catalog.invalidate()                         # the menus have to see the new table
         print(f"\nTable '{table_name}' created successfully.")
-        go_to_menu()
-    except psycopg2.Error as e:
+    except database.Error as e:
         print(f"An error occurred: {e}")
+    return go_to_menu
 
 def display_existing_tables():                              # Function to display existing tables ----- "information_schema.tables" stores information about the tables in the db
-    interact_with_database.execute("SELECT table_name FROM information_schema.tables WHERE table_schema='public';") 
-    tables = interact_with_database.fetchall()
+    tables = schema_catalog.get_tables()                    # comes from the schema catalog, no query on every menu
 
-    tables = [table[0] for table in tables if table[0] != 'sqlite_sequence']
+    tables = [table for table in tables if table != 'sqlite_sequence']
 
     predefined_order = ['Crimes', 'Evidence', 'Officers', 'Suspects']
 
@@ -673,10 +654,9 @@ def display_existing_tables():                              # Function to displa
     return sorted_tables #we return a list of 5 elements and theirt index on the screen
 
 def display_existing_tables_option3():
-    interact_with_database.execute("SELECT table_name FROM information_schema.tables WHERE table_schema='public';")
-    tables = interact_with_database.fetchall()
+    tables = schema_catalog.get_tables()                    # comes from the schema catalog, no query on every menu
 
-    tables = [table[0] for table in tables if table[0] != 'sqlite_sequence']
+    tables = [table for table in tables if table != 'sqlite_sequence']
 
     predefined_order = ['Crimes', 'Evidence', 'Officers', 'Suspects']
 
@@ -705,8 +685,7 @@ def delete_tables():                                        # Function to delete
     table_choice = input('\nChoose a table you wish to delete [number / item name] or "back" to return: ').strip().capitalize()
 
     if table_choice.lower() == 'back':
-        main_menu()
-        return
+        return main_menu
 
     try:
         table_index = int(table_choice) - 1
@@ -721,41 +700,39 @@ def delete_tables():                                        # Function to delete
         else:
             print('Please enter a valid choice...')
             time.sleep(2)
-            delete_tables()
-            return
+            return delete_tables
 
     table_choice = table_choice.replace(" [not working]", "")
 
     if table_choice.capitalize() == 'Back to main menu' or table_choice.capitalize() == 'Back':
-        main_menu()
-    else:
-        deleting_function(table_choice)
+        return main_menu
+    return lambda: deleting_function(table_choice)
 
 def deleting_function(table_choice):
     os.system('clear')
-    delete_confirmation()
+    if not delete_confirmation():
+        return main_menu
     try:
-        interact_with_database.execute(f'DROP TABLE "{table_choice}"')
-        database_link.commit()  # Commit the deletion to the database
+        with database.get_cursor(commit=True) as cursor:   # Commit the deletion to the database
+            cursor.execute(f'DROP TABLE "{table_choice}"')
+        schema_catalog.invalidate()
         print(f"\nTable '{table_choice}' deleted.")
-    except psycopg2.Error as e:
+    except database.Error as e:
         print(f"An error occurred: {e}")
-    go_to_menu()
+    return go_to_menu
 
-def delete_confirmation():
-    answer = input('\nAre you sure you want to delete this? (yes/no) \n')
+def delete_confirmation():                                  # True = delete, False = cancelled (the caller goes back to the main menu)
     while True:
+        answer = input('\nAre you sure you want to delete this? (yes/no) \n')
         if answer.lower() in ['yes', 'y']:
-            database_link.commit()
-            break
+            return True
         elif answer.lower() in ['no', 'n']:
             print('\nOperation cancelled, going to main menu...')
             wait_and_clear()
-            main_menu()
+            return False
         else:
             print('Enter a valid option...')
             wait_and_clear()
-            delete_confirmation()
 
 #Functions that work with tables created by us
 def add_info_to_special_tables():
@@ -767,8 +744,7 @@ def add_info_to_special_tables():
     if not special_tables:
         print("No special tables found.")
         time.sleep(2)
-        main_menu()
-        return
+        return main_menu
     
     for index, table in enumerate(special_tables, start=1):
         print(f"{index}. {table}")
@@ -776,27 +752,24 @@ def add_info_to_special_tables():
     choice = input('\nEnter the number of the table you want to add information to or "back" to return: ').strip()
 
     if choice.lower() == 'back':
-        main_menu()
-        return
+        return main_menu
 
     try:
         table_index = int(choice) - 1
         if 0 <= table_index < len(special_tables):
             selected_table = special_tables[table_index]
-            add_info_to_table(selected_table)
+            return lambda: add_info_to_table(selected_table)
         else:
             raise ValueError
     except ValueError:
         print('Choose a valid option...')
         time.sleep(2)
-        add_info_to_special_tables()
-        return
+        return add_info_to_special_tables
 
 def get_special_tables():
-    interact_with_database.execute("SELECT table_name FROM information_schema.tables WHERE table_schema='public';")
-    tables = interact_with_database.fetchall()
+    tables = schema_catalog.get_tables()
 
-    tables = [table[0] for table in tables if table[0] not in ['Crimes', 'Evidence', 'Officers', 'Suspects', 'sqlite_sequence']]
+    tables = [table for table in tables if table not in ['Crimes', 'Evidence', 'Officers', 'Suspects', 'sqlite_sequence']]
     
     return tables
 
@@ -804,13 +777,11 @@ def add_info_to_table(table_name):
     os.system('clear')
     print(f"Adding Information to {table_name}\n_________________________")
 
-    # Fetch column names for the selected table
-    interact_with_database.execute(f"SELECT column_name FROM information_schema.columns WHERE table_name = '{table_name}';")
-    columns = interact_with_database.fetchall()
+    # Column names for the selected table
+    columns = schema_catalog.get_column_names(table_name)
 
     new_record = {}
-    for column in columns:
-        column_name = column[0]
+    for column_name in columns:
         user_input = input(f"Enter information for column '{column_name}': ").strip()
         new_record[column_name] = user_input
 
@@ -819,16 +790,15 @@ def add_info_to_table(table_name):
     values_str = ', '.join(f"%({key})s" for key in new_record.keys())
 
     try:
-        interact_with_database.execute(f'INSERT INTO "{table_name}" ({columns_str}) VALUES ({values_str})', new_record)
-        # Commit the transaction to make the changes persistent
-        interact_with_database.connection.commit()
+        # Commit the transaction to make the changes persistent, the pool rolls it back in case of error
+        with database.get_cursor(commit=True) as cursor:
+            cursor.execute(f'INSERT INTO "{table_name}" ({columns_str}) VALUES ({values_str})', new_record)
         print(f'Information added to {table_name} successfully.')
     except Exception as e:
-        interact_with_database.connection.rollback()  # Rollback in case of error
         print(f'An error occurred: {e}')
     
     time.sleep(2)
-    main_menu()
+    return main_menu
 
 def manage_special_tables():
     os.system('clear')
@@ -842,35 +812,33 @@ def manage_special_tables():
     choice = input('\nEnter the number of the table you want to manage or "back" to return: ').strip()
 
     if choice.lower() == 'back':
-        main_menu()
-        return
+        return main_menu
 
     try:
         table_index = int(choice) - 1
         if 0 <= table_index < len(special_tables):
             selected_table = special_tables[table_index]
-            manage_table(selected_table)
+            return lambda: manage_table(selected_table)
         else:
             raise ValueError
     except ValueError:
         print('Choose a valid option...')
         time.sleep(2)
-        manage_special_tables()
-        return
+        return manage_special_tables
 
 def manage_table(table_name):
     os.system('clear')
     print(f'Manage Table: {table_name}\n_________________________')
 
     # Display all rows from the selected table
-    interact_with_database.execute(f'SELECT * FROM "{table_name}"')
-    rows = interact_with_database.fetchall()
+    with database.get_cursor() as cursor:
+        cursor.execute(f'SELECT * FROM "{table_name}"')
+        rows = cursor.fetchall()
 
     if not rows:
         print(f'No records found in {table_name}. Returning to menu...')
         time.sleep(2)
-        main_menu()
-        return
+        return main_menu
 
     for index, row in enumerate(rows, start=1):
         print(f"{index}. {row}")
@@ -878,47 +846,39 @@ def manage_table(table_name):
     choice = input('\nEnter the number of the row you want to delete or "back" to return: ').strip()
 
     if choice.lower() == 'back':
-        main_menu()
-        return
+        return main_menu
 
     try:
         row_index = int(choice) - 1
         if 0 <= row_index < len(rows):
-            delete_row_from_table(table_name, rows[row_index])
+            selected_row = rows[row_index]
+            return lambda: delete_row_from_table(table_name, selected_row)
         else:
             raise ValueError
     except ValueError:
         print('Choose a valid option...')
         time.sleep(2)
-        manage_table(table_name)
-        return
+        return lambda: manage_table(table_name)
 
 def delete_row_from_table(table_name, row):
     os.system('clear')
     print(f'Deleting row from {table_name}\n_________________________')
 
-    # Assuming the first column is the primary key
     try:
-        # Execute the query to get the primary key column name
-        interact_with_database.execute(f"SELECT column_name FROM information_schema.columns WHERE table_name = '{table_name}' ORDER BY ordinal_position LIMIT 1;")
-        primary_key_column = interact_with_database.fetchone()[0]
-
-        primary_key = row[0]
-
-        # Delete the row based on the primary key
-        interact_with_database.execute(f'DELETE FROM "{table_name}" WHERE {primary_key_column} = %s', (primary_key,))
-        
-        # Commit the transaction to save changes
-        interact_with_database.connection.commit()
+        # Commit the transaction to save changes, the pool rolls it back in case of error
+        with database.get_cursor(commit=True) as cursor:
+            # Delete the row based on the primary key, wherever that column is in the table
+            crime_data.delete_row(cursor, table_name, row)
 
         print(f'Row deleted successfully from {table_name}.')
     except Exception as e:
-        interact_with_database.connection.rollback()  # Rollback in case of error
         print(f'An error occurred: {e}')
     
     time.sleep(2)
-    main_menu()
+    return main_menu
 
-main_menu()                                                 # The program starts here
+run_menus(main_menu)                                        # The program starts here
 
-database_link.close()
\ No newline at end of file
+case_log.shutdown()                                         # make sure every log entry is written before we leave
+schema_catalog.stop_listening()
+database.close_pool()
\ No newline at end of file
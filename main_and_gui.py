@@ -1,31 +1,44 @@
 from kivy.app import App
 from kivy.uix.gridlayout import GridLayout
-from kivy.uix.button import Button
 from kivy.uix.anchorlayout import AnchorLayout
 from kivy.uix.screenmanager import ScreenManager, Screen, SlideTransition
 from kivy.uix.label import Label
 from kivy.uix.textinput import TextInput
-from kivy.graphics import Color, RoundedRectangle
 from kivy.core.window import Window
 from kivy.uix.popup import Popup
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.boxlayout import BoxLayout
-from kivy.properties import BooleanProperty
-import psycopg2
+from kivy.uix.spinner import Spinner
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.properties import ListProperty
+from kivy.clock import Clock
 import time
 import os
 
+import case_log
+import crime_data
+import crime_picker
+import database
+import db_worker
+import query_stats
+import schema_catalog
+import schema_migrations
+import search
+import table_display
+from case_log import log_entry, log_entries
+from custom_button import CustomButton
+
 # Set window size and background to an aqua theme
 Window.size = (1080, 720)
 Window.clearcolor = (0.2, 0.6, 0.7, 1)
 
 # Database connection setup
-program_files_path = os.path.join(os.path.dirname(__file__), 'Program Files')
-if not os.path.exists(program_files_path):
-    os.makedirs(program_files_path)
-
-database_link = psycopg2.connect(host='127.0.0.1', dbname='postgres', user='postgres', password='postgres', port='5432')
-interact_with_database = database_link.cursor()
+database.open_pool()                                        # Shared connection pool, each screen action borrows a cursor from it
+if schema_catalog.LISTEN_FOR_CHANGES:                       # Pick up tables created or dropped by other programs
+    schema_catalog.listen_for_changes()
+schema_migrations.migrate()                                 # Create the core tables or upgrade them to the current schema version
 
 # Function stubs for menu operations
 def add_new_info_to_a_table(instance):
@@ -57,53 +70,69 @@ def manage_special_tables(instance):
 
 def exit_program(instance):
     print("Exiting...")
-    database_link.close()
+    db_worker.shutdown()                                    # cancel queries that are still running in the background
+    case_log.shutdown()                                     # make sure every log entry is written before we leave
+    schema_catalog.stop_listening()
+    database.close_pool()
     App.get_running_app().stop()
 
-# Custom Button class with 3D effect, hover brightness change, and dynamic bold text
-class CustomButton(Button):
-    hovered = BooleanProperty(False)
-
-    def __init__(self, **kwargs):
-        super(CustomButton, self).__init__(**kwargs)
-        self.background_normal = ''
-        self.background_color = (0, 0, 0, 0)
-        self.font_name = "Roboto-Bold"
-        self.font_size = self.height * 0.4
-        self.bind(pos=self.update_canvas, size=self.update_canvas)
-        Window.bind(mouse_pos=self.on_mouse_pos)
-
-    def update_canvas(self, *args):
-        self.font_size = self.height * 0.4
-        with self.canvas.before:
-            self.canvas.before.clear()
-            Color(0, 0, 0, 0.25)
-            RoundedRectangle(pos=(self.x + 3, self.y - 3), size=self.size, radius=[15])
-            button_color = (0.2, 0.7, 0.6, 1) if not self.hovered else (0.3, 0.9, 0.8, 1)
-            Color(*button_color)
-            RoundedRectangle(pos=self.pos, size=self.size, radius=[15])
-            Color(0.2, 1, 0.8, 1)
-            RoundedRectangle(pos=(self.x, self.y + self.height - 10), size=(self.width, 10), radius=[15, 15, 0, 0])
-
-    def on_mouse_pos(self, *args):
-        pos = args[1]
-        self.hovered = self.collide_point(*self.to_widget(*pos))
-        self.update_canvas()
-
 class AddInfoScreen(Screen):
     def __init__(self, **kwargs):
         super(AddInfoScreen, self).__init__(**kwargs)
+        self.task = None                                    # database request that is still running for this screen
+        self.loading_view = None
+        self.save_button = None
         self.layout = BoxLayout(orientation='vertical', padding=20, spacing=10, size_hint=(1, 1))
         self.add_widget(self.layout)
         self.build_initial_view()
 
+    def on_leave(self, *args):
+        self.cancel_task()                                  # nobody is waiting for the result anymore
+
+    def on_pre_enter(self, *args):
+        if self.task is None and self.loading_view is not None and self.loading_view.parent is not None:
+            self.build_initial_view()                       # the loading was cancelled when we left, start it again
+
+    def cancel_task(self):                                  # only the loading, a save the user confirmed is never cancelled
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def show_loading(self, text, on_cancel):
+        # Loading state: a label and a cancel button instead of the screen content
+        self.loading_view = BoxLayout(orientation='vertical', spacing=10, size_hint=(1, 0.3))
+        self.loading_view.add_widget(Label(text=text, font_size=24))
+        cancel_button = CustomButton(text="Cancel", size_hint=(1, 0.5), background_color=(0.7, 0.2, 0.2, 1))
+        cancel_button.bind(on_press=lambda x: on_cancel())
+        self.loading_view.add_widget(cancel_button)
+        self.layout.add_widget(self.loading_view)
+
+    def hide_loading(self):
+        self.task = None
+        self.layout.remove_widget(self.loading_view)
+
+    def show_error(self, error):
+        self.hide_loading()
+        self.title_label.text = f'Database error: {str(error)}'
+
     def build_initial_view(self):
+        self.cancel_task()
         self.layout.clear_widgets()
+        self.save_button = None
         self.title_label = Label(text="Add Information to a Table", font_size=24, size_hint=(1, 0.1))
         self.layout.add_widget(self.title_label)
 
-        # Display available tables
-        self.tables = display_existing_tables()
+        # Load the available tables in the background (schema catalog, a query only the first time, so submit() is enough)
+        self.show_loading("Loading tables...", on_cancel=self.cancel_to_menu)
+        self.task = db_worker.submit(display_existing_tables, on_done=self.show_tables, on_error=self.show_error)
+
+    def cancel_to_menu(self):
+        self.cancel_task()
+        self.manager.current = 'menu'
+
+    def show_tables(self, tables):
+        self.hide_loading()
+        self.tables = tables
         self.table_choice_label = Label(text="Select a Table:", size_hint=(1, 0.1))
         self.layout.add_widget(self.table_choice_label)
 
@@ -124,6 +153,15 @@ class AddInfoScreen(Screen):
 
     def add_info_to_table(self):
         self.layout.clear_widgets()
+        self.layout.add_widget(self.title_label)
+
+        # Retrieve column names of the selected table from the schema catalog, in the background
+        self.show_loading(f"Loading the columns of {self.table_choice}...", on_cancel=self.build_initial_view)
+        self.task = db_worker.submit(schema_catalog.get_column_names, self.table_choice,
+                                     on_done=self.show_input_fields, on_error=self.show_error)
+
+    def show_input_fields(self, columns):
+        self.hide_loading()
         self.inputs = {}
 
         # Create a scrollable area for the input fields
@@ -131,16 +169,6 @@ class AddInfoScreen(Screen):
         input_container = GridLayout(cols=1, spacing=10, size_hint_y=None)
         input_container.bind(minimum_height=input_container.setter('height'))
 
-        # Retrieve column names dynamically from the selected table
-        query = f"""
-        SELECT column_name 
-        FROM information_schema.columns 
-        WHERE table_schema = 'public' 
-        AND table_name = '{self.table_choice}';
-        """
-        interact_with_database.execute(query)
-        columns = [column[0] for column in interact_with_database.fetchall()]
-
         # Create input fields based on the number of columns, excluding IDs
         for column in columns:
             if column.lower() not in ['id', 'crimeid']:  # Exclude common ID fields
@@ -178,11 +206,11 @@ class AddInfoScreen(Screen):
         back_button.bind(on_press=lambda x: self.build_initial_view())
         
         # Save button
-        save_button = CustomButton(text="Save", size_hint=(0.5, 1))
-        save_button.bind(on_press=self.show_save_confirmation)
+        self.save_button = CustomButton(text="Save", size_hint=(0.5, 1))
+        self.save_button.bind(on_press=self.show_save_confirmation)
 
         buttons_layout.add_widget(back_button)
-        buttons_layout.add_widget(save_button)
+        buttons_layout.add_widget(self.save_button)
         self.layout.add_widget(buttons_layout)
 
     def show_save_confirmation(self, instance):
@@ -219,22 +247,344 @@ class AddInfoScreen(Screen):
         values_placeholder = ', '.join(['%s'] * len(data))
         query = f'INSERT INTO "{self.table_choice}" ({columns}) VALUES ({values_placeholder});'
 
-        try:
-            # Execute the insertion query with the collected data
-            interact_with_database.execute(query, tuple(data.values()))
-            database_link.commit()  # Commit the transaction to save data
+        # Close the popup, the insert runs in the background and is committed there. It is not kept in self.task,
+        # so leaving the screen doesnt cancel it, the result is reported even when the user went somewhere else.
+        self.popup.dismiss()
+        save_button, table_choice = self.save_button, self.table_choice
+        save_button.disabled = True                         # no second insert while the first one is on its way
+        self.title_label.text = f'Saving to {table_choice}...'
+        db_worker.submit_query(lambda cursor: cursor.execute(query, tuple(data.values())), commit=True,
+                               on_done=lambda result: self.saved(save_button, table_choice, data),
+                               on_error=lambda error: self.save_failed(save_button, error))
+
+    def saved(self, save_button, table_choice, data):
+        save_button.disabled = False
+
+        # Log the entry
+        log_entry(None, f"New entry added to {table_choice}: {data}")
+
+        # Confirm the save
+        self.report_save(f'New entry added to {table_choice}.')
+
+    def save_failed(self, save_button, error):
+        # Display any errors encountered during the save process
+        save_button.disabled = False
+        self.report_save(f'Error saving data: {str(error)}')
+
+    def report_save(self, text):                            # on the screen, or in a popup when the user already left it
+        if self.manager is not None and self.manager.current == self.name:
+            self.title_label.text = text
+        else:
+            Popup(title='Save', content=Label(text=text), size_hint=(0.6, 0.3)).open()
+
+# Row of the table browser, RecycleView reuses the same few of these for every row it shows
+class TableRow(RecycleDataViewBehavior, BoxLayout):
+    cells = ListProperty()
+
+    def refresh_view_attrs(self, rv, index, data):
+        cells = data['cells']
+        if len(self.children) != len(cells):                # only when the table (number of columns) changes
+            self.clear_widgets()
+            for _ in cells:
+                label = Label(shorten=True, halign='left', valign='middle', padding=(5, 0))
+                label.bind(size=lambda s, w: setattr(s, 'text_size', s.size))
+                self.add_widget(label)
+        for label, text in zip(reversed(self.children), cells):  # children are stored last added first
+            label.text = text
+        return super(TableRow, self).refresh_view_attrs(rv, index, data)
+
+class TableBrowserScreen(Screen):
+    WINDOW_ROWS = 200                                       # rows fetched per request
+    MAX_ROWS = 600                                          # rows kept in memory, the rest is fetched again when scrolled to
+    ROW_HEIGHT = 30
+    SCROLL_MARGIN = 0.05                                    # how close to the top/bottom before the next window is fetched
+    FILTER_DELAY = 0.4                                      # seconds after the last key press before filtering
 
-            # Log the entry
-            log_entry(None, f"New entry added to {self.table_choice}: {data}")
+    def __init__(self, **kwargs):
+        super(TableBrowserScreen, self).__init__(**kwargs)
+        self.task = None
+        self.table_name = None
+        self.column_names = []
+        self.sort_column = None
+        self.descending = False
+        self.rows = []                                      # raw rows currently in the RecycleView
+        self.sort_index = self.key_index = 0
+        self.more_before = self.more_after = False
+        self.filter_event = None
+
+        layout = BoxLayout(orientation='vertical', padding=20, spacing=10)
+
+        # Table choice, filter box and back button
+        top_bar = BoxLayout(size_hint=(1, 0.08), spacing=10)
+        self.table_spinner = Spinner(text='Choose a table', values=[], size_hint=(0.3, 1))
+        self.table_spinner.bind(text=self.choose_table)
+        self.filter_input = TextInput(hint_text='Filter rows', multiline=False, size_hint=(0.5, 1))
+        self.filter_input.bind(text=self.on_filter_text)
+        back_button = CustomButton(text='Back', size_hint=(0.2, 1), background_color=(0.7, 0.2, 0.2, 1))
+        back_button.bind(on_press=lambda x: setattr(self.manager, 'current', 'menu'))
+        top_bar.add_widget(self.table_spinner)
+        top_bar.add_widget(self.filter_input)
+        top_bar.add_widget(back_button)
+        layout.add_widget(top_bar)
+
+        self.status_label = Label(text='', size_hint=(1, 0.05))
+        layout.add_widget(self.status_label)
+
+        # Column headers, pressing one sorts by that column (pressing it again reverses the order)
+        self.header = BoxLayout(size_hint=(1, 0.07), spacing=2)
+        layout.add_widget(self.header)
+
+        self.table_view = RecycleView(size_hint=(1, 0.8), bar_width=10, scroll_type=['bars', 'content'])
+        self.table_view.viewclass = TableRow
+        rows_layout = RecycleBoxLayout(orientation='vertical', default_size=(None, self.ROW_HEIGHT),
+                                       default_size_hint=(1, None), size_hint_y=None)
+        rows_layout.bind(minimum_height=rows_layout.setter('height'))
+        self.table_view.add_widget(rows_layout)
+        self.table_view.bind(scroll_y=self.on_scroll)
+        layout.add_widget(self.table_view)
 
-            # Update the title label to confirm the save
-            self.title_label.text = f'New entry added to {self.table_choice}.'
-        except Exception as e:
-            # Display any errors encountered during the save process
-            self.title_label.text = f'Error saving data: {str(e)}'
+        self.add_widget(layout)
 
-        # Close the popup
-        self.popup.dismiss()
+    def on_pre_enter(self, *args):
+        self.status_label.text = 'Loading tables...'
+        self.task = db_worker.submit(schema_catalog.get_tables, on_done=self.show_tables, on_error=self.show_error)
+
+    def on_leave(self, *args):
+        self.cancel_task()
+
+    def cancel_task(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def show_tables(self, tables):
+        self.task = None
+        self.table_spinner.values = tables
+        self.status_label.text = '' if self.table_name else 'Choose a table to browse'
+        if self.table_name and not self.rows:               # the loading was cancelled when we left last time
+            self.reload()
+
+    def show_error(self, error):
+        self.task = None
+        self.status_label.text = f'Database error: {str(error)}'
+
+    def choose_table(self, spinner, table_name):
+        if table_name in spinner.values:
+            self.table_name = table_name
+            self.sort_column = None                         # primary key order
+            self.descending = False
+            self.reload()
+
+    def on_filter_text(self, instance, text):
+        if self.filter_event is not None:
+            self.filter_event.cancel()
+        if self.table_name:
+            self.filter_event = Clock.schedule_once(lambda dt: self.reload(), self.FILTER_DELAY)
+
+    def sort_by(self, column_name):
+        if column_name == self.sort_column:
+            self.descending = not self.descending
+        else:
+            self.sort_column = column_name
+            self.descending = False
+        self.reload()
+
+    def reload(self):                                       # start again from the first row (new table, order or filter)
+        self.rows = []
+        self.table_view.data = []
+        self.status_label.text = f'Loading {self.table_name}...'
+        self.request(None, None, self.show_first_window)
+
+    def request(self, after, before, on_done):
+        self.cancel_task()
+        # server-side cursors on the worker's connection, so cancel_task() also stops the query on the server (fast
+        # scrolling, new sort or filter)
+        window = (self.table_name, self.sort_column, self.descending, self.filter_input.text, after, before, self.WINDOW_ROWS)
+        self.task = db_worker.submit_query(lambda cursor: table_display.fetch_window(*window, connection=cursor.connection),
+                                           on_done=on_done, on_error=self.show_error)
+
+    def build_header(self, column_names, key_column):
+        self.header.clear_widgets()
+        for column_name in column_names:
+            arrow = ''
+            if column_name == (self.sort_column or key_column):
+                arrow = ' v' if self.descending else ' ^'
+            button = CustomButton(text=column_name.capitalize() + arrow, size_hint=(1, 1))
+            button.bind(on_press=lambda x, column_name=column_name: self.sort_by(column_name))
+            self.header.add_widget(button)
+
+    def show_first_window(self, result):
+        rows, column_names, key_column = result
+        self.task = None
+        self.column_names = column_names
+        self.key_index = column_names.index(key_column)
+        self.sort_index = column_names.index(self.sort_column or key_column)
+        self.build_header(column_names, key_column)
+        self.more_before = False
+        self.more_after = len(rows) == self.WINDOW_ROWS
+        self.rows = rows
+        self.table_view.data = [self.row_data(row) for row in rows]
+        self.table_view.scroll_y = 1
+        self.update_status()
+
+    def row_data(self, row):
+        return {'cells': ['' if value is None else str(value) for value in row]}
+
+    def edge_of(self, row):                                 # (sort value, key value) for fetch_window
+        return row[self.sort_index], row[self.key_index]
+
+    def on_scroll(self, view, scroll_y):
+        if self.task is not None or not self.rows:
+            return
+        if scroll_y <= self.SCROLL_MARGIN and self.more_after:
+            self.status_label.text = 'Loading more rows...'
+            self.request(self.edge_of(self.rows[-1]), None, self.append_window)
+        elif scroll_y >= 1 - self.SCROLL_MARGIN and self.more_before:
+            self.status_label.text = 'Loading more rows...'
+            self.request(None, self.edge_of(self.rows[0]), self.prepend_window)
+
+    def append_window(self, result):
+        rows = result[0]
+        self.task = None
+        self.more_after = len(rows) == self.WINDOW_ROWS
+        combined = self.rows + rows
+        removed = max(len(combined) - self.MAX_ROWS, 0)    # forget the rows at the top, they are fetched again if needed
+        if removed:
+            self.more_before = True
+        self.replace_rows(combined[removed:], removed_top=removed, added_top=0)
+
+    def prepend_window(self, result):
+        rows = result[0]
+        self.task = None
+        self.more_before = len(rows) == self.WINDOW_ROWS
+        combined = rows + self.rows
+        removed = max(len(combined) - self.MAX_ROWS, 0)    # forget the rows at the bottom
+        if removed:
+            self.more_after = True
+        self.replace_rows(combined[:len(combined) - removed], removed_top=0, added_top=len(rows))
+
+    def replace_rows(self, rows, removed_top, added_top):  # swap the rows without moving what is on the screen
+        view = self.table_view
+        scrolled = (1 - view.scroll_y) * max(len(self.rows) * self.ROW_HEIGHT - view.height, 0)  # pixels from the top
+        scrolled += (added_top - removed_top) * self.ROW_HEIGHT
+        self.rows = rows
+        view.data = [self.row_data(row) for row in rows]
+        scrollable = len(rows) * self.ROW_HEIGHT - view.height
+        view.scroll_y = min(max(1 - scrolled / scrollable, 0), 1) if scrollable > 0 else 1
+        self.update_status()
+
+    def update_status(self):
+        order = (self.sort_column or 'primary key') + (' descending' if self.descending else '')
+        shown = f'{len(self.rows)} rows loaded' if self.rows else 'No records found'
+        text_filter = f', filter "{self.filter_input.text}"' if self.filter_input.text else ''
+        self.status_label.text = f'{self.table_name}: {shown}, sorted by {order}{text_filter}'
+
+class SearchScreen(Screen):
+    def __init__(self, **kwargs):
+        super(SearchScreen, self).__init__(**kwargs)
+        self.task = None
+
+        layout = BoxLayout(orientation='vertical', padding=20, spacing=10)
+
+        # Search box, search button and back button
+        top_bar = BoxLayout(size_hint=(1, 0.08), spacing=10)
+        self.search_input = TextInput(hint_text='Words, "exact phrase", -word to leave out', multiline=False, size_hint=(0.6, 1))
+        self.search_input.bind(on_text_validate=lambda x: self.start_search())
+        search_button = CustomButton(text='Search', size_hint=(0.2, 1))
+        search_button.bind(on_press=lambda x: self.start_search())
+        back_button = CustomButton(text='Back', size_hint=(0.2, 1), background_color=(0.7, 0.2, 0.2, 1))
+        back_button.bind(on_press=lambda x: setattr(self.manager, 'current', 'menu'))
+        top_bar.add_widget(self.search_input)
+        top_bar.add_widget(search_button)
+        top_bar.add_widget(back_button)
+        layout.add_widget(top_bar)
+
+        self.status_label = Label(text='Search crimes, evidence and suspects', size_hint=(1, 0.05))
+        layout.add_widget(self.status_label)
+
+        # Results, best match first (rank | table and id | crime | text)
+        self.results_view = RecycleView(size_hint=(1, 0.87), bar_width=10, scroll_type=['bars', 'content'])
+        self.results_view.viewclass = TableRow
+        results_layout = RecycleBoxLayout(orientation='vertical', default_size=(None, 30),
+                                          default_size_hint=(1, None), size_hint_y=None)
+        results_layout.bind(minimum_height=results_layout.setter('height'))
+        self.results_view.add_widget(results_layout)
+        layout.add_widget(self.results_view)
+
+        self.add_widget(layout)
+
+    def on_leave(self, *args):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def start_search(self):
+        text = self.search_input.text.strip()
+        if not text:
+            return
+        if self.task is not None:                           # a newer search replaces the one still running
+            self.task.cancel()
+        self.status_label.text = f'Searching for {text}...'
+        self.task = db_worker.submit_query(search.run_search, text, on_done=self.show_results, on_error=self.show_error)
+
+    def show_results(self, results):
+        self.task = None
+        self.status_label.text = f'{len(results)} results' if results else 'Nothing found'
+        self.results_view.data = [{'cells': [f'{rank:.3f}', f'{source} #{record_id}', f'Crime #{crime_id}', str(summary)]}
+                                  for source, record_id, crime_id, summary, rank in results]
+        self.results_view.scroll_y = 1
+
+    def show_error(self, error):
+        self.task = None
+        self.status_label.text = f'Database error: {str(error)}'
+
+class PerformanceScreen(Screen):
+    def __init__(self, **kwargs):
+        super(PerformanceScreen, self).__init__(**kwargs)
+        layout = BoxLayout(orientation='vertical', padding=20, spacing=10)
+
+        # Refresh, reset and back buttons
+        top_bar = BoxLayout(size_hint=(1, 0.08), spacing=10)
+        refresh_button = CustomButton(text='Refresh', size_hint=(0.4, 1))
+        refresh_button.bind(on_press=lambda x: self.refresh())
+        reset_button = CustomButton(text='Reset', size_hint=(0.4, 1))
+        reset_button.bind(on_press=lambda x: self.reset())
+        back_button = CustomButton(text='Back', size_hint=(0.2, 1), background_color=(0.7, 0.2, 0.2, 1))
+        back_button.bind(on_press=lambda x: setattr(self.manager, 'current', 'menu'))
+        top_bar.add_widget(refresh_button)
+        top_bar.add_widget(reset_button)
+        top_bar.add_widget(back_button)
+        layout.add_widget(top_bar)
+
+        self.status_label = Label(text='Top queries by total time', size_hint=(1, 0.05))
+        layout.add_widget(self.status_label)
+
+        # One row per query: total | calls | mean | p95 | max | rows | caller | query
+        self.stats_view = RecycleView(size_hint=(1, 0.87), bar_width=10, scroll_type=['bars', 'content'])
+        self.stats_view.viewclass = TableRow
+        stats_layout = RecycleBoxLayout(orientation='vertical', default_size=(None, 30),
+                                        default_size_hint=(1, None), size_hint_y=None)
+        stats_layout.bind(minimum_height=stats_layout.setter('height'))
+        self.stats_view.add_widget(stats_layout)
+        layout.add_widget(self.stats_view)
+
+        self.add_widget(layout)
+
+    def on_pre_enter(self, *args):
+        self.refresh()
+
+    def refresh(self):                                      # the stats are kept in memory, no query needed
+        queries = query_stats.top_queries()
+        header = ['Total ms', 'Calls', 'Mean ms', 'p95 ms', 'Max ms', 'Rows', 'Caller', 'Query']
+        self.stats_view.data = [{'cells': header}] + [
+            {'cells': [f'{total:.1f}', str(calls), f'{mean:.2f}', f'{p95:.2f}', f'{maximum:.2f}', str(rows), caller, query[:80]]}
+            for total, calls, mean, p95, maximum, rows, caller, query in queries]
+        self.status_label.text = f'Top {len(queries)} queries by total time' if queries else 'No queries recorded yet'
+        self.stats_view.scroll_y = 1
+
+    def reset(self):
+        query_stats.reset()
+        self.refresh()
 
 class MainMenuScreen(Screen):
     def __init__(self, **kwargs):
@@ -245,13 +595,15 @@ class MainMenuScreen(Screen):
         buttons = [
             ("Add Information", self.go_to_add_info),
             ("Update Information", update_tables),
-            ("Display Information", display_information_menu),
+            ("Display Information", self.go_to_table_browser),
             ("Delete Information", delete_information),
             ("Display Tables", display_existing_tables),
             ("Create Extra Tables", create_tables),
             ("Delete Extra Tables", delete_tables),
             ("Add Info to Extra Tables", add_info_to_special_tables),
             ("Delete from Extra Tables", manage_special_tables),
+            ("Search", self.go_to_search),
+            ("Performance Stats", self.go_to_performance),
             ("Exit", exit_program),
         ]
 
@@ -266,19 +618,30 @@ class MainMenuScreen(Screen):
     def go_to_add_info(self, instance):
         self.manager.current = 'add_info'
 
+    def go_to_table_browser(self, instance):
+        self.manager.current = 'table_browser'
+
+    def go_to_search(self, instance):
+        self.manager.current = 'search'
+
+    def go_to_performance(self, instance):
+        self.manager.current = 'performance'
+
 class MyApp(App):
     def build(self):
         sm = ScreenManager(transition=SlideTransition())
         sm.add_widget(MainMenuScreen(name='menu'))
         sm.add_widget(AddInfoScreen(name='add_info'))
+        sm.add_widget(TableBrowserScreen(name='table_browser'))
+        sm.add_widget(SearchScreen(name='search'))
+        sm.add_widget(PerformanceScreen(name='performance'))
         return sm
     
 # Function stubs for menu operations
 def display_existing_tables():
-    interact_with_database.execute("SELECT table_name FROM information_schema.tables WHERE table_schema='public';")
-    tables = interact_with_database.fetchall()
+    tables = schema_catalog.get_tables()                    # comes from the schema catalog, no query on every menu
 
-    tables = [table[0] for table in tables if table[0] != 'sqlite_sequence']
+    tables = [table for table in tables if table != 'sqlite_sequence']
 
     predefined_order = ['Crimes', 'Evidence', 'Officers', 'Suspects']
     sorted_tables = sorted(tables, key=lambda x: (predefined_order.index(x) if x in predefined_order else len(predefined_order)))
@@ -292,14 +655,6 @@ def display_existing_tables():
 
 
 
-def log_entry(crime_id, message):                           # Function to create log entries in 'Program Files'
-    case_folder = os.path.join(program_files_path, f'case_{crime_id}') # we let the code know where and under what name the files will be saved
-    if not os.path.exists(case_folder):                     # if the file doesnt exist
-        os.makedirs(case_folder)                            # create it
-
-    with open(os.path.join(case_folder, 'log.txt'), 'a') as log_file:  # Open the log file in append mode
-        log_file.write(f'{time.strftime("%Y-%m-%d %H:%M:%S")} - {message}\n')  # Write the log entry with a timestamp
-
 def add_new_info_to_a_table():                              # Function to add new information to tables
     os.system('clear')
     print('To which table would you\nlike to add new information?\n_________________________')
@@ -330,10 +685,9 @@ def add_new_info_to_a_table():                              # Function to add ne
             crime_type = input('What type of crime is it?:          ')
             crime_date = input('When did the crime happen? (date):  ')
             crime_location = input('Where did the crime happen?:        ')
-            interact_with_database.execute(f'INSERT INTO "Crimes" (Type, Date, Location) VALUES (%s, %s, %s) RETURNING crimeid;',
-                                           (crime_type, crime_date, crime_location))
-            crime_id = interact_with_database.fetchone()[0] # Get the last inserted row ID (CrimeID)   (chatgpt helped with this line)
             if save_confirmation():                         # the user gets asked if hes sure and if the answe is yes the info gets added to the table
+                with database.get_cursor(commit=True) as cursor:
+                    crime_id = crime_data.add_crime(cursor, crime_type, crime_date, crime_location)  # Get the new CrimeID (prepared INSERT ... RETURNING)
                 log_entry(crime_id, f'New crime added: {crime_type}, Date: {crime_date}, Location: {crime_location}')
             print('\nNew crime added.')
             time.sleep(3)
@@ -345,12 +699,10 @@ def add_new_info_to_a_table():                              # Function to add ne
             evidence_description = input('Short description of the evidence:                   ')
             crime_indices = select_multiple_crimes()
             if crime_indices:
-                for crime_id in crime_indices:
-                    interact_with_database.execute(f'INSERT INTO "Evidence" (Type, Description, CrimeID) VALUES (%s, %s, %s);',
-                                                   (evidence_type, evidence_description, crime_id))
                 if save_confirmation():
-                    for crime_id in crime_indices:
-                        log_entry(crime_id, f'New evidence added: {evidence_type}, Description: {evidence_description}')
+                    with database.get_cursor(commit=True) as cursor:   # one INSERT for all the selected crimes
+                        crime_data.attach_to_crimes(cursor, 'Evidence', (evidence_type, evidence_description), crime_indices)
+                    log_entries(crime_indices, f'New evidence added: {evidence_type}, Description: {evidence_description}')
                 print(f'\nNew evidence added to Crimes: {", ".join(map(str, crime_indices))}.')
             time.sleep(3)
             add_new_info_to_a_table()
@@ -362,12 +714,10 @@ def add_new_info_to_a_table():                              # Function to add ne
             officers_department = input("Officers' department:                               ")
             crime_indices = select_multiple_crimes()
             if crime_indices:
-                for crime_id in crime_indices:
-                    interact_with_database.execute(f'INSERT INTO "Officers" (Name, Rank, Department, CrimeID) VALUES (%s, %s, %s, %s);',
-                                                   (officers_name, officers_rank, officers_department, crime_id))
                 if save_confirmation():
-                    for crime_id in crime_indices:
-                        log_entry(crime_id, f'Officer added: {officers_name}, Rank: {officers_rank}, Department: {officers_department}')
+                    with database.get_cursor(commit=True) as cursor:   # one INSERT for all the selected crimes
+                        crime_data.attach_to_crimes(cursor, 'Officers', (officers_name, officers_rank, officers_department), crime_indices)
+                    log_entries(crime_indices, f'Officer added: {officers_name}, Rank: {officers_rank}, Department: {officers_department}')
                 print(f'\nNew officer added to Crimes: {", ".join(map(str, crime_indices))}.')
             time.sleep(3)
             add_new_info_to_a_table()
@@ -379,12 +729,10 @@ def add_new_info_to_a_table():                              # Function to add ne
             suspects_description = input('Short description of the suspect:                      ')
             crime_indices = select_multiple_crimes()
             if crime_indices:
-                for crime_id in crime_indices:
-                    interact_with_database.execute(f'INSERT INTO "Suspects" (Name, Age, Description, CrimeID) VALUES (%s, %s, %s, %s);', 
-                                                   (suspects_name, suspects_age, suspects_description, crime_id))
                 if save_confirmation():
-                    for crime_id in crime_indices:
-                        log_entry(crime_id, f'Suspect added: {suspects_name}, Age: {suspects_age}, Description: {suspects_description}')
+                    with database.get_cursor(commit=True) as cursor:   # one INSERT for all the selected crimes
+                        crime_data.attach_to_crimes(cursor, 'Suspects', (suspects_name, suspects_age, suspects_description), crime_indices)
+                    log_entries(crime_indices, f'Suspect added: {suspects_name}, Age: {suspects_age}, Description: {suspects_description}')
                 print(f'\nNew suspect added to Crimes: {", ".join(map(str, crime_indices))}.')
             time.sleep(3)
             add_new_info_to_a_table()
@@ -398,10 +746,9 @@ def add_new_info_to_a_table():                              # Function to add ne
             add_new_info_to_a_table()
 
 def display_existing_tables():                              # Function to display existing tables ----- "information_schema.tables" stores information about the tables in the db
-    interact_with_database.execute("SELECT table_name FROM information_schema.tables WHERE table_schema='public';") 
-    tables = interact_with_database.fetchall()
+    tables = schema_catalog.get_tables()                    # comes from the schema catalog, no query on every menu
 
-    tables = [table[0] for table in tables if table[0] != 'sqlite_sequence']
+    tables = [table for table in tables if table != 'sqlite_sequence']
 
     predefined_order = ['Crimes', 'Evidence', 'Officers', 'Suspects']
 
@@ -424,7 +771,6 @@ def save_confirmation():
     answer = input('\nAre you sure you want to save this? (yes/no) \n')
     while True:
         if answer.lower() in ['yes', 'y']:
-            database_link.commit()
             return True
         elif answer.lower() in ['no', 'n']:
             print('\nOperation cancelled, going to main menu...')
@@ -434,47 +780,33 @@ def save_confirmation():
         else:
             print('Enter a valid option...')
             wait_and_clear()
-            save_confirmation()
+            return save_confirmation()
 
 
 
 
 def prepare_to_delete_crime():                              # A special function that works only with Crimes because 'Crimes' has more options than other tables
     os.system('clear')
-    interact_with_database.execute('SELECT CrimeID, Type, Date, Location FROM "Crimes"') # returns all the requested info from the table
-    crimes = interact_with_database.fetchall()              # allows us to access all the info in the form of a list in which each item is a tupple
+    crimes = crime_picker.pick_crimes('Select a crime:')    # pages through the crimes, only the page on the screen is fetched
+
+    if crimes is None:                                      # the user typed "back"
+        delete_information()
+        return None
 
-    if not crimes:                                          # if the list of tupples is empty = []
+    if not crimes:                                          # there are no crimes at all
         print('No crimes found. Returning to menu...')
         time.sleep(2)
         main_menu()
         return None
 
-    print('Select a crime:\n')
-    for index, crime in enumerate(crimes, start=1):         # for each tupple() in the list[] we print a tupple and add an index to it
-        print(f"{index}. CrimeID: {crime[0]} | Type: {crime[1]} | Date: {crime[2]} | Location: {crime[3]}")
-
-    choice = input(f'\nEnter the crime number [1-{len(crimes)}] or "back" to return: ') # user help if they dont know what to enter (1-4) + hidden back option
-
-    if choice.lower() == 'back':
-        delete_information()
-        return None
-
-    try:
-        crime_index = int(choice) - 1
-        if 0 <= crime_index < len(crimes):
-            return crimes[crime_index]                      # Return the selected crime details
-        else:
-            raise ValueError
-    except ValueError:
-        print('Enter a valid crime number')
-        time.sleep(2)
-        return prepare_to_delete_crime()
+    return crimes[0]                                        # Return the selected crime details
 
 def select_multiple_crimes():
     os.system('clear')
-    interact_with_database.execute('SELECT CrimeID, Type, Date, Location FROM "Crimes"')
-    crimes = interact_with_database.fetchall()
+    crimes = crime_picker.pick_crimes('Select for which crimes:', multiple=True)
+
+    if crimes is None:
+        return []
 
     if not crimes:
         print('No crimes found. Returning to menu...')
@@ -482,25 +814,7 @@ def select_multiple_crimes():
         main_menu()
         return []
 
-    print('Select for which crimes:\n')
-    for index, crime in enumerate(crimes, start=1):
-        print(f"{index}. CrimeID: {crime[0]} | Type: {crime[1]} | Date: {crime[2]} | Location: {crime[3]}")
-
-    choice = input(f'\nEnter the crime numbers [e.g., 1,3,5 for multiple choices] or "back" to return: ')
-
-    if choice.lower() == 'back':
-        return []
-
-    try:
-        crime_indices = [int(i.strip()) - 1 for i in choice.split(',')]
-        valid_crimes = [crimes[i][0] for i in crime_indices if 0 <= i < len(crimes)]
-        if not valid_crimes:
-            raise ValueError
-        return valid_crimes
-    except ValueError:
-        print('Enter valid crime numbers')
-        time.sleep(2)
-        return select_multiple_crimes()
+    return [crime[0] for crime in crimes]
 
 def update_tables():
     os.system('clear')
@@ -533,8 +847,10 @@ def update_tables():
         return
 
     os.system('clear')
-    interact_with_database.execute(f'SELECT crimeid, * FROM "{table_choice}"')    
-    rows = interact_with_database.fetchall()
+    with database.get_cursor() as cursor:
+        cursor.execute(f'SELECT crimeid, * FROM "{table_choice}"')
+        rows = cursor.fetchall()
+        column_names = [description[0] for description in cursor.description]
 
     if not rows:
         print(f'No records found in {table_choice}. Returning to menu...')
@@ -542,8 +858,6 @@ def update_tables():
         main_menu()
         return
 
-    column_names = [description[0] for description in interact_with_database.description]
-
     print(f'Select a record from the {table_choice} table to update or "back" to return:\n')     # Display the records for selection
 
     for index, row in enumerate(rows, start=1):
@@ -598,41 +912,19 @@ def update_tables():
         return
 
     try:                                                    # Update the record in the database
-        interact_with_database.execute(f'UPDATE "{table_choice}" SET {field_name} = %s WHERE crimeid = %s', (new_value, selected_row[0]))
         if save_confirmation():
+            with database.get_cursor(commit=True) as cursor:
+                cursor.execute(f'UPDATE "{table_choice}" SET {field_name} = %s WHERE crimeid = %s', (new_value, selected_row[0]))
             log_entry(selected_row[0], f'Updated {field_name} to {new_value} in {table_choice} table')
         print(f'\nRecord updated successfully in {table_choice}.')
-    except psycopg2.Error as e:
+    except database.Error as e:
         print(f"An error occurred: {e}")
 
     time.sleep(2)
     update_tables()
 
-def displaying_function(table_choice):                      # Function to display information from tables
-    os.system('clear')
-    print(f'All {table_choice}')
-    print('_________________________')
-
-    interact_with_database.execute(f'SELECT * FROM "{table_choice}"') # Execute the query to fetch all rows from the chosen table
-    rows = interact_with_database.fetchall()
-
-    # Fetch column names to use as headers
-    column_names = [description[0] for description in interact_with_database.description]
-
-    # Find the maximum width of each column for pretty printing
-    column_widths = [max(len(str(value)) for value in column) for column in zip(*([column_names] + rows))]
-
-    # Create a format string for each row
-    format_string = '  '.join(f'{{:<{width}}}' for width in column_widths)
-
-    # Print the header row
-    print(format_string.format(*column_names))
-    print('-' * sum(column_widths))
-
-    for row in rows:
-        print(format_string.format(*row))
-
-    input('\nPress Enter to continue ')
+def displaying_function(table_choice):                      # Function to display information from tables, one page at a time
+    table_display.display_table_pages(table_choice)
     display_information_menu()
 
 def display_crimes_data(full_info=True):
@@ -643,49 +935,49 @@ def display_crimes_data(full_info=True):
     else:
         print('Displaying all crimes...\n')
 
-    # Fetch all crimes
-    interact_with_database.execute('SELECT CrimeID, Type, Date, Location FROM "Crimes"')
-    crimes = interact_with_database.fetchall()
-
-    for crime in crimes:
-        crime_id, crime_type, crime_date, crime_location = crime
-        print(f"Crime #{crime_id}:")
-        print(f"  Type: {crime_type}")
-        print(f"  Date: {crime_date}")
-        print(f"  Location: {crime_location}")
-
+    with database.get_streaming_cursor('display_crimes') as cursor:  # rows are printed as they arrive instead of after fetching everything
         if full_info:
-            # Fetch corresponding evidence
-            interact_with_database.execute('SELECT Type, Description FROM "Evidence" WHERE crimeid = %s', (crime_id,))
-            evidence = interact_with_database.fetchall()
-            if evidence:
-                print("  Evidence:")
-                for ev in evidence:
-                    print(f"    - Type: {ev[0]}, Description: {ev[1]}")
-            else:
-                print("  Evidence: None")
-
-            # Fetch corresponding officers
-            interact_with_database.execute('SELECT Name, Rank, Department FROM "Officers" WHERE CrimeID = %s', (crime_id,))
-            officers = interact_with_database.fetchall()
-            if officers:
-                print("  Officers:")
-                for officer in officers:
-                    print(f"    - Name: {officer[0]}, Rank: {officer[1]}, Department: {officer[2]}")
-            else:
-                print("  Officers: None")
-
-            # Fetch corresponding suspects
-            interact_with_database.execute('SELECT Name, Age, Description FROM "Suspects" WHERE CrimeID = %s', (crime_id,))
-            suspects = interact_with_database.fetchall()
-            if suspects:
-                print("  Suspects:")
-                for suspect in suspects:
-                    print(f"    - Name: {suspect[0]}, Age: {suspect[1]}, Description: {suspect[2]}")
+            # Fetch all crimes with their evidence, officers and suspects in a single query
+            crimes = crime_data.fetch_crime_dossiers(cursor)
+        else:
+            # Fetch all crimes with their record counts (kept in the summary table, no joins on evidence, officers and suspects)
+            cursor.execute(crime_data.CRIME_SUMMARY_QUERY)
+            crimes = cursor
+
+        for crime in crimes:
+            crime_id, crime_type, crime_date, crime_location = crime[:4]
+            print(f"Crime #{crime_id}:")
+            print(f"  Type: {crime_type}")
+            print(f"  Date: {crime_date}")
+            print(f"  Location: {crime_location}")
+
+            if full_info:
+                evidence, officers, suspects = crime[4:]   # corresponding evidence, officers and suspects came with the crime
+
+                if evidence:
+                    print("  Evidence:")
+                    for ev in evidence:
+                        print(f"    - Type: {ev[0]}, Description: {ev[1]}")
+                else:
+                    print("  Evidence: None")
+
+                if officers:
+                    print("  Officers:")
+                    for officer in officers:
+                        print(f"    - Name: {officer[0]}, Rank: {officer[1]}, Department: {officer[2]}")
+                else:
+                    print("  Officers: None")
+
+                if suspects:
+                    print("  Suspects:")
+                    for suspect in suspects:
+                        print(f"    - Name: {suspect[0]}, Age: {suspect[1]}, Description: {suspect[2]}")
+                else:
+                    print("  Suspects: None")
             else:
-                print("  Suspects: None")
+                print(f"  {crime_data.format_counts(crime)}")
 
-        print("\n" + "-"*40 + "\n")  # Separator between crimes
+            print("\n" + "-"*40 + "\n")  # Separator between crimes
 
     input('Press Enter to return to the menu ')
     display_information_menu()
@@ -772,24 +1064,25 @@ def delete_crime():                                         # Delete a crime wit
             delete_confirmation()
 
             try:
-                interact_with_database.execute('DELETE FROM "Evidence" WHERE crimeid = %s', (crime_id,))
-                interact_with_database.execute('DELETE FROM "Officers" WHERE crimeid = %s', (crime_id,))
-                interact_with_database.execute('DELETE FROM "Suspects" WHERE crimeid = %s', (crime_id,))
-                interact_with_database.execute('DELETE FROM "Crimes" WHERE crimeid = %s', (crime_id,))
                 if save_confirmation():
-                    log_entry(crime_id, 'Crime and all related information deleted')
-                print(f'\nCrime #{crime_id} and all related information deleted.')
-            except psycopg2.Error as e:
+                    with database.get_cursor(commit=True) as cursor:
+                        deleted_ids, row_counts = crime_data.delete_crimes(cursor, [crime_id])
+                    log_entries(deleted_ids, 'Crime and all related information deleted')
+                    print(f'\nCrime #{crime_id} and all related information deleted.')
+                    print_row_counts(row_counts)
+            except database.Error as e:
                 print(f"An error occurred: {e}")
         elif choice == '2':
             delete_confirmation()
 
             try:
-                interact_with_database.execute('DELETE FROM "Crimes" WHERE crimeid = %s', (crime_id,))
                 if save_confirmation():
-                    log_entry(crime_id, 'Crime deleted, related information retained')
-                print(f'\nCrime #{crime_id} deleted, but related information retained.')
-            except psycopg2.Error as e:
+                    with database.get_cursor(commit=True) as cursor:
+                        deleted_ids, row_counts = crime_data.delete_crimes(cursor, [crime_id], keep_related=True)
+                    log_entries(deleted_ids, 'Crime deleted, related information retained')
+                    print(f'\nCrime #{crime_id} deleted, but related information retained.')
+                    print_row_counts(row_counts)
+            except database.Error as e:
                 print(f"An error occurred: {e}")
         elif choice.lower() == 'back':
             delete_information()
@@ -803,8 +1096,10 @@ def delete_crime():                                         # Delete a crime wit
 
 def delete_from_table(table_name):                          # Delete specific records from a table
     os.system('clear')
-    interact_with_database.execute(f'SELECT crimeid, * FROM "{table_name}"')
-    rows = interact_with_database.fetchall()
+    with database.get_cursor() as cursor:
+        cursor.execute(f'SELECT crimeid, * FROM "{table_name}"')
+        rows = cursor.fetchall()
+        column_names = [description[0] for description in cursor.description]
 
     if not rows:
         print(f'No records found in {table_name}. Returning to menu...')
@@ -812,8 +1107,6 @@ def delete_from_table(table_name):                          # Delete specific re
         main_menu()
         return
 
-    column_names = [description[0] for description in interact_with_database.description]
-
     # Display the records for selection
     print(f'Select a record from the {table_name} table to delete or "back" to return:\n')
     for row in rows:
@@ -830,22 +1123,27 @@ def delete_from_table(table_name):                          # Delete specific re
 
 def delete_records_by_indices(table_name, record_choice):
     try:
-        indices = [int(i.strip()) - 1 for i in record_choice.split(',')]
-        for index in indices:
-            if index >= 0:
-                interact_with_database.execute(f'DELETE FROM "{table_name}" WHERE crimeid = %s', (index + 1,))
+        crime_ids = [int(i.strip()) for i in record_choice.split(',')]
+        crime_ids = [crime_id for crime_id in crime_ids if crime_id > 0]
         if save_confirmation():
-            for index in indices:
-                log_entry(index + 1, f'Record deleted from {table_name}')
-        database_link.commit()
-        print(f'\nSelected records deleted successfully from {table_name}.')
+            with database.get_cursor(commit=True) as cursor:   # one transaction, one statement per table
+                if table_name == 'Crimes':
+                    deleted_ids, row_counts = crime_data.delete_crimes(cursor, crime_ids)
+                else:
+                    deleted_ids, row_counts = crime_data.delete_crime_records(cursor, table_name, crime_ids)
+            log_entries(deleted_ids, f'Record deleted from {table_name}')
+            print(f'\nSelected records deleted successfully from {table_name}.')
+            print_row_counts(row_counts)
     except ValueError:
         print('Invalid input. Please enter valid numbers separated by commas.')
-    except psycopg2.Error as e:
+    except database.Error as e:
         print(f"An error occurred: {e}")
 
     go_to_menu()
 
+def print_row_counts(row_counts):                           # e.g. "Rows affected - Evidence: 3 | Officers: 1 | Suspects: 0 | Crimes: 1"
+    print('Rows affected - ' + ' | '.join(f'{table_name}: {count}' for table_name, count in row_counts.items()))
+
 def delete_multiple_records():
     os.system('clear')
     print('From which table would you like to delete multiple records?\n_________________________')
@@ -892,18 +1190,18 @@ def create_tables():                                        # Function to create
     '''
 
     try:
-        interact_with_database.execute(create_a_table)
-        database_link.commit()
+        with database.get_cursor(commit=True) as cursor:
+            cursor.execute(create_a_table)
+        schema_catalog.invalidate()                         # the menus have to see the new table
         print(f"\nTable '{table_name}' created successfully.")
         go_to_menu()
-    except psycopg2.Error as e:
+    except database.Error as e:
         print(f"An error occurred: {e}")
 
 def display_existing_tables():                              # Function to display existing tables ----- "information_schema.tables" stores information about the tables in the db
-    interact_with_database.execute("SELECT table_name FROM information_schema.tables WHERE table_schema='public';") 
-    tables = interact_with_database.fetchall()
+    tables = schema_catalog.get_tables()                    # comes from the schema catalog, no query on every menu
 
-    tables = [table[0] for table in tables if table[0] != 'sqlite_sequence']
+    tables = [table for table in tables if table != 'sqlite_sequence']
 
     predefined_order = ['Crimes', 'Evidence', 'Officers', 'Suspects']
 
@@ -923,10 +1221,9 @@ def display_existing_tables():                              # Function to displa
     return sorted_tables #we return a list of 5 elements and theirt index on the screen
 
 def display_existing_tables_option3():
-    interact_with_database.execute("SELECT table_name FROM information_schema.tables WHERE table_schema='public';")
-    tables = interact_with_database.fetchall()
+    tables = schema_catalog.get_tables()                    # comes from the schema catalog, no query on every menu
 
-    tables = [table[0] for table in tables if table[0] != 'sqlite_sequence']
+    tables = [table for table in tables if table != 'sqlite_sequence']
 
     predefined_order = ['Crimes', 'Evidence', 'Officers', 'Suspects']
 
@@ -985,10 +1282,11 @@ def deleting_function(table_choice):
     os.system('clear')
     delete_confirmation()
     try:
-        interact_with_database.execute(f'DROP TABLE "{table_choice}"')
-        database_link.commit()  # Commit the deletion to the database
+        with database.get_cursor(commit=True) as cursor:   # Commit the deletion to the database
+            cursor.execute(f'DROP TABLE "{table_choice}"')
+        schema_catalog.invalidate()
         print(f"\nTable '{table_choice}' deleted.")
-    except psycopg2.Error as e:
+    except database.Error as e:
         print(f"An error occurred: {e}")
     go_to_menu()
 
@@ -996,7 +1294,6 @@ def delete_confirmation():
     answer = input('\nAre you sure you want to delete this? (yes/no) \n')
     while True:
         if answer.lower() in ['yes', 'y']:
-            database_link.commit()
             break
         elif answer.lower() in ['no', 'n']:
             print('\nOperation cancelled, going to main menu...')
@@ -1005,7 +1302,7 @@ def delete_confirmation():
         else:
             print('Enter a valid option...')
             wait_and_clear()
-            delete_confirmation()
+            return delete_confirmation()
 
 #Functions that work with tables created by us
 def add_info_to_special_tables():
@@ -1043,10 +1340,9 @@ def add_info_to_special_tables():
         return
 
 def get_special_tables():
-    interact_with_database.execute("SELECT table_name FROM information_schema.tables WHERE table_schema='public';")
-    tables = interact_with_database.fetchall()
+    tables = schema_catalog.get_tables()
 
-    tables = [table[0] for table in tables if table[0] not in ['Crimes', 'Evidence', 'Officers', 'Suspects', 'sqlite_sequence']]
+    tables = [table for table in tables if table not in ['Crimes', 'Evidence', 'Officers', 'Suspects', 'sqlite_sequence']]
     
     return tables
 
@@ -1054,13 +1350,11 @@ def add_info_to_table(table_name):
     os.system('clear')
     print(f"Adding Information to {table_name}\n_________________________")
 
-    # Fetch column names for the selected table
-    interact_with_database.execute(f"SELECT column_name FROM information_schema.columns WHERE table_name = '{table_name}';")
-    columns = interact_with_database.fetchall()
+    # Column names for the selected table
+    columns = schema_catalog.get_column_names(table_name)
 
     new_record = {}
-    for column in columns:
-        column_name = column[0]
+    for column_name in columns:
         user_input = input(f"Enter information for column '{column_name}': ").strip()
         new_record[column_name] = user_input
 
@@ -1069,12 +1363,11 @@ def add_info_to_table(table_name):
     values_str = ', '.join(f"%({key})s" for key in new_record.keys())
 
     try:
-        interact_with_database.execute(f'INSERT INTO "{table_name}" ({columns_str}) VALUES ({values_str})', new_record)
-        # Commit the transaction to make the changes persistent
-        interact_with_database.connection.commit()
+        # Commit the transaction to make the changes persistent, the pool rolls it back in case of error
+        with database.get_cursor(commit=True) as cursor:
+            cursor.execute(f'INSERT INTO "{table_name}" ({columns_str}) VALUES ({values_str})', new_record)
         print(f'Information added to {table_name} successfully.')
     except Exception as e:
-        interact_with_database.connection.rollback()  # Rollback in case of error
         print(f'An error occurred: {e}')
     
     time.sleep(2)
@@ -1113,8 +1406,9 @@ def manage_table(table_name):
     print(f'Manage Table: {table_name}\n_________________________')
 
     # Display all rows from the selected table
-    interact_with_database.execute(f'SELECT * FROM "{table_name}"')
-    rows = interact_with_database.fetchall()
+    with database.get_cursor() as cursor:
+        cursor.execute(f'SELECT * FROM "{table_name}"')
+        rows = cursor.fetchall()
 
     if not rows:
         print(f'No records found in {table_name}. Returning to menu...')
@@ -1147,23 +1441,14 @@ def delete_row_from_table(table_name, row):
     os.system('clear')
     print(f'Deleting row from {table_name}\n_________________________')
 
-    # Assuming the first column is the primary key
     try:
-        # Execute the query to get the primary key column name
-        interact_with_database.execute(f"SELECT column_name FROM information_schema.columns WHERE table_name = '{table_name}' ORDER BY ordinal_position LIMIT 1;")
-        primary_key_column = interact_with_database.fetchone()[0]
-
-        primary_key = row[0]
-
-        # Delete the row based on the primary key
-        interact_with_database.execute(f'DELETE FROM "{table_name}" WHERE {primary_key_column} = %s', (primary_key,))
-        
-        # Commit the transaction to save changes
-        interact_with_database.connection.commit()
+        # Commit the transaction to save changes, the pool rolls it back in case of error
+        with database.get_cursor(commit=True) as cursor:
+            # Delete the row based on the primary key, wherever that column is in the table
+            crime_data.delete_row(cursor, table_name, row)
 
         print(f'Row deleted successfully from {table_name}.')
     except Exception as e:
-        interact_with_database.connection.rollback()  # Rollback in case of error
         print(f'An error occurred: {e}')
     
     time.sleep(2)
@@ -1172,4 +1457,5 @@ def delete_row_from_table(table_name, row):
 if __name__ == '__main__':
     MyApp().run()                                                # The program starts here
 
-database_link.close()
\ No newline at end of file
+schema_catalog.stop_listening()
+database.close_pool()
\ No newline at end of file
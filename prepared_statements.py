@@ -0,0 +1,87 @@
+# Registry of the queries we run over and over, PREPAREd once per pooled connection and then run with EXECUTE
+# so the server parses and plans them only once. The SQL is written like any other psycopg2 query (%s or %(name)s)
+# and turned into $1, $2, ... here. Each connection remembers which statements it has prepared, together with
+# its backend pid (a reconnected or replaced connection starts with nothing prepared) and the schema catalog
+# generation (after a schema change everything is deallocated and prepared again on first use).
+import re
+import threading
+import weakref
+
+import database
+import schema_catalog
+
+
+PLACEHOLDER = re.compile(r'%%|%s|%\((\w+)\)s')
+
+statements = {}                                             # name -> SQL, or a function returning the SQL (built from the catalog)
+converted = {}                                              # name -> (catalog generation, SQL with $n, parameter names or count)
+prepared = weakref.WeakKeyDictionary()                      # connection -> (backend pid, catalog generation, names prepared on it)
+registry_lock = threading.Lock()
+
+def register(name, sql):                                    # name is used in PREPARE/EXECUTE, so only letters, digits and _
+    statements[name] = sql
+    converted.pop(name, None)
+
+def convert(name, generation):                              # %s / %(name)s -> $1, $2, ... (a named parameter used twice stays one $n)
+    cached = converted.get(name)
+    if cached is not None and cached[0] == generation:
+        return cached[1], cached[2]
+
+    sql = statements[name]
+    sql = sql() if callable(sql) else sql
+    names = []
+    positional = 0
+
+    def replace(match):
+        nonlocal positional
+        if match.group(0) == '%%':
+            return '%'
+        if match.group(1) is None:
+            positional += 1
+            return f'${positional}'
+        if match.group(1) not in names:
+            names.append(match.group(1))
+        return f'${names.index(match.group(1)) + 1}'
+
+    prepared_sql = PLACEHOLDER.sub(replace, sql)
+    parameters = names if names else positional
+    converted[name] = (generation, prepared_sql, parameters)
+    return prepared_sql, parameters
+
+def execute(cursor, name, params=()):                       # Like cursor.execute(sql, params), results are read from the cursor as usual
+    if database.BACKEND == 'sqlite':                        # sqlite3 keeps compiled statements in its own cache
+        sql = statements[name]
+        cursor.execute(sql() if callable(sql) else sql, params)
+        return
+    connection = cursor.connection
+    generation = schema_catalog.generation
+    backend_pid = connection.get_backend_pid()              # answered by libpq, no round trip
+
+    with registry_lock:
+        state = prepared.get(connection)
+        if state is None or state[0] != backend_pid or state[1] != generation:
+            stale = state is not None and state[0] == backend_pid  # same session, but the schema changed
+            state = (backend_pid, generation, set())
+            prepared[connection] = state
+        else:
+            stale = False
+        prepared_sql, parameters = convert(name, generation)
+
+    if stale:
+        cursor.execute('DEALLOCATE ALL')
+    if name not in state[2]:
+        cursor.execute(f'PREPARE {name} AS {prepared_sql}')
+        state[2].add(name)                                  # PREPARE is not undone by a rollback
+
+    if isinstance(parameters, list):                        # %(name)s parameters come as a dict
+        values = [params[parameter] for parameter in parameters]
+    else:
+        values = list(params)
+    cursor.report_as = prepared_sql                         # query_stats shows the registered query instead of "EXECUTE name"
+    try:
+        if values:
+            cursor.execute(f'EXECUTE {name} ({", ".join(["%s"] * len(values))})', values)
+        else:
+            cursor.execute(f'EXECUTE {name}')
+    finally:
+        cursor.report_as = None
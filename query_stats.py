@@ -0,0 +1,126 @@
+# Per-query statistics: every statement run through a pooled connection is recorded here (database.py installs the
+# hook on the PostgreSQL cursors, sqlite_backend.py calls it from its own cursor). Queries are grouped by their
+# fingerprint (the SQL with literals replaced by ? and lists of placeholders shortened to one), each group keeps
+# call count, total/max time, rows, a latency histogram and which menu functions ran it. Queries slower than
+# SLOW_QUERY_MS are also appended to the slow-query log. Queries whose rows are read later (server-side cursors,
+# SELECTs on SQLite) are recorded when the cursor is done with them, with the time spent fetching included.
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+
+
+SLOW_QUERY_MS = float(os.environ.get('CRIME_SLOW_QUERY_MS', '200'))  # Queries taking longer go to the slow-query log, 0 = off
+SLOW_QUERY_LOG = os.environ.get('CRIME_SLOW_QUERY_LOG', os.path.join(os.path.dirname(__file__), 'slow_queries.log'))
+TOP_QUERIES = int(os.environ.get('CRIME_TOP_QUERIES', '15'))  # Queries shown in "Performance stats"
+HISTOGRAM_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))  # upper bounds in ms
+
+# frames in these files are skipped when looking for the function that ran a query
+PLUMBING_FILES = {'database.py', 'sqlite_backend.py', 'query_stats.py', 'prepared_statements.py', 'contextlib.py', 'db_worker.py'}
+COMPREHENSIONS = {'<listcomp>', '<dictcomp>', '<setcomp>', '<genexpr>'}  # reported as the function they are written in
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s)(?:\s*,\s*(?:\?|%s|%\(\w+\)s))*\s*\)(?:\s*,\s*\(\s*(?:\?|%s|%\(\w+\)s)(?:\s*,\s*(?:\?|%s|%\(\w+\)s))*\s*\))*')
+WHITESPACE = re.compile(r'\s+')
+
+stats = {}                                                  # fingerprint -> QueryStats
+stats_lock = threading.Lock()
+slow_log_lock = threading.Lock()
+
+class QueryStats:
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.params = 0                                     # parameter count of the last call
+        self.histogram = [0] * len(HISTOGRAM_BUCKETS)
+        self.callers = Counter()
+
+    def add(self, milliseconds, rows, params, caller):
+        self.calls += 1
+        self.total_ms += milliseconds
+        self.max_ms = max(self.max_ms, milliseconds)
+        if rows is None:
+            self.errors += 1
+        elif rows > 0:
+            self.rows += rows
+        self.params = params
+        for index, bound in enumerate(HISTOGRAM_BUCKETS):
+            if milliseconds <= bound:
+                self.histogram[index] += 1
+                break
+        self.callers[caller] += 1
+
+    def percentile(self, fraction):                         # upper bound of the bucket the percentile falls in
+        wanted = fraction * self.calls
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BUCKETS, self.histogram):
+            seen += count
+            if seen >= wanted:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql):                                       # 'WHERE CrimeID IN (%s, %s, %s)' and 'WHERE CrimeID IN (%s)' give the same fingerprint
+    sql = sql.decode() if isinstance(sql, bytes) else str(sql)
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = PLACEHOLDER_LIST.sub('(...)', sql)
+    return WHITESPACE.sub(' ', sql).strip().rstrip(';')
+
+def parameter_count(params):
+    if params is None:
+        return 0
+    return len(params)
+
+def find_caller():                                          # e.g. 'main.delete_crime', the menu function that ran the query
+    frame = sys._getframe(2)
+    first_outside = None                                    # first function outside the plumbing, used when no menu function is on the stack
+    while frame is not None:
+        file_name = os.path.basename(frame.f_code.co_filename)
+        if file_name not in PLUMBING_FILES and frame.f_code.co_name not in COMPREHENSIONS:
+            name = f'{os.path.splitext(file_name)[0]}.{frame.f_code.co_name}'
+            if frame.f_globals.get('__name__') == '__main__':  # a function of the program that was started (main.py, main_and_gui.py)
+                return name
+            first_outside = first_outside or name
+        frame = frame.f_back
+    return first_outside or 'unknown'
+
+def record(sql, params, rows, seconds):                     # rows = None when the query failed
+    milliseconds = seconds * 1000
+    key = fingerprint(sql)
+    caller = find_caller()
+    with stats_lock:
+        query_stats = stats.get(key)
+        if query_stats is None:
+            query_stats = stats[key] = QueryStats(key)
+        query_stats.add(milliseconds, rows, parameter_count(params), caller)
+    if SLOW_QUERY_MS and milliseconds >= SLOW_QUERY_MS:
+        log_slow_query(key, milliseconds, rows, parameter_count(params), caller)
+
+def log_slow_query(key, milliseconds, rows, params, caller):  # parameter values are left out, they can hold case details
+    line = (f'{time.strftime("%Y-%m-%d %H:%M:%S")} | {milliseconds:.1f} ms | {caller} | '
+            f'rows: {"error" if rows is None else rows} | params: {params} | {key}\n')
+    with slow_log_lock:
+        with open(SLOW_QUERY_LOG, 'a') as log_file:
+            log_file.write(line)
+
+def top_queries(limit=None):                                # The queries with the most total time, slowest first
+    limit = limit or TOP_QUERIES
+    with stats_lock:
+        ordered = sorted(stats.values(), key=lambda query_stats: query_stats.total_ms, reverse=True)
+        return [(query_stats.total_ms, query_stats.calls, query_stats.total_ms / query_stats.calls,
+                 query_stats.percentile(0.95), query_stats.max_ms, query_stats.rows,
+                 query_stats.callers.most_common(1)[0][0], query_stats.fingerprint)
+                for query_stats in ordered[:limit]]
+
+def reset():
+    with stats_lock:
+        stats.clear()
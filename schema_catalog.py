@@ -0,0 +1,115 @@
+# In-process copy of information_schema for the public schema (tables, columns, types and primary keys)
+# It is loaded once and kept until it is invalidated, so the menus can be drawn without asking the database.
+# create_tables/deleting_function invalidate it themselves, schema changes made by other programs can be picked
+# up with install_change_notifications() + listen_for_changes() (a DDL event trigger that sends a NOTIFY).
+import os
+import threading
+
+import psycopg2
+
+import database
+import sqlite_backend
+
+
+NOTIFY_CHANNEL = 'schema_catalog_changed'
+LISTEN_FOR_CHANGES = os.environ.get('CRIME_SCHEMA_NOTIFY') == '1'  # Set to 1 once install_change_notifications() has been run
+
+catalog = None                                              # {table_name: [(column_name, data_type, is_primary_key), ...]}
+catalog_lock = threading.Lock()
+generation = 0                                              # goes up on every invalidate(), prepared_statements uses it to re-prepare
+listener_connection = None
+
+def load_catalog():
+    if database.BACKEND == 'sqlite':                        # no information_schema in SQLite
+        return sqlite_backend.load_catalog()
+    with database.get_cursor() as cursor:
+        cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema='public';")
+        tables = {table[0]: [] for table in cursor.fetchall()}
+
+        # data_type with its length like in SQLite, e.g. 'character varying(255)', table_display caps column widths with it
+        cursor.execute('''
+            SELECT c.table_name, c.column_name, c.data_type || COALESCE('(' || c.character_maximum_length || ')', ''),
+                   pk.column_name IS NOT NULL
+            FROM information_schema.columns c
+            LEFT JOIN (SELECT k.table_name, k.column_name
+                       FROM information_schema.table_constraints tc
+                       JOIN information_schema.key_column_usage k
+                         ON k.constraint_schema = tc.constraint_schema AND k.constraint_name = tc.constraint_name
+                       WHERE tc.table_schema = 'public' AND tc.constraint_type = 'PRIMARY KEY') pk
+              ON pk.table_name = c.table_name AND pk.column_name = c.column_name
+            WHERE c.table_schema = 'public'
+            ORDER BY c.table_name, c.ordinal_position;
+        ''')
+        for table_name, column_name, data_type, is_primary_key in cursor.fetchall():
+            tables.setdefault(table_name, []).append((column_name, data_type, is_primary_key))
+    return tables
+
+def get_catalog():
+    global catalog
+    check_for_changes()
+    with catalog_lock:
+        if catalog is None:
+            catalog = load_catalog()
+        return catalog
+
+def invalidate():                                           # Forget everything, the next lookup loads the catalog again
+    global catalog, generation
+    with catalog_lock:
+        catalog = None
+        generation += 1
+
+def get_tables():                                           # Table names, same as "SELECT table_name FROM information_schema.tables"
+    return list(get_catalog())
+
+def get_columns(table_name):                                # [(column_name, data_type, is_primary_key), ...] in table order
+    return list(get_catalog().get(table_name, []))
+
+def get_column_names(table_name):
+    return [column[0] for column in get_columns(table_name)]
+
+def get_primary_key(table_name):                            # Primary key column, tables without one use their first column
+    columns = get_columns(table_name)
+    for column_name, _, is_primary_key in columns:
+        if is_primary_key:
+            return column_name
+    return columns[0][0] if columns else None
+
+def install_change_notifications():                         # Event trigger that sends a NOTIFY after every CREATE/ALTER/DROP (needs superuser)
+    with database.get_cursor(commit=True) as cursor:
+        cursor.execute(f'''
+            CREATE OR REPLACE FUNCTION notify_schema_catalog_changed() RETURNS event_trigger AS $$
+            BEGIN
+                PERFORM pg_notify('{NOTIFY_CHANNEL}', tg_tag);
+            END;
+            $$ LANGUAGE plpgsql;
+        ''')
+        cursor.execute('DROP EVENT TRIGGER IF EXISTS schema_catalog_changed;')
+        cursor.execute('''CREATE EVENT TRIGGER schema_catalog_changed ON ddl_command_end
+                          EXECUTE PROCEDURE notify_schema_catalog_changed();''')
+        cursor.execute('DROP EVENT TRIGGER IF EXISTS schema_catalog_dropped;')
+        cursor.execute('''CREATE EVENT TRIGGER schema_catalog_dropped ON sql_drop
+                          EXECUTE PROCEDURE notify_schema_catalog_changed();''')
+
+def listen_for_changes():                                   # Keep one extra connection that LISTENs for the event trigger
+    global listener_connection
+    if database.BACKEND == 'sqlite':                        # LISTEN/NOTIFY is PostgreSQL only
+        return
+    if listener_connection is None:
+        listener_connection = psycopg2.connect(**database.DATABASE_SETTINGS)
+        listener_connection.autocommit = True
+        with listener_connection.cursor() as cursor:
+            cursor.execute(f'LISTEN {NOTIFY_CHANNEL};')
+
+def stop_listening():
+    global listener_connection
+    if listener_connection is not None:
+        listener_connection.close()
+        listener_connection = None
+
+def check_for_changes():                                    # poll() only reads what already arrived on the socket, it doesnt send a query
+    if listener_connection is None:
+        return
+    listener_connection.poll()
+    if listener_connection.notifies:
+        listener_connection.notifies.clear()
+        invalidate()
@@ -0,0 +1,208 @@
+# Versioned schema bootstrap for the core tables
+# Every migration runs once, the applied versions are kept in crime_meta.schema_version. Both front ends call
+# migrate() at startup, an existing database is upgraded in place. The SQLite backend has its own, shorter history
+# in sqlite_backend.MIGRATIONS (no schemas, no extensions, the version lives in PRAGMA user_version).
+#
+#   python schema_migrations.py                     apply what is missing and print the schema version
+import database
+import schema_catalog
+import sqlite_backend
+
+
+MIGRATION_LOCK_ID = 7261001                                 # pg_advisory_xact_lock key, only one program migrates at a time
+
+CHILD_TABLES = {'Evidence': 'EvidenceID', 'Officers': 'OfficerID', 'Suspects': 'SuspectID'}  # table -> primary key
+SUMMARY_COUNTERS = {'Evidence': 'EvidenceCount', 'Officers': 'OfficerCount', 'Suspects': 'SuspectCount'}  # table -> its column in crime_summary
+
+def create_core_tables(cursor):
+    cursor.execute('''CREATE TABLE IF NOT EXISTS "Crimes" (
+        CrimeID SERIAL PRIMARY KEY,
+        Type VARCHAR(255),
+        Date VARCHAR(255),
+        Location VARCHAR(255)
+    );''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS "Evidence" (
+        EvidenceID SERIAL PRIMARY KEY,
+        Type VARCHAR(255),
+        Description TEXT,
+        CrimeID INT
+    );''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS "Officers" (
+        OfficerID SERIAL PRIMARY KEY,
+        Name VARCHAR(255),
+        Rank VARCHAR(255),
+        Department VARCHAR(255),
+        CrimeID INT
+    );''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS "Suspects" (
+        SuspectID SERIAL PRIMARY KEY,
+        Name VARCHAR(255),
+        Age VARCHAR(255),
+        Description TEXT,
+        CrimeID INT
+    );''')
+
+def ensure_primary_key(cursor, table_name, key_column):    # Tables made by hand might not have one
+    cursor.execute("SELECT 1 FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'", (f'"{table_name}"',))
+    if cursor.fetchone():
+        return
+    cursor.execute('SELECT 1 FROM pg_attribute WHERE attrelid = %s::regclass AND attname = %s AND NOT attisdropped',
+                   (f'"{table_name}"', key_column.lower()))
+    if cursor.fetchone():
+        cursor.execute(f'ALTER TABLE "{table_name}" ADD PRIMARY KEY ({key_column})')
+    else:
+        cursor.execute(f'ALTER TABLE "{table_name}" ADD COLUMN {key_column} SERIAL PRIMARY KEY')
+
+def ensure_crime_foreign_key(cursor, table_name):          # CrimeID -> "Crimes" with ON DELETE CASCADE, plus an index for the lookups
+    cursor.execute('''SELECT conname, confdeltype FROM pg_constraint
+                      WHERE conrelid = %s::regclass AND confrelid = '"Crimes"'::regclass AND contype = 'f' ''', (f'"{table_name}"',))
+    has_cascade = False
+    for constraint_name, delete_action in cursor.fetchall():
+        if delete_action == 'c':
+            has_cascade = True
+        else:                                               # a foreign key without cascade is replaced
+            cursor.execute(f'ALTER TABLE "{table_name}" DROP CONSTRAINT "{constraint_name}"')
+
+    if not has_cascade:
+        # rows of crimes that were deleted with "leave related information" keep their data but lose the link
+        cursor.execute(f'''UPDATE "{table_name}" child SET CrimeID = NULL
+                           WHERE child.CrimeID IS NOT NULL
+                           AND NOT EXISTS (SELECT 1 FROM "Crimes" c WHERE c.CrimeID = child.CrimeID)''')
+        cursor.execute(f'''ALTER TABLE "{table_name}" ADD CONSTRAINT {table_name.lower()}_crimeid_fkey
+                           FOREIGN KEY (CrimeID) REFERENCES "Crimes" (CrimeID) ON DELETE CASCADE''')
+
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS {table_name.lower()}_crimeid_idx ON "{table_name}" (CrimeID)')
+
+def add_keys_and_indexes(cursor):
+    ensure_primary_key(cursor, 'Crimes', 'CrimeID')
+    for table_name, key_column in CHILD_TABLES.items():
+        ensure_primary_key(cursor, table_name, key_column)
+        ensure_crime_foreign_key(cursor, table_name)
+
+def add_search_indexes(cursor):                             # GIN indexes for search.py, the expressions must stay the same as in SEARCH_DOCUMENTS
+    cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS crimes_search_idx ON "Crimes"
+                      USING GIN (to_tsvector('english', COALESCE(Type, '') || ' ' || COALESCE(Location, '')))''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS evidence_search_idx ON "Evidence"
+                      USING GIN (to_tsvector('english', COALESCE(Description, '')))''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS suspects_search_idx ON "Suspects"
+                      USING GIN (to_tsvector('english', COALESCE(Name, '') || ' ' || COALESCE(Description, '')))''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS suspects_name_trgm_idx ON "Suspects" USING GIN (Name gin_trgm_ops)')
+
+def add_crime_summary(cursor):                              # Per-crime record counts kept up to date by triggers, the crime lists read them instead of joining
+    cursor.execute('''CREATE TABLE IF NOT EXISTS crime_meta.crime_summary (
+        CrimeID INT PRIMARY KEY REFERENCES "Crimes" (CrimeID) ON DELETE CASCADE,
+        EvidenceCount INT NOT NULL DEFAULT 0,
+        OfficerCount INT NOT NULL DEFAULT 0,
+        SuspectCount INT NOT NULL DEFAULT 0,
+        LastModified TIMESTAMPTZ NOT NULL DEFAULT now()
+    )''')
+
+    # statement-level triggers with transition tables: a multi-row INSERT or a COPY updates every crime once, not once per row
+    cursor.execute('''CREATE OR REPLACE FUNCTION crime_meta.add_crime_summary() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO crime_meta.crime_summary (CrimeID) SELECT CrimeID FROM new_rows ON CONFLICT (CrimeID) DO NOTHING;
+            ELSE
+                UPDATE crime_meta.crime_summary s SET LastModified = now() FROM new_rows n WHERE s.CrimeID = n.CrimeID;
+            END IF;
+            RETURN NULL;
+        END $$''')
+    cursor.execute('''CREATE OR REPLACE FUNCTION crime_meta.count_crime_records() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN                                               -- TG_ARGV[0] = the counter column of the table
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN           -- an UPDATE is counted as a delete plus an insert, CrimeID might have changed
+                EXECUTE format('UPDATE crime_meta.crime_summary s SET %1$I = s.%1$I - changed.records, LastModified = now()
+                                FROM (SELECT CrimeID, count(*) AS records FROM old_rows GROUP BY CrimeID) changed
+                                WHERE s.CrimeID = changed.CrimeID', TG_ARGV[0]);
+            END IF;
+            IF TG_OP IN ('UPDATE', 'INSERT') THEN
+                EXECUTE format('UPDATE crime_meta.crime_summary s SET %1$I = s.%1$I + changed.records, LastModified = now()
+                                FROM (SELECT CrimeID, count(*) AS records FROM new_rows GROUP BY CrimeID) changed
+                                WHERE s.CrimeID = changed.CrimeID', TG_ARGV[0]);
+            END IF;
+            RETURN NULL;
+        END $$''')
+
+    for operation in ('INSERT', 'UPDATE'):
+        cursor.execute(f'DROP TRIGGER IF EXISTS crimes_summary_{operation.lower()} ON "Crimes"')
+        cursor.execute(f'''CREATE TRIGGER crimes_summary_{operation.lower()} AFTER {operation} ON "Crimes"
+                           REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE PROCEDURE crime_meta.add_crime_summary()''')
+    for table_name, counter in SUMMARY_COUNTERS.items():
+        for operation, transition_tables in (('INSERT', 'NEW TABLE AS new_rows'), ('UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+                                             ('DELETE', 'OLD TABLE AS old_rows')):
+            trigger_name = f'{table_name.lower()}_summary_{operation.lower()}'
+            cursor.execute(f'DROP TRIGGER IF EXISTS {trigger_name} ON "{table_name}"')
+            cursor.execute(f'''CREATE TRIGGER {trigger_name} AFTER {operation} ON "{table_name}"
+                               REFERENCING {transition_tables} FOR EACH STATEMENT
+                               EXECUTE PROCEDURE crime_meta.count_crime_records('{counter}')''')
+
+    # the crimes that are already there, the triggers keep the counts right from now on
+    cursor.execute('''INSERT INTO crime_meta.crime_summary (CrimeID, EvidenceCount, OfficerCount, SuspectCount)
+                      SELECT c.CrimeID,
+                             (SELECT count(*) FROM "Evidence" e WHERE e.CrimeID = c.CrimeID),
+                             (SELECT count(*) FROM "Officers" o WHERE o.CrimeID = c.CrimeID),
+                             (SELECT count(*) FROM "Suspects" s WHERE s.CrimeID = c.CrimeID)
+                      FROM "Crimes" c
+                      ON CONFLICT (CrimeID) DO NOTHING''')
+
+MIGRATIONS = [                                              # (version, description, function) - only ever add to the end of this list
+    (1, 'Create the core tables', create_core_tables),
+    (2, 'Primary keys, ON DELETE CASCADE foreign keys and crimeid indexes', add_keys_and_indexes),
+    (3, 'Full-text and trigram search indexes', add_search_indexes),
+    (4, 'Trigger-maintained per-crime record counts (crime_meta.crime_summary)', add_crime_summary),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def current_version(cursor):
+    cursor.execute("SELECT to_regclass('crime_meta.schema_version')")
+    if cursor.fetchone()[0] is None:
+        return 0
+    cursor.execute('SELECT COALESCE(MAX(version), 0) FROM crime_meta.schema_version')
+    return cursor.fetchone()[0]
+
+def schema_version():
+    if database.BACKEND == 'sqlite':
+        return sqlite_backend.schema_version()
+    with database.get_cursor() as cursor:
+        return current_version(cursor)
+
+def migrate():                                              # Apply the missing migrations, returns the versions that were applied
+    if database.BACKEND == 'sqlite':
+        applied = sqlite_backend.migrate()
+        if applied:
+            schema_catalog.invalidate()
+        return applied
+
+    with database.get_cursor() as cursor:
+        if current_version(cursor) >= LATEST_VERSION:      # the usual case at startup, no locks and no DDL
+            return []
+
+    applied = []
+    with database.get_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', (MIGRATION_LOCK_ID,))
+            cursor.execute('CREATE SCHEMA IF NOT EXISTS crime_meta')
+            cursor.execute('''CREATE TABLE IF NOT EXISTS crime_meta.schema_version (
+                version INT PRIMARY KEY,
+                description TEXT,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )''')
+            version = current_version(cursor)              # another program might have migrated while we waited for the lock
+            for migration_version, description, upgrade in MIGRATIONS:
+                if migration_version > version:
+                    upgrade(cursor)
+                    cursor.execute('INSERT INTO crime_meta.schema_version (version, description) VALUES (%s, %s)',
+                                   (migration_version, description))
+                    applied.append(migration_version)
+        connection.commit()                                 # all of it or nothing
+
+    if applied:
+        schema_catalog.invalidate()
+    return applied
+
+if __name__ == '__main__':
+    for applied_version in migrate():
+        print(f'Applied migration {applied_version}')
+    print(f'Schema version: {schema_version()}')
+    database.close_pool()
@@ -0,0 +1,85 @@
+# Ranked search over crimes (type, location), evidence (description) and suspects (name, description)
+# Words are matched with full-text search (websearch syntax: several words, "exact phrase", -excluded), suspect
+# names also with pg_trgm similarity so typos still find them. Migration 3 in schema_migrations.py creates the GIN
+# indexes on exactly the expressions below, the queries have to keep using the same ones for the indexes to be used.
+# The SQLite backend has neither, there every word has to appear somewhere in the text (LIKE) and shorter texts rank first.
+import os
+
+import database
+import prepared_statements
+import schema_catalog
+from table_display import escape_like
+
+
+SEARCH_LIMIT = int(os.environ.get('CRIME_SEARCH_LIMIT', '25'))  # Results shown per search
+
+SEARCH_DOCUMENTS = {                                        # table -> (text searched, text shown in the results)
+    'Crimes': ("to_tsvector('english', COALESCE(Type, '') || ' ' || COALESCE(Location, ''))",
+               "CONCAT_WS(' at ', Type, Location)"),
+    'Evidence': ("to_tsvector('english', COALESCE(Description, ''))",
+                 "CONCAT_WS(': ', Type, Description)"),
+    'Suspects': ("to_tsvector('english', COALESCE(Name, '') || ' ' || COALESCE(Description, ''))",
+                 "CONCAT_WS(': ', Name, Description)"),
+}
+
+SQLITE_SEARCH_DOCUMENTS = {                                 # same texts for the SQLite backend, without to_tsvector and CONCAT_WS
+    'Crimes': ("COALESCE(Type, '') || ' ' || COALESCE(Location, '')", "COALESCE(Type, '') || ' at ' || COALESCE(Location, '')"),
+    'Evidence': ("COALESCE(Description, '')", "COALESCE(Type, '') || ': ' || COALESCE(Description, '')"),
+    'Suspects': ("COALESCE(Name, '') || ' ' || COALESCE(Description, '')", "COALESCE(Name, '') || ': ' || COALESCE(Description, '')"),
+}
+
+def search_query():
+    parts = []
+    for table_name, (document, summary) in SEARCH_DOCUMENTS.items():
+        key_column = schema_catalog.get_primary_key(table_name)
+        parts.append(f'''(SELECT '{table_name}' AS source, {key_column} AS record_id, CrimeID, {summary} AS summary,
+                                 ts_rank({document}, query) AS rank, FALSE AS fuzzy
+                          FROM "{table_name}", websearch_to_tsquery('english', %(text)s) query
+                          WHERE {document} @@ query
+                          ORDER BY rank DESC LIMIT %(limit)s)''')
+
+    suspect_key = schema_catalog.get_primary_key('Suspects')
+    parts.append(f'''(SELECT 'Suspects' AS source, {suspect_key} AS record_id, CrimeID, CONCAT_WS(': ', Name, Description) AS summary,
+                             similarity(Name, %(text)s) AS rank, TRUE AS fuzzy
+                      FROM "Suspects"
+                      WHERE Name %% %(text)s
+                      ORDER BY rank DESC LIMIT %(limit)s)''')  # %% = the pg_trgm similarity operator
+
+    # ts_rank has no upper bound and is mostly below 0.1, similarity() goes from 0.3 to 1. The full-text ranks are
+    # divided by the best full-text rank of this search so both are between 0 and 1 before they are compared.
+    # A suspect found by both searches is shown once, with the better rank.
+    return f'''SELECT source, record_id, MAX(CrimeID), MAX(summary), MAX(score) AS rank
+               FROM (SELECT source, record_id, CrimeID, summary,
+                            CASE WHEN fuzzy THEN rank
+                                 ELSE COALESCE(rank / NULLIF(MAX(rank) FILTER (WHERE NOT fuzzy) OVER (), 0), 0) END AS score
+                     FROM ({" UNION ALL ".join(parts)}) results) scored
+               GROUP BY source, record_id
+               ORDER BY rank DESC LIMIT %(limit)s'''
+
+prepared_statements.register('search', search_query)     # built from the catalog, so it is built again after a schema change
+
+def search_like(cursor, text, limit):                               # SQLite: rank = share of the text taken up by the search words
+    words = text.split()
+    parts, params = [], []
+    for table_name, (document, summary) in SQLITE_SEARCH_DOCUMENTS.items():
+        key_column = schema_catalog.get_primary_key(table_name)
+        conditions = ' AND '.join([f'{document} ILIKE %s'] * len(words))
+        parts.append(f'''SELECT '{table_name}' AS source, {key_column} AS record_id, CrimeID, {summary} AS summary,
+                                CAST(%s AS REAL) / MAX(length({document}), 1) AS rank
+                         FROM "{table_name}" WHERE {conditions}''')
+        params += [len(''.join(words))] + [f'%{escape_like(word)}%' for word in words]
+    cursor.execute(f'{" UNION ALL ".join(parts)} ORDER BY rank DESC LIMIT %s', params + [limit])
+    return cursor.fetchall()
+
+def run_search(cursor, text, limit=None):                   # search() on a cursor the caller already has (the GUI worker's, so it can be cancelled)
+    text = text.strip()
+    if not text:
+        return []
+    if database.BACKEND == 'sqlite':
+        return search_like(cursor, text, limit or SEARCH_LIMIT)
+    prepared_statements.execute(cursor, 'search', {'text': text, 'limit': limit or SEARCH_LIMIT})
+    return cursor.fetchall()
+
+def search(text, limit=None):                               # [(table, record id, CrimeID, summary, rank), ...] best first
+    with database.get_cursor() as cursor:
+        return run_search(cursor, text, limit)
@@ -0,0 +1,335 @@
+# SQLite backend: the whole program on a local file instead of a PostgreSQL server (CRIME_DB_BACKEND=sqlite)
+# Connections and cursors behave like the psycopg2 ones the rest of the program uses. The queries are written for
+# psycopg2 and translated here: %s -> ?, %(name)s -> :name, ILIKE -> LIKE (with the backslash escape PostgreSQL
+# uses by default), "= ANY(%s)" with a list -> "IN (SELECT value FROM json_each(?))" and crime_meta.x -> x (SQLite
+# has no schemas, the crime_meta tables are kept out of the catalog instead). The file runs in WAL mode
+# with foreign keys on, connections are kept open and reused like the PostgreSQL pool.
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+import query_stats
+
+
+SQLITE_PATH = os.environ.get('CRIME_SQLITE_PATH', os.path.join(os.path.dirname(__file__), 'crime_investigation.db'))
+IDLE_CONNECTIONS = 4                                        # Connections kept open for the next operation
+
+PRAGMAS = (
+    'PRAGMA journal_mode = WAL',                            # readers and the writer dont block each other
+    'PRAGMA synchronous = NORMAL',                          # safe with WAL, fsync only at checkpoints
+    'PRAGMA foreign_keys = ON',                             # off by default in SQLite, ON DELETE CASCADE needs it
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -65536',                           # 64 MB page cache per connection
+    'PRAGMA mmap_size = 268435456',                         # read the file through 256 MB of memory mapping
+    'PRAGMA busy_timeout = 5000',                           # wait up to 5s for another writer instead of failing
+)
+
+SUMMARY_COUNTERS = {'Evidence': 'EvidenceCount', 'Officers': 'OfficerCount', 'Suspects': 'SuspectCount'}  # table -> its column in crime_summary
+
+def summary_triggers(table_name, counter):                  # No statement-level triggers in SQLite, the counts change row by row
+    touch = f"{counter} = {counter} {{}} 1, LastModified = datetime('now', 'localtime')"
+    return [
+        f'''CREATE TRIGGER IF NOT EXISTS {table_name.lower()}_summary_insert AFTER INSERT ON "{table_name}" BEGIN
+            UPDATE crime_summary SET {touch.format('+')} WHERE CrimeID = NEW.CrimeID;
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS {table_name.lower()}_summary_update AFTER UPDATE ON "{table_name}" BEGIN
+            UPDATE crime_summary SET {touch.format('-')} WHERE CrimeID = OLD.CrimeID;
+            UPDATE crime_summary SET {touch.format('+')} WHERE CrimeID = NEW.CrimeID;
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS {table_name.lower()}_summary_delete AFTER DELETE ON "{table_name}" BEGIN
+            UPDATE crime_summary SET {touch.format('-')} WHERE CrimeID = OLD.CrimeID;
+        END''',
+    ]
+
+MIGRATIONS = [                                              # (version, statements), the version is kept in PRAGMA user_version
+    (1, [
+        '''CREATE TABLE IF NOT EXISTS "Crimes" (
+            CrimeID INTEGER PRIMARY KEY AUTOINCREMENT,       -- AUTOINCREMENT: ids of deleted crimes are never reused (case logs)
+            Type VARCHAR(255),
+            Date VARCHAR(255),
+            Location VARCHAR(255)
+        )''',
+        '''CREATE TABLE IF NOT EXISTS "Evidence" (
+            EvidenceID INTEGER PRIMARY KEY AUTOINCREMENT,
+            Type VARCHAR(255),
+            Description TEXT,
+            CrimeID INTEGER REFERENCES "Crimes" (CrimeID) ON DELETE CASCADE
+        )''',
+        '''CREATE TABLE IF NOT EXISTS "Officers" (
+            OfficerID INTEGER PRIMARY KEY AUTOINCREMENT,
+            Name VARCHAR(255),
+            Rank VARCHAR(255),
+            Department VARCHAR(255),
+            CrimeID INTEGER REFERENCES "Crimes" (CrimeID) ON DELETE CASCADE
+        )''',
+        '''CREATE TABLE IF NOT EXISTS "Suspects" (
+            SuspectID INTEGER PRIMARY KEY AUTOINCREMENT,
+            Name VARCHAR(255),
+            Age VARCHAR(255),
+            Description TEXT,
+            CrimeID INTEGER REFERENCES "Crimes" (CrimeID) ON DELETE CASCADE
+        )''',
+        'CREATE INDEX IF NOT EXISTS evidence_crimeid_idx ON "Evidence" (CrimeID)',
+        'CREATE INDEX IF NOT EXISTS officers_crimeid_idx ON "Officers" (CrimeID)',
+        'CREATE INDEX IF NOT EXISTS suspects_crimeid_idx ON "Suspects" (CrimeID)',
+        'CREATE INDEX IF NOT EXISTS suspects_name_idx ON "Suspects" (Name COLLATE NOCASE)',
+        'CREATE INDEX IF NOT EXISTS crimes_type_idx ON "Crimes" (Type COLLATE NOCASE)',
+    ]),
+    (2, [                                                   # crime_summary like PostgreSQL migration 4, with row-level triggers
+        '''CREATE TABLE IF NOT EXISTS crime_summary (
+            CrimeID INTEGER PRIMARY KEY REFERENCES "Crimes" (CrimeID) ON DELETE CASCADE,
+            EvidenceCount INTEGER NOT NULL DEFAULT 0,
+            OfficerCount INTEGER NOT NULL DEFAULT 0,
+            SuspectCount INTEGER NOT NULL DEFAULT 0,
+            LastModified TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+        )''',
+        '''CREATE TRIGGER IF NOT EXISTS crimes_summary_insert AFTER INSERT ON "Crimes" BEGIN
+            INSERT OR IGNORE INTO crime_summary (CrimeID) VALUES (NEW.CrimeID);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS crimes_summary_update AFTER UPDATE ON "Crimes" BEGIN
+            UPDATE crime_summary SET LastModified = datetime('now', 'localtime') WHERE CrimeID = NEW.CrimeID;
+        END''',
+    ] + [statement for table_name, counter in SUMMARY_COUNTERS.items() for statement in summary_triggers(table_name, counter)] + [
+        '''INSERT OR IGNORE INTO crime_summary (CrimeID, EvidenceCount, OfficerCount, SuspectCount)
+           SELECT c.CrimeID,
+                  (SELECT count(*) FROM "Evidence" e WHERE e.CrimeID = c.CrimeID),
+                  (SELECT count(*) FROM "Officers" o WHERE o.CrimeID = c.CrimeID),
+                  (SELECT count(*) FROM "Suspects" s WHERE s.CrimeID = c.CrimeID)
+           FROM "Crimes" c''',
+    ]),
+]
+
+INTERNAL_TABLES = ('crime_summary',)                        # crime_meta tables on PostgreSQL, not shown as tables of the program
+
+PLACEHOLDER = re.compile(r'= ANY\(%s\)|ILIKE %s|ILIKE|crime_meta\.|%%|%s|%\((\w+)\)s')
+
+@lru_cache(maxsize=512)
+def translate(sql, has_params):                             # psycopg2 SQL -> SQLite SQL
+    def replace(match):
+        text = match.group(0)
+        if text == '= ANY(%s)':
+            return 'IN (SELECT value FROM json_each(?))'    # the list arrives as a JSON array, see adapt()
+        if text == 'ILIKE %s':
+            return "LIKE ? ESCAPE '\\'"                    # LIKE is already case insensitive for ASCII in SQLite
+        if text == 'ILIKE':
+            return 'LIKE'
+        if text == 'crime_meta.':
+            return ''
+        if not has_params:                                  # psycopg2 leaves % alone when there are no parameters
+            return text
+        if text == '%%':
+            return '%'
+        if text == '%s':
+            return '?'
+        return f':{match.group(1)}'
+    return PLACEHOLDER.sub(replace, sql)
+
+def adapt(value):
+    if isinstance(value, (list, tuple)):                    # only used with = ANY(%s)
+        return json.dumps(list(value))
+    return value
+
+class SQLiteCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.cursor = connection.raw.cursor()
+        self.itersize = 2000                                # set by database.get_streaming_cursor, SQLite reads row by row anyway
+        self.returned = None                                # rows of an INSERT/UPDATE/DELETE ... RETURNING
+        self.returned_count = -1
+        self.pending = None                                 # [sql, params, rows, seconds] of a SELECT still being read
+
+    def execute(self, sql, params=None):                    # a SELECT runs while its rows are read, it is reported when the cursor is done with it
+        self.report_pending()
+        started = time.perf_counter()
+        rows = None
+        try:
+            self.run(sql, params)
+            rows = self.rowcount
+        finally:
+            seconds = time.perf_counter() - started
+            if rows is not None and self.returned is None and self.cursor.description is not None:
+                self.pending = [sql, params, 0, seconds]
+            else:
+                query_stats.record(sql, params, rows, seconds)
+
+    def run(self, sql, params):
+        self.returned = None
+        if params is None:
+            self.cursor.execute(translate(sql, False))
+        elif isinstance(params, dict):
+            self.cursor.execute(translate(sql, True), {key: adapt(value) for key, value in params.items()})
+        else:
+            self.cursor.execute(translate(sql, True), [adapt(value) for value in params])
+        if 'RETURNING' in sql.upper():                      # SQLite only counts the rows once the statement ran to the end
+            self.returned = self.cursor.fetchall()
+            self.returned_count = len(self.returned)
+
+    def executemany(self, sql, params_list):
+        self.report_pending()
+        started = time.perf_counter()
+        rows = None
+        self.returned = None
+        try:
+            self.cursor.executemany(translate(sql, True), [[adapt(value) for value in params] for params in params_list])
+            rows = self.cursor.rowcount
+        finally:
+            query_stats.record(sql, None, rows, time.perf_counter() - started)
+
+    def timed_fetch(self, fetch, *args):
+        if self.pending is None:
+            return fetch(*args)
+        started = time.perf_counter()
+        try:
+            result = fetch(*args)
+        except Exception:
+            self.pending[2] = None                          # reported as failed
+            raise
+        finally:
+            self.pending[3] += time.perf_counter() - started
+        if self.pending[2] is not None:
+            self.pending[2] += len(result) if isinstance(result, list) else int(result is not None)  # fetchone gives one row or None
+        return result
+
+    def fetchone(self):
+        if self.returned is not None:
+            return self.returned.pop(0) if self.returned else None
+        return self.timed_fetch(self.cursor.fetchone)
+
+    def fetchmany(self, size=None):
+        if self.returned is not None:
+            rows, self.returned = self.returned[:size or 1], self.returned[size or 1:]
+            return rows
+        return self.timed_fetch(self.cursor.fetchmany, size or self.cursor.arraysize)
+
+    def fetchall(self):
+        if self.returned is not None:
+            rows, self.returned = self.returned, []
+            return rows
+        return self.timed_fetch(self.cursor.fetchall)
+
+    def __iter__(self):
+        if self.returned is not None:
+            return iter(self.fetchall())
+        return iter(self.cursor) if self.pending is None else self.timed_rows()
+
+    def timed_rows(self):                                   # read in batches of itersize so the timing doesnt cost a call per row
+        while True:
+            rows = self.timed_fetch(self.cursor.fetchmany, self.itersize)
+            if not rows:
+                return
+            yield from rows
+
+    def report_pending(self):
+        if self.pending is not None:
+            sql, params, rows, seconds = self.pending
+            self.pending = None
+            query_stats.record(sql, params, rows, seconds)
+
+    @property
+    def description(self):
+        return self.cursor.description
+
+    @property
+    def rowcount(self):
+        return self.returned_count if self.returned is not None else self.cursor.rowcount
+
+    def copy_expert(self, sql, file):
+        raise sqlite3.NotSupportedError('COPY needs the PostgreSQL backend')
+
+    def close(self):
+        self.report_pending()
+        self.cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class SQLiteConnection:
+    def __init__(self, path):
+        self.raw = sqlite3.connect(path, check_same_thread=False, cached_statements=256)  # the statement cache does what PREPARE does in PostgreSQL
+        for pragma in PRAGMAS:
+            self.raw.execute(pragma)
+        self.closed = 0
+
+    def cursor(self, name=None):                            # a name asks for a server-side cursor in psycopg2, not needed here
+        return SQLiteCursor(self)
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def cancel(self):                                       # like psycopg2 connection.cancel(), the running statement stops
+        self.raw.interrupt()
+
+    def close(self):
+        self.raw.close()
+        self.closed = 1
+
+    @property
+    def in_transaction(self):
+        return self.raw.in_transaction
+
+idle_connections = []
+connections_lock = threading.Lock()
+
+@contextmanager
+def get_connection():                                       # Borrow a connection, anything not committed is rolled back afterwards
+    with connections_lock:
+        connection = idle_connections.pop() if idle_connections else None
+    if connection is None:
+        connection = SQLiteConnection(SQLITE_PATH)
+    try:
+        yield connection
+    finally:
+        if connection.in_transaction:
+            connection.rollback()
+        with connections_lock:
+            if len(idle_connections) < IDLE_CONNECTIONS:
+                idle_connections.append(connection)
+                connection = None
+        if connection is not None:
+            connection.close()
+
+def close_connections():
+    with connections_lock:
+        while idle_connections:
+            idle_connections.pop().close()
+
+def schema_version():
+    with get_connection() as connection:
+        return connection.raw.execute('PRAGMA user_version').fetchone()[0]
+
+def migrate():                                              # Apply the missing migrations, returns the versions that were applied
+    applied = []
+    with get_connection() as connection:
+        connection.raw.execute('BEGIN IMMEDIATE')          # one program migrates at a time
+        version = connection.raw.execute('PRAGMA user_version').fetchone()[0]
+        for migration_version, statements in MIGRATIONS:
+            if migration_version > version:
+                for statement in statements:
+                    connection.raw.execute(statement)
+                connection.raw.execute(f'PRAGMA user_version = {migration_version}')
+                applied.append(migration_version)
+        connection.commit()
+    return applied
+
+def load_catalog():                                         # Same shape as schema_catalog.load_catalog, from sqlite_master and PRAGMA table_info
+    tables = {}
+    with get_connection() as connection:
+        table_names = connection.raw.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name").fetchall()
+        for (table_name,) in table_names:
+            columns = connection.raw.execute(f'PRAGMA table_info("{table_name}")').fetchall()
+            if table_name in INTERNAL_TABLES:
+                continue
+            tables[table_name] = [(column[1], column[2].lower(), column[5] > 0) for column in columns]
+    return tables
@@ -0,0 +1,223 @@
+import os
+import re
+import sys
+import textwrap
+
+import database
+import schema_catalog
+
+
+PAGE_SIZE = int(os.environ.get('CRIME_DISPLAY_PAGE_SIZE', '50'))  # Rows shown per page when displaying a table
+MAX_CELL_WIDTH = int(os.environ.get('CRIME_DISPLAY_MAX_WIDTH', '40'))  # Longer values are wrapped over several lines (or cut)
+WIDTH_SAMPLE_ROWS = int(os.environ.get('CRIME_DISPLAY_WIDTH_SAMPLE', '1000'))  # Rows looked at to size the text columns
+OVERFLOW = os.environ.get('CRIME_DISPLAY_OVERFLOW', 'wrap')  # wrap or truncate
+
+# widest text a value of these types can print as, they dont need a sample
+TYPE_WIDTHS = {'smallint': 6, 'integer': 11, 'int': 11, 'bigint': 20, 'boolean': 5, 'date': 10,
+               'timestamp without time zone': 26, 'timestamp with time zone': 32}
+
+def has_primary_key(table_name):
+    return any(is_primary_key for _, _, is_primary_key in schema_catalog.get_columns(table_name))
+
+def row_id(table_name):                                     # (expression, placeholder) that tells two rows of the table apart
+    # the primary key, or for tables without one (tables made in "Create tables") the physical row id
+    if has_primary_key(table_name):
+        return f't."{schema_catalog.get_primary_key(table_name)}"', '%s'
+    if database.BACKEND == 'sqlite':
+        return 't.rowid', '%s'
+    return 't.ctid', '%s::tid'
+
+def key_ranges(sort_expression, key_expression, edge, forward, descending, key_placeholder='%s'):
+    # The rows past edge = (sort value, key value) in ORDER BY sort, key with the NULLs of the sort column last, as
+    # [(condition, params), ...] in the order they are read. Each condition is one index range (a row value comparison,
+    # the NULLs are a range of their own) instead of an OR chain that can only be answered by reading the whole table.
+    operator = '>' if forward != descending else '<'       # going back through an ascending sort = going forward through a descending one
+    if edge is None:
+        return [('', [])]
+    sort_value, key_value = edge
+    if sort_value is None:                                  # among the NULLs at the end
+        ranges = [(f'{sort_expression} IS NULL AND {key_expression} {operator} {key_placeholder}', [key_value])]
+        return ranges if forward else ranges + [(f'{sort_expression} IS NOT NULL', [])]
+    ranges = [(f'({sort_expression}, {key_expression}) {operator} (%s, {key_placeholder})', [sort_value, key_value])]
+    return ranges + [(f'{sort_expression} IS NULL', [])] if forward else ranges
+
+def fetch_ranges(cursor_name, query, conditions, params, ranges, size, connection=None):
+    # Run query (with {where} for the WHERE clause and LIMIT %s at the end) for one range after the other until there
+    # are size rows. Returns (rows, column_names). Every range gets a server-side cursor of its own (they can only run
+    # one query), on the given connection or on one from the pool.
+    rows, column_names = [], []
+    for condition, range_params in ranges:
+        where = ' AND '.join(conditions + [condition] if condition else conditions)
+        sql = query.format(where=f'WHERE {where}' if where else '')
+        values = params + range_params + [size - len(rows)]
+        if connection is not None:
+            range_cursor_context = connection.cursor(name=cursor_name)
+        else:
+            range_cursor_context = database.get_streaming_cursor(cursor_name, itersize=size)
+        with range_cursor_context as range_cursor:
+            range_cursor.itersize = size
+            range_cursor.execute(sql, values)
+            rows += range_cursor.fetchall()
+            column_names = [description[0] for description in range_cursor.description]
+        if len(rows) >= size:
+            break
+    return rows, column_names
+
+def fetch_page(table_name, after=None, before=None, page_size=None):  # One page of rows ordered by the primary key (or the first column)
+    # after/before = edge of the page next to this one. The first column of a table without a primary key can repeat
+    # or be NULL, so the row id breaks the ties and no row is skipped at a page boundary.
+    # Returns (rows, column_names, (first edge, last edge)).
+    page_size = page_size or PAGE_SIZE
+    key_expression = f't."{schema_catalog.get_primary_key(table_name)}"'
+    id_expression, id_placeholder = row_id(table_name)
+    forward = before is None
+    direction = 'ASC' if forward else 'DESC'
+
+    edge = after if forward else before
+    if has_primary_key(table_name):                         # unique and never NULL, the key alone is the position
+        ranges = [(f'{key_expression} {">" if forward else "<"} %s', [edge[0]])] if edge is not None else [('', [])]
+        order_by = f'{key_expression} {direction}'
+    else:
+        ranges = key_ranges(key_expression, id_expression, edge, forward, False, id_placeholder)
+        order_by = f'{key_expression} {direction} NULLS {"LAST" if forward else "FIRST"}, {id_expression} {direction}'
+    query = f'SELECT t.*, {id_expression} AS page_row_id FROM "{table_name}" t {{where}} ORDER BY {order_by} LIMIT %s'
+
+    # keyset pagination instead of OFFSET, so page 1000 costs the same as page 1
+    rows, column_names = fetch_ranges('display_table_page', query, [], [], ranges, page_size)
+    column_names = column_names[:-1]
+    if not forward:
+        rows.reverse()                                      # fetched backwards, shown in the normal order
+    key_index = column_names.index(schema_catalog.get_primary_key(table_name))
+    edges = ((rows[0][key_index], rows[0][-1]), (rows[-1][key_index], rows[-1][-1])) if rows else (None, None)
+    return [row[:-1] for row in rows], column_names, edges
+
+def escape_like(text):                                      # a filter is matched literally, % and _ are not wildcards
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def fetch_window(table_name, sort_column=None, descending=False, filter_text='', after=None, before=None, size=None, connection=None):
+    # Rows sorted by any column (the primary key breaks ties), optionally only the rows containing filter_text.
+    # after/before = (sort value, key value) of the row right next to the window, like fetch_page but for any order.
+    # NULLs always come last. Returns (rows, column_names, key_column). A connection can be passed in (the GUI gives the
+    # one of its worker, so cancelling the request stops the query on the server), otherwise one from the pool is used.
+    size = size or PAGE_SIZE
+    key_column = schema_catalog.get_primary_key(table_name)
+    sort_column = sort_column or key_column
+    forward = before is None
+    direction = 'ASC' if forward != descending else 'DESC'
+
+    conditions, params = [], []
+    if filter_text:
+        row_text = " || ' ' || ".join(f'COALESCE(CAST(t."{column}" AS text), \'\')' for column in schema_catalog.get_column_names(table_name))
+        conditions.append(f'{row_text} ILIKE %s')          # every column as one text, so the filter looks at all of them
+        params.append(f'%{escape_like(filter_text)}%')
+
+    edge = after if forward else before
+    if sort_column == key_column and has_primary_key(table_name) and edge is not None:  # never NULL, one plain range
+        ranges = [(f't."{key_column}" {">" if forward != descending else "<"} %s', [edge[1]])]
+    else:
+        ranges = key_ranges(f't."{sort_column}"', f't."{key_column}"', edge, forward, descending)
+
+    query = f'''SELECT t.* FROM "{table_name}" t {{where}}
+                ORDER BY t."{sort_column}" {direction} NULLS {"LAST" if forward else "FIRST"}, t."{key_column}" {direction}
+                LIMIT %s'''
+    rows, column_names = fetch_ranges('display_table_window', query, conditions, params, ranges, size, connection)
+    if not forward:
+        rows.reverse()                                      # fetched backwards, shown in the normal order
+    return rows, column_names, key_column
+
+def type_width(data_type):                                  # None for text types, their width depends on the values
+    data_type = data_type.lower()
+    if data_type in TYPE_WIDTHS:
+        return TYPE_WIDTHS[data_type]
+    if data_type.startswith('int'):                         # SQLite: INTEGER, INT
+        return TYPE_WIDTHS['integer']
+    return None
+
+def column_widths(table_name):                              # Widths from the column types, text columns from the first WIDTH_SAMPLE_ROWS rows
+    columns = schema_catalog.get_columns(table_name)
+    if not columns:
+        return []
+    # the longest values are measured by the database, only one row comes back whatever the table size
+    lengths = ', '.join(f'MAX(LENGTH(CAST(sample."{column_name}" AS text)))' for column_name, _, _ in columns)
+    with database.get_cursor() as cursor:
+        cursor.execute(f'SELECT {lengths} FROM (SELECT * FROM "{table_name}" LIMIT %s) AS sample', (WIDTH_SAMPLE_ROWS,))
+        longest_values = cursor.fetchone()
+
+    widths = []
+    for (column_name, data_type, _), longest in zip(columns, longest_values):
+        width = type_width(data_type)
+        if width is None:
+            width = longest or 0
+            declared = re.search(r'\((\d+)\)', data_type)  # 'character varying(255)' / SQLite 'varchar(255)': never more than 255
+            if declared:
+                width = min(width, int(declared.group(1)))
+        widths.append(max(len(column_name), min(width, MAX_CELL_WIDTH)))
+    return widths
+
+def format_row(values, widths, overflow=None):              # One row -> its lines of text, values longer than their column are wrapped or cut
+    overflow = overflow or OVERFLOW
+    cells = []
+    for value, width in zip(values, widths):
+        text = '' if value is None else ' '.join(str(value).split())  # line breaks inside a value would break the table
+        if len(text) <= width:
+            cells.append([text])
+        elif overflow == 'truncate':
+            cells.append([text[:width - 1] + '~'])
+        else:
+            cells.append(textwrap.wrap(text, width) or [''])
+    return ['  '.join((cell[line] if line < len(cell) else '').ljust(width) for cell, width in zip(cells, widths)).rstrip()
+            for line in range(max(map(len, cells), default=1))]
+
+def print_header(column_names, widths, output=None):
+    output = output or sys.stdout
+    output.write('  '.join(column_name[:width].ljust(width) for column_name, width in zip(column_names, widths)).rstrip() + '\n')
+    output.write('-' * (sum(widths) + 2 * (len(widths) - 1)) + '\n')
+
+def print_rows(column_names, rows, widths=None):            # Print one page as a table
+    # Without widths they come from the rows on this page
+    widths = widths or [min(max(len(str(value)) for value in column), MAX_CELL_WIDTH) for column in zip(*([column_names] + rows))]
+    print_header(column_names, widths)
+    for row in rows:
+        for line in format_row(row, widths):
+            print(line)
+
+def print_table(table_name, output=None, overflow=None):   # Stream a whole table as text, only PAGE_SIZE rows are in memory at a time
+    output = output or sys.stdout
+    widths = column_widths(table_name)
+    print_header(schema_catalog.get_column_names(table_name), widths, output)
+    key_column = schema_catalog.get_primary_key(table_name)
+    with database.get_streaming_cursor('print_table', itersize=PAGE_SIZE) as cursor:
+        cursor.execute(f'SELECT * FROM "{table_name}" ORDER BY "{key_column}"')
+        for row in cursor:
+            output.write('\n'.join(format_row(row, widths, overflow)) + '\n')
+
+def display_table_pages(table_name, page_size=None):       # Show a table page by page, the user moves with next/previous
+    page_size = page_size or PAGE_SIZE
+    rows, column_names, edges = fetch_page(table_name, page_size=page_size)
+    widths = column_widths(table_name)                      # the same for every page, so the columns dont jump around
+    page_number = 1
+
+    while True:
+        os.system('clear')
+        print(f'All {table_name} (page {page_number})')
+        print('_________________________')
+
+        if rows:
+            print_rows(column_names, rows, widths)
+        else:
+            print('No records found.')
+
+        choice = input('\n[n]ext page, [p]revious page or press Enter to continue ').strip().lower()
+
+        if choice in ['n', 'next']:
+            if len(rows) == page_size:                      # a shorter page means we are already on the last one
+                next_rows, _, next_edges = fetch_page(table_name, after=edges[1], page_size=page_size)
+                if next_rows:
+                    rows, edges = next_rows, next_edges
+                    page_number += 1
+        elif choice in ['p', 'previous']:
+            if page_number > 1:
+                rows, _, edges = fetch_page(table_name, before=edges[0], page_size=page_size)
+                page_number -= 1
+        elif choice == '':
+            return
@@ -0,0 +1,2 @@
+# database.py picks the backend when it is imported, so the SQLite settings are made before any test module loads
+import sqlite_database
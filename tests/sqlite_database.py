@@ -0,0 +1,32 @@
+# Imported first by the tests that need a database: the program runs on the SQLite backend with a throwaway file
+import os
+import shutil
+import tempfile
+
+directory = tempfile.mkdtemp(prefix='crime_tests_')
+os.environ['CRIME_DB_BACKEND'] = 'sqlite'
+os.environ['CRIME_SQLITE_PATH'] = os.path.join(directory, 'crime_investigation.db')
+
+import database
+import query_stats
+import schema_catalog
+import sqlite_backend
+
+
+def reset():                                                # Empty database with the program's tables, call it in setUp
+    database.close_pool()
+    os.makedirs(directory, exist_ok=True)
+    for file_name in os.listdir(directory):
+        os.remove(os.path.join(directory, file_name))
+    sqlite_backend.migrate()
+    schema_catalog.invalidate()
+    query_stats.reset()
+
+def execute(sql, params=None):                              # One committed statement, returns its rows
+    with database.get_cursor(commit=True) as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall() if cursor.description else []
+
+def remove():
+    database.close_pool()
+    shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,35 @@
+import os
+import tempfile
+import unittest
+
+import sqlite_database
+import bulk_import
+import crime_data
+
+
+class DuplicateRefTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_second_crime_with_the_same_ref_is_dropped(self):
+        rows = [['A-1', 'Theft', '2024-01-01', 'Main St'], ['', 'Arson', '2024-01-02', 'High St'],
+                ['A-1', 'Theft again', '2024-01-03', 'Main St'], [None, 'Fraud', '2024-01-04', 'Bank'],
+                ['', 'Burglary', '2024-01-05', 'Park'], ['A-2', 'Assault', '2024-01-06', 'Bar']]
+        self.assertEqual([row[1] for row in bulk_import.drop_duplicate_refs(rows)],
+                         ['Theft', 'Arson', 'Fraud', 'Burglary', 'Assault'])  # crimes without a ref are all kept
+
+    def test_duplicates_within_a_chunk_from_a_file(self):
+        path = os.path.join(self.directory.name, 'crimes.csv')
+        with open(path, 'w', newline='') as crimes_file:
+            crimes_file.write('crime_ref,Type,Date,Location\nR1,Theft,2024-01-01,Main St\nR2,Arson,2024-01-02,High St\n'
+                              'R1,Theft,2024-01-01,Main St\nR1,Theft,2024-01-01,Main St\n')
+        columns = ('crime_ref',) + crime_data.CRIME_COLUMNS
+        chunks = list(bulk_import.read_chunks(path, columns, chunk_size=3))
+        self.assertEqual([len(bulk_import.drop_duplicate_refs(chunk)) for chunk in chunks], [2, 1])  # the last R1 is in the next chunk
+
+
+if __name__ == '__main__':
+    unittest.main()
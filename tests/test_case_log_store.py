@@ -0,0 +1,69 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from case_log_store import CaseLogStore
+
+
+class CaseLogStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        store = CaseLogStore(self.path)
+        store.append([(1, 1000.0, 'New crime added: Burglary'),
+                      (2, 1001.0, 'line one\nline two\twith a tab and a \\ backslash'),
+                      (None, 1002.0, 'logged without a case'),
+                      (1, 1003.0, 'Evidence added')])
+
+        self.assertEqual(store.read_case(1), [(1000.0, 'New crime added: Burglary'), (1003.0, 'Evidence added')])
+        self.assertEqual(store.read_case(2), [(1001.0, 'line one\nline two\twith a tab and a \\ backslash')])
+        self.assertEqual(store.read_case(None), [(1002.0, 'logged without a case')])
+        self.assertEqual(store.read_case(3), [])
+
+        reopened = CaseLogStore(self.path)                  # everything comes back from the files
+        self.assertEqual(reopened.read_case(1), store.read_case(1))
+        self.assertEqual([entry[:2] for entry in reopened.scan()], [(1000.0, 1), (1001.0, 2), (1002.0, None), (1003.0, 1)])
+
+    def test_segment_rollover(self):
+        store = CaseLogStore(self.path, segment_size=200)
+        for batch in range(10):
+            store.append([(case_id, batch * 10.0 + case_id, f'entry {batch} of case {case_id}') for case_id in (3, 1, 2)])
+
+        segments = store.segments()
+        self.assertGreater(len(segments), 3)
+        for segment in segments[:-1]:                       # every segment but the newest has a sorted index
+            self.assertTrue(os.path.exists(store.segment_path(segment, 'sorted')))
+            self.assertFalse(os.path.exists(store.segment_path(segment, 'idx')))
+        self.assertFalse(os.path.exists(store.segment_path(segments[-1], 'sorted')))
+
+        for reader in (store, CaseLogStore(self.path, segment_size=200)):
+            for case_id in (1, 2, 3):
+                self.assertEqual(reader.read_case(case_id),
+                                 [(batch * 10.0 + case_id, f'entry {batch} of case {case_id}') for batch in range(10)])
+            self.assertEqual([entry[0] for entry in reader.scan(start=40.0, end=59.0)], [43.0, 41.0, 42.0, 53.0, 51.0, 52.0])  # in the order they were written
+
+    def test_entries_are_found_while_another_store_writes(self):
+        writer = CaseLogStore(self.path, segment_size=100)
+        reader = CaseLogStore(self.path, segment_size=100)
+        writer.append([(7, 1.0, 'first')])
+        self.assertEqual(reader.read_case(7), [(1.0, 'first')])
+        for number in range(2, 8):                          # the reader's open segment gets sealed meanwhile
+            writer.append([(7, float(number), 'x' * 60)])
+        self.assertEqual([entry[0] for entry in reader.read_case(7)], [float(number) for number in range(1, 8)])
+
+    def test_torn_index_record_is_ignored(self):
+        store = CaseLogStore(self.path)
+        store.append([(1, 1.0, 'complete')])
+        with open(store.segment_path(1, 'idx'), 'ab') as index_file:  # a record that is still being written
+            index_file.write(struct.pack('<q', 1))
+        self.assertEqual(CaseLogStore(self.path).read_case(1), [(1.0, 'complete')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+import sqlite_database
+import crime_data
+import database
+import schema_catalog
+
+
+class DeleteRowTest(unittest.TestCase):
+    def setUp(self):
+        sqlite_database.reset()
+        sqlite_database.execute('CREATE TABLE "Notes" (Body TEXT, NoteID INTEGER PRIMARY KEY)')  # the key is not the first column
+        for note_id, body in ((10, 'first'), (20, 'second'), (30, 'third')):
+            sqlite_database.execute('INSERT INTO "Notes" (Body, NoteID) VALUES (%s, %s)', (body, note_id))
+        schema_catalog.invalidate()
+
+    def test_delete_uses_the_primary_key_column(self):
+        row = sqlite_database.execute('SELECT * FROM "Notes" WHERE NoteID = 20')[0]
+        with database.get_cursor(commit=True) as cursor:
+            self.assertEqual(crime_data.delete_row(cursor, 'Notes', row), 1)
+        self.assertEqual(sqlite_database.execute('SELECT NoteID FROM "Notes" ORDER BY NoteID'), [(10,), (30,)])
+
+    def test_delete_crime_row(self):
+        with database.get_cursor(commit=True) as cursor:
+            first = crime_data.add_crime(cursor, 'Burglary', '2024-01-01', 'Main St')
+            second = crime_data.add_crime(cursor, 'Theft', '2024-01-02', 'High St')
+        row = sqlite_database.execute('SELECT * FROM "Crimes" WHERE CrimeID = %s', (second,))[0]
+        with database.get_cursor(commit=True) as cursor:
+            crime_data.delete_row(cursor, 'Crimes', row)
+        self.assertEqual(sqlite_database.execute('SELECT CrimeID FROM "Crimes"'), [(first,)])
+
+
+def tearDownModule():
+    sqlite_database.remove()
+
+
+if __name__ == '__main__':
+    unittest.main()
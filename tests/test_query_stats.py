@@ -0,0 +1,50 @@
+import io
+import unittest
+
+import sqlite_database
+import crime_data
+import database
+import query_stats
+import table_display
+
+
+class QueryStatsTest(unittest.TestCase):
+    def setUp(self):
+        sqlite_database.reset()
+        with database.get_cursor(commit=True) as cursor:
+            for number in range(7):
+                crime_data.add_crime(cursor, f'Type {number}', '2024-01-01', 'Main St')
+
+    def recorded(self):                                     # fingerprint -> (calls, rows)
+        return {query[-1]: (query[1], query[5]) for query in query_stats.top_queries(limit=100)}
+
+    def test_streamed_rows_are_counted(self):
+        query_stats.reset()
+        table_display.print_table('Crimes', output=io.StringIO())
+        self.assertEqual(self.recorded()['SELECT * FROM "Crimes" ORDER BY "CrimeID"'], (1, 7))
+
+    def test_rows_of_a_cursor_that_runs_again_are_counted(self):
+        query_stats.reset()
+        with database.get_cursor() as cursor:
+            cursor.execute('SELECT CrimeID FROM "Crimes" WHERE CrimeID <= %s', (3,))
+            cursor.fetchone()
+            cursor.fetchall()
+            cursor.execute('SELECT CrimeID FROM "Crimes"')
+            self.assertEqual(len(list(cursor)), 7)
+        recorded = self.recorded()
+        self.assertEqual(recorded['SELECT CrimeID FROM "Crimes" WHERE CrimeID <= %s'], (1, 3))
+        self.assertEqual(recorded['SELECT CrimeID FROM "Crimes"'], (1, 7))
+
+    def test_prepared_statements_are_reported_by_their_query(self):
+        query_stats.reset()
+        with database.get_cursor(commit=True) as cursor:
+            crime_data.add_crime(cursor, 'Arson', '2024-01-02', 'High St')
+        self.assertTrue(any(fingerprint.startswith('INSERT INTO "Crimes"') for fingerprint in self.recorded()))
+
+
+def tearDownModule():
+    sqlite_database.remove()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+
+import sqlite_database
+import query_stats
+import schema_catalog
+import table_display
+
+
+def all_pages(table_name, page_size):                      # every page going forward, then every page going back
+    pages = []
+    rows, _, edges = table_display.fetch_page(table_name, page_size=page_size)
+    while rows:
+        pages.append(rows)
+        rows, _, next_edges = table_display.fetch_page(table_name, after=edges[1], page_size=page_size)
+        edges = next_edges if rows else edges
+    back = [pages[-1]]
+    while True:
+        rows, _, previous_edges = table_display.fetch_page(table_name, before=edges[0], page_size=page_size)
+        if not rows:
+            return pages, back[::-1]
+        back.append(rows)
+        edges = previous_edges
+
+def all_windows(table_name, sort_column, descending, size):  # same for fetch_window
+    windows = []
+    rows, column_names, key_column = table_display.fetch_window(table_name, sort_column, descending, size=size)
+    sort_index, key_index = column_names.index(sort_column), column_names.index(key_column)
+    edge_of = lambda row: (row[sort_index], row[key_index])
+    while rows:
+        windows.append(rows)
+        rows = table_display.fetch_window(table_name, sort_column, descending, after=edge_of(rows[-1]), size=size)[0]
+    back = [windows[-1]]
+    while True:
+        rows = table_display.fetch_window(table_name, sort_column, descending, before=edge_of(back[-1][0]), size=size)[0]
+        if not rows:
+            return windows, back[::-1]
+        back.append(rows)
+
+
+class FetchPageTest(unittest.TestCase):
+    def setUp(self):
+        sqlite_database.reset()
+        sqlite_database.execute('CREATE TABLE "Notes" (Body TEXT, NoteID INTEGER PRIMARY KEY)')  # the key is not the first column
+        for note_id in range(1, 12):
+            sqlite_database.execute('INSERT INTO "Notes" (Body, NoteID) VALUES (%s, %s)', (f'note {12 - note_id}', note_id * 10))
+        sqlite_database.execute('CREATE TABLE "Leads" (Source TEXT, Detail TEXT)')  # no primary key, Source repeats and has NULLs
+        for source, detail in (('b', '1'), (None, '2'), ('a', '3'), ('b', '4'), (None, '5'), ('b', '6'), ('a', '7'), ('c', '8')):
+            sqlite_database.execute('INSERT INTO "Leads" (Source, Detail) VALUES (%s, %s)', (source, detail))
+        schema_catalog.invalidate()
+
+    def test_pages_follow_a_primary_key_that_is_not_the_first_column(self):
+        pages, back = all_pages('Notes', 3)
+        self.assertEqual([[row[1] for row in page] for page in pages],
+                         [[10, 20, 30], [40, 50, 60], [70, 80, 90], [100, 110]])
+        self.assertEqual(back[1:], pages[1:])               # going back lands on the same pages
+        self.assertEqual([row[1] for row in back[0]], [10, 20, 30])
+
+    def test_pages_without_primary_key_keep_every_row(self):
+        pages, back = all_pages('Leads', 3)
+        details = [row[1] for page in pages for row in page]
+        self.assertEqual(details, ['3', '7', '1', '4', '6', '8', '2', '5'])  # by Source, NULLs last, ties in insert order
+        self.assertEqual([row[1] for page in back for row in page][-len(details):], details)
+
+    def test_primary_key_pages_use_a_plain_range(self):
+        query_stats.reset()
+        self.assertEqual(table_display.fetch_page('Notes', after=(30, 30), page_size=2)[0], [('note 8', 40), ('note 7', 50)])
+        self.assertEqual(table_display.fetch_page('Notes', before=(30, 30), page_size=5)[0], [('note 11', 10), ('note 10', 20)])
+        queries = [query[-1] for query in query_stats.top_queries()]
+        self.assertEqual(len(queries), 2)
+        for query in queries:                               # WHERE t."NoteID" > %s, no OR chain and no row id tie-break
+            self.assertIn('WHERE t."NoteID" ', query)
+            self.assertNotIn(' OR ', query)
+
+    def test_key_ranges(self):
+        self.assertEqual(table_display.key_ranges('t.a', 't.b', (1, 2), True, False),
+                         [('(t.a, t.b) > (%s, %s)', [1, 2]), ('t.a IS NULL', [])])
+        self.assertEqual(table_display.key_ranges('t.a', 't.b', (1, 2), False, False), [('(t.a, t.b) < (%s, %s)', [1, 2])])
+        self.assertEqual(table_display.key_ranges('t.a', 't.b', (None, 2), False, True),
+                         [('t.a IS NULL AND t.b > %s', [2]), ('t.a IS NOT NULL', [])])
+
+class FetchWindowTest(unittest.TestCase):
+    def setUp(self):
+        sqlite_database.reset()
+        for crime_type in ('Theft', None, 'Arson', 'Theft', None, 'Burglary', 'Theft'):
+            sqlite_database.execute('INSERT INTO "Crimes" (Type, Date, Location) VALUES (%s, %s, %s)', (crime_type, '2024-01-01', 'Main St'))
+
+    def test_windows_sorted_by_a_column_with_nulls(self):
+        for descending, expected in ((False, [3, 6, 1, 4, 7, 2, 5]), (True, [7, 4, 1, 6, 3, 5, 2])):
+            windows, back = all_windows('Crimes', 'Type', descending, 2)
+            crime_ids = [row[0] for window in windows for row in window]
+            self.assertEqual(crime_ids, expected)
+            self.assertEqual([row[0] for window in back for row in window][-len(crime_ids):], crime_ids)
+
+    def test_filtered_window(self):
+        rows = table_display.fetch_window('Crimes', 'Type', filter_text='heft', after=('Theft', 1), size=5)[0]
+        self.assertEqual([row[0] for row in rows], [4, 7])
+
+
+def tearDownModule():
+    sqlite_database.remove()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,472 @@
+# Full-screen terminal UI (curses), an alternative to the menus of main.py:  python tui.py
+# The screen is split in a header, the list in the middle and a status line. Moving the selection only repaints the
+# two rows that changed, the rest of the screen is repainted only when its content changes (curses sends the
+# terminal only what differs). Tables are read in windows of WINDOW_ROWS rows with table_display.fetch_window,
+# the next window is fetched when the selection gets close to the end and at most MAX_ROWS rows are kept.
+# Keys: arrows / PgUp / PgDn / Home / End move, Enter opens, q or Esc goes back, Q quits. Messages and questions
+# show up on the status line, nothing waits with sleep.
+import curses
+
+import case_log
+import crime_data
+import database
+import query_stats
+import schema_catalog
+import schema_migrations
+import search
+import table_display
+from case_log import log_entry
+
+
+WINDOW_ROWS = 200                                           # rows fetched per request
+MAX_ROWS = 600                                              # rows kept in memory, the rest is fetched again when scrolled to
+FETCH_MARGIN = 20                                           # how close to the first/last loaded row before the next window is fetched
+MAX_COLUMN_WIDTH = 30
+ENTER_KEYS = (10, 13, curses.KEY_ENTER)
+BACK_KEYS = (27, ord('q'), curses.KEY_BACKSPACE)
+
+class ListScreen:                                           # A screen showing a list of lines with one selected line
+    title = ''
+    keys_help = 'Enter open | q back | Q quit'
+
+    def __init__(self, app):
+        self.app = app
+        self.items = []                                     # the text of every line
+        self.selected = 0
+        self.top = 0                                        # first line on the screen
+
+    def heading(self):                                      # second header line, e.g. the column names
+        return ''
+
+    def on_show(self):                                      # called when the screen comes back to the front
+        pass
+
+    def on_move(self):                                      # True if the lines changed (more rows were fetched)
+        return False
+
+    def on_key(self, key):
+        pass
+
+    def set_items(self, items, selected=0):
+        self.items = items
+        self.selected = min(selected, max(len(items) - 1, 0))
+        self.top = min(self.top, self.selected)
+
+    def draw_line(self, window, index):
+        height, width = window.getmaxyx()
+        row = index - self.top
+        if not 0 <= row < height:
+            return
+        window.move(row, 0)
+        window.clrtoeol()
+        if index < len(self.items):
+            attribute = curses.A_REVERSE if index == self.selected else curses.A_NORMAL
+            window.addnstr(row, 0, self.items[index].ljust(width - 1), width - 1, attribute)
+
+    def draw(self, window):
+        window.erase()
+        height = window.getmaxyx()[0]
+        if not self.items:
+            window.addstr(0, 0, 'Nothing to show')
+        for index in range(self.top, min(self.top + height, len(self.items))):
+            self.draw_line(window, index)
+
+    def move(self, delta, window):                          # Returns True when the whole list has to be repainted
+        if not self.items:
+            return False
+        previous = self.selected
+        self.selected = max(0, min(len(self.items) - 1, self.selected + delta))
+        changed = self.on_move()
+        height = window.getmaxyx()[0]
+        if self.selected < self.top:
+            self.top = self.selected
+            return True
+        if self.selected >= self.top + height:
+            self.top = self.selected - height + 1
+            return True
+        if changed:
+            return True
+        self.draw_line(window, previous)                    # only the old and the new selected row change
+        self.draw_line(window, self.selected)
+        return False
+
+class MenuScreen(ListScreen):
+    title = 'Crime database'
+
+    def __init__(self, app):
+        super(MenuScreen, self).__init__(app)
+        self.actions = [
+            ('Browse tables', lambda: self.app.open(TablesScreen(self.app))),
+            ('Browse crimes', lambda: self.app.open(TableScreen(self.app, 'Crimes'))),
+            ('Add a crime', self.add_crime),
+            ('Search', lambda: self.app.open(SearchScreen(self.app))),
+            ('Performance stats', lambda: self.app.open(StatsScreen(self.app))),
+            ('Quit', self.app.quit),
+        ]
+        self.set_items([label for label, _ in self.actions])
+
+    def on_key(self, key):
+        if key in ENTER_KEYS:
+            self.actions[self.selected][1]()
+
+    def add_crime(self):
+        crime_type = self.app.ask('Type of crime: ')
+        crime_date = crime_type and self.app.ask('Date: ')
+        crime_location = crime_date and self.app.ask('Location: ')
+        if not crime_location or not self.app.confirm('Save this crime?'):  # an empty answer cancels
+            self.app.set_status('Cancelled')
+            return
+        with database.get_cursor(commit=True) as cursor:
+            crime_id = crime_data.add_crime(cursor, crime_type, crime_date, crime_location)
+        log_entry(crime_id, f'New crime added: {crime_type}, Date: {crime_date}, Location: {crime_location}')
+        self.app.set_status(f'Crime #{crime_id} added')
+
+class TablesScreen(ListScreen):
+    title = 'Tables'
+
+    def __init__(self, app):
+        super(TablesScreen, self).__init__(app)
+        self.on_show()
+
+    def on_show(self):
+        self.set_items(schema_catalog.get_tables(), self.selected)
+
+    def on_key(self, key):
+        if key in ENTER_KEYS and self.items:
+            self.app.open(TableScreen(self.app, self.items[self.selected]))
+
+class TableScreen(ListScreen):                              # One table, sorted and filtered like the GUI table browser
+    keys_help = 'Enter crime details | s sort column | r reverse | / filter | q back'
+
+    def __init__(self, app, table_name):
+        super(TableScreen, self).__init__(app)
+        self.table_name = table_name
+        self.sort_column = None                             # None = primary key
+        self.descending = False
+        self.filter_text = ''
+        self.rows = []
+        self.column_names = []
+        self.widths = []
+        self.key_column = None
+        self.more_before = self.more_after = False
+        self.reload()
+
+    @property
+    def title(self):
+        order = (self.sort_column or 'primary key') + (' descending' if self.descending else '')
+        text_filter = f', filter "{self.filter_text}"' if self.filter_text else ''
+        return f'{self.table_name} - sorted by {order}{text_filter}'
+
+    def heading(self):
+        return ' '.join(column_name[:width].ljust(width) for column_name, width in zip(self.column_names, self.widths))
+
+    def format_row(self, row):
+        return ' '.join(('' if value is None else str(value))[:width].ljust(width) for value, width in zip(row, self.widths))
+
+    def fetch(self, after=None, before=None):
+        return table_display.fetch_window(self.table_name, self.sort_column, self.descending, self.filter_text,
+                                          after, before, WINDOW_ROWS)
+
+    def reload(self):                                       # start again from the first row (new order or filter)
+        rows, self.column_names, self.key_column = self.fetch()
+        self.more_before = False
+        self.more_after = len(rows) == WINDOW_ROWS
+        self.rows = rows
+        self.widths = [min(max([len(column_name)] + [len(str(row[index])) for row in rows]), MAX_COLUMN_WIDTH)
+                       for index, column_name in enumerate(self.column_names)]  # from the first window, later rows are cut to fit
+        self.top = 0
+        self.set_items([self.format_row(row) for row in rows])
+        self.catalog_generation = schema_catalog.generation
+
+    def remove_crime(self, crime_id):                       # rows of a crime that was deleted on the crime screen
+        crime_columns = [column_name.lower() for column_name in self.column_names]
+        if 'crimeid' not in crime_columns:
+            return
+        crime_index = crime_columns.index('crimeid')
+        kept = [index for index, row in enumerate(self.rows) if row[crime_index] != crime_id]
+        self.top -= sum(1 for row in self.rows[:self.top] if row[crime_index] == crime_id)  # the same rows stay on screen
+        selected = self.selected - sum(1 for row in self.rows[:self.selected] if row[crime_index] == crime_id)
+        self.rows = [self.rows[index] for index in kept]
+        self.set_items([self.items[index] for index in kept], selected)
+
+    def edge_of(self, row):                                 # (sort value, key value) for fetch_window
+        return row[self.column_names.index(self.sort_column or self.key_column)], row[self.column_names.index(self.key_column)]
+
+    def on_move(self):
+        if self.selected >= len(self.rows) - FETCH_MARGIN and self.more_after:
+            rows = self.fetch(after=self.edge_of(self.rows[-1]))[0]
+            self.more_after = len(rows) == WINDOW_ROWS
+            combined = self.rows + rows
+            removed = max(len(combined) - MAX_ROWS, 0)      # forget the rows at the top, they are fetched again if needed
+            if removed:
+                self.more_before = True
+            self.rows = combined[removed:]
+            self.items = self.items[removed:] + [self.format_row(row) for row in rows]
+            self.selected -= removed
+            self.top = max(self.top - removed, 0)
+            return True
+        if self.selected < FETCH_MARGIN and self.more_before:
+            rows = self.fetch(before=self.edge_of(self.rows[0]))[0]
+            self.more_before = len(rows) == WINDOW_ROWS
+            combined = rows + self.rows
+            removed = max(len(combined) - MAX_ROWS, 0)      # forget the rows at the bottom
+            if removed:
+                self.more_after = True
+            self.rows = combined[:len(combined) - removed]
+            self.items = ([self.format_row(row) for row in rows] + self.items)[:len(self.rows)]
+            self.selected += len(rows)
+            self.top += len(rows)
+            return True
+        return False
+
+    def on_key(self, key):
+        if key == ord('s') and self.column_names:
+            columns = self.column_names
+            current = columns.index(self.sort_column or self.key_column)
+            self.sort_column = columns[(current + 1) % len(columns)]
+            self.descending = False
+            self.reload()
+            self.app.redraw()
+        elif key == ord('r'):
+            self.descending = not self.descending
+            self.reload()
+            self.app.redraw()
+        elif key == ord('/'):
+            self.filter_text = self.app.ask('Filter rows containing (empty = no filter): ').strip()
+            self.reload()
+            self.app.redraw()
+        elif key in ENTER_KEYS and self.rows:
+            crime_columns = [column_name.lower() for column_name in self.column_names]
+            if 'crimeid' in crime_columns:
+                crime_id = self.rows[self.selected][crime_columns.index('crimeid')]
+                if crime_id is not None:
+                    self.app.open(CrimeScreen(self.app, crime_id))
+
+    def on_show(self):                                      # keep the position, only a schema change starts again from the top
+        if schema_catalog.generation != self.catalog_generation:
+            self.reload()
+
+class CrimeScreen(ListScreen):                              # One crime with its evidence, officers and suspects
+    keys_help = 'e add evidence | d delete the crime | q back'
+
+    def __init__(self, app, crime_id):
+        super(CrimeScreen, self).__init__(app)
+        self.crime_id = crime_id
+        self.title = f'Crime #{crime_id}'
+        self.on_show()
+
+    def on_show(self):
+        with database.get_cursor() as cursor:
+            dossiers = list(crime_data.fetch_crime_dossiers(cursor, [self.crime_id]))
+        if not dossiers:
+            self.set_items([f'Crime #{self.crime_id} does not exist (any more)'])
+            return
+        _, crime_type, crime_date, crime_location, evidence, officers, suspects = dossiers[0]
+        lines = [f'Type: {crime_type}', f'Date: {crime_date}', f'Location: {crime_location}', '']
+        lines += ['Evidence:'] + [f'  - Type: {item[0]}, Description: {item[1]}' for item in evidence] + ['']
+        lines += ['Officers:'] + [f'  - Name: {item[0]}, Rank: {item[1]}, Department: {item[2]}' for item in officers] + ['']
+        lines += ['Suspects:'] + [f'  - Name: {item[0]}, Age: {item[1]}, Description: {item[2]}' for item in suspects]
+        self.set_items(lines, self.selected)
+
+    def on_key(self, key):
+        if key == ord('e'):
+            evidence_type = self.app.ask('Type of evidence: ')
+            evidence_description = evidence_type and self.app.ask('Description: ')
+            if not evidence_description or not self.app.confirm('Save this evidence?'):
+                self.app.set_status('Cancelled')
+                return
+            with database.get_cursor(commit=True) as cursor:
+                crime_data.attach_to_crimes(cursor, 'Evidence', (evidence_type, evidence_description), [self.crime_id])
+            log_entry(self.crime_id, f'New evidence added: {evidence_type}, Description: {evidence_description}')
+            self.on_show()
+            self.app.redraw()
+            self.app.set_status('Evidence added')
+        elif key == ord('d'):
+            if not self.app.confirm(f'Delete crime #{self.crime_id} and all related information?'):
+                self.app.set_status('Cancelled')
+                return
+            with database.get_cursor(commit=True) as cursor:
+                deleted_ids, row_counts = crime_data.delete_crimes(cursor, [self.crime_id])
+            case_log.log_entries(deleted_ids, 'Crime and all related information deleted')
+            for screen in self.app.screens:
+                if isinstance(screen, TableScreen):
+                    screen.remove_crime(self.crime_id)
+            self.app.back()
+            self.app.set_status('Deleted - ' + ' | '.join(f'{table_name}: {count}' for table_name, count in row_counts.items()))
+
+class SearchScreen(ListScreen):
+    title = 'Search crimes, evidence and suspects'
+    keys_help = 'Enter crime details | / new search | q back'
+
+    def __init__(self, app):
+        super(SearchScreen, self).__init__(app)
+        self.results = []
+        self.text = ''
+
+    def on_key(self, key):
+        if key == ord('/'):
+            self.new_search()
+        elif key in ENTER_KEYS and self.results:
+            crime_id = self.results[self.selected][2]
+            if crime_id is not None:
+                self.app.open(CrimeScreen(self.app, crime_id))
+
+    def new_search(self):
+        text = self.app.ask('Search for: ')
+        if not text:
+            return
+        self.text = text
+        self.results = search.search(text)
+        self.title = f'Search: {text}'
+        self.top = 0
+        self.set_items([f'{rank:.3f} | {source} #{record_id} | Crime #{crime_id} | {summary}'
+                        for source, record_id, crime_id, summary, rank in self.results])
+        self.app.redraw()
+        self.app.set_status(f'{len(self.results)} results' if self.results else 'Nothing found')
+
+class StatsScreen(ListScreen):
+    title = 'Performance stats - top queries by total time'
+    keys_help = 'g refresh | r reset | q back'
+
+    def __init__(self, app):
+        super(StatsScreen, self).__init__(app)
+        self.on_show()
+
+    def heading(self):
+        return f"{'Total ms':>10} | {'Calls':>6} | {'Mean ms':>8} | {'p95 ms':>8} | {'Rows':>7} | Caller | Query"
+
+    def on_show(self):
+        self.set_items([f'{total:10.1f} | {calls:6} | {mean:8.2f} | {p95:8.2f} | {rows:7} | {caller} | {query}'
+                        for total, calls, mean, p95, maximum, rows, caller, query in query_stats.top_queries()], self.selected)
+
+    def on_key(self, key):
+        if key == ord('r'):
+            query_stats.reset()
+        if key in (ord('r'), ord('g')):
+            self.on_show()
+            self.app.redraw()
+
+class App:
+    def __init__(self, screen):
+        self.screen = screen
+        self.screens = []
+        self.status_text = ''
+        curses.curs_set(0)
+        self.make_windows()
+
+    def make_windows(self):                                 # header (2 lines), list, status line
+        height, width = self.screen.getmaxyx()
+        self.header = curses.newwin(2, width, 0, 0)
+        self.body = curses.newwin(max(height - 3, 1), width, 2, 0)
+        self.status = curses.newwin(1, width, height - 1, 0)
+        self.body.keypad(True)
+
+    def open(self, screen):
+        self.screens.append(screen)
+        self.status_text = ''
+        self.redraw()
+
+    def back(self):
+        self.screens.pop()
+        if self.screens:
+            self.screens[-1].on_show()
+            self.redraw()
+
+    def quit(self):
+        self.screens = []
+
+    def redraw(self):                                       # repaint everything (new screen, new content or a resized terminal)
+        current = self.screens[-1]
+        width = self.header.getmaxyx()[1]
+        self.header.erase()
+        self.header.addnstr(0, 0, current.title, width - 1, curses.A_BOLD)
+        self.header.addnstr(1, 0, current.heading(), width - 1, curses.A_UNDERLINE)
+        self.header.noutrefresh()
+        current.draw(self.body)
+        self.body.noutrefresh()
+        self.draw_status()
+        curses.doupdate()
+
+    def draw_status(self):                                  # the last message, otherwise the keys of the screen
+        width = self.status.getmaxyx()[1]
+        self.status.erase()
+        self.status.addnstr(0, 0, self.status_text or self.screens[-1].keys_help, width - 1, curses.A_REVERSE)
+        self.status.noutrefresh()
+
+    def set_status(self, text):
+        self.status_text = text
+        if self.screens:
+            self.draw_status()
+            curses.doupdate()
+
+    def ask(self, prompt):                                  # Read a line of text on the status line
+        width = self.status.getmaxyx()[1]
+        self.status.erase()
+        self.status.addnstr(0, 0, prompt, width - 1)
+        self.status.refresh()
+        curses.echo()
+        curses.curs_set(1)
+        try:
+            answer = self.status.getstr(0, min(len(prompt), width - 2), 200).decode(errors='replace')
+        finally:
+            curses.noecho()
+            curses.curs_set(0)
+        self.status_text = ''
+        self.draw_status()
+        curses.doupdate()
+        return answer
+
+    def confirm(self, question):
+        self.status_text = f'{question} (y/n)'
+        self.draw_status()
+        curses.doupdate()
+        key = self.body.getch()
+        self.status_text = ''
+        self.draw_status()
+        curses.doupdate()
+        return key in (ord('y'), ord('Y'))
+
+    def run(self):
+        self.open(MenuScreen(self))
+        while self.screens:
+            key = self.body.getch()
+            current = self.screens[-1]
+            if self.status_text:                            # a message stays until the next key
+                self.status_text = ''
+                self.draw_status()
+            height = self.body.getmaxyx()[0]
+            try:
+                if key == curses.KEY_RESIZE:
+                    curses.update_lines_cols()
+                    self.make_windows()
+                    self.redraw()
+                elif key == ord('Q'):
+                    self.quit()
+                elif key in BACK_KEYS and len(self.screens) > 1:
+                    self.back()
+                elif key in (curses.KEY_UP, curses.KEY_DOWN, curses.KEY_PPAGE, curses.KEY_NPAGE, curses.KEY_HOME, curses.KEY_END):
+                    delta = {curses.KEY_UP: -1, curses.KEY_DOWN: 1, curses.KEY_PPAGE: -height, curses.KEY_NPAGE: height,
+                             curses.KEY_HOME: -len(current.items), curses.KEY_END: len(current.items)}[key]
+                    if current.move(delta, self.body):
+                        current.draw(self.body)
+                    self.body.noutrefresh()
+                    curses.doupdate()
+                else:
+                    current.on_key(key)
+            except database.Error as e:
+                self.set_status(f'An error occurred: {e}')
+
+def main(screen):
+    App(screen).run()
+
+if __name__ == '__main__':
+    database.open_pool()
+    if schema_catalog.LISTEN_FOR_CHANGES:
+        schema_catalog.listen_for_changes()
+    schema_migrations.migrate()
+    try:
+        curses.wrapper(main)
+    finally:
+        case_log.shutdown()                                 # every log entry is written before we leave
+        schema_catalog.stop_listening()
+        database.close_pool()